@@ -1,5 +1,7 @@
 #include <math.h>
 
+#include "_c_interpolation_catmull_rom.h"
+
 double _c_calculate_dw(double distance, double tSS) {
   return pow((distance * exp((-distance * distance) / tSS)), 4);
 }
@@ -26,16 +28,20 @@ float _c_calculate_rgc(int xM, int yM, float* imIntGx, float* imIntGy, float* im
     int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
     int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
 
+    // w and h are the magnified dimensions, while vx and vy are in original pixel units
+    int w_original = w / magnification;
+    int h_original = h / magnification;
+
     for (int j = _start; j < _end; j++) {
         vy = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
         vy /= Gx_Gy_MAGNIFICATION;
 
-        if (0 < vy && vy <= h - 1) {
+        if (0 < vy && vy <= h_original - 1) {
             for (int i = _start; i < _end; i++) {
                 vx = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
                 vx /= Gx_Gy_MAGNIFICATION;
 
-                if (0 < vx && vx <= w - 1) {
+                if (0 < vx && vx <= w_original - 1) {
                     dx = vx - xc;
                     dy = vy - yc;
                     distance = sqrt(dx * dx + dy * dy);
@@ -68,3 +74,298 @@ float _c_calculate_rgc(int xM, int yM, float* imIntGx, float* imIntGy, float* im
 
     return RGC;
 }
+
+// Same as _c_calculate_rgc, but instead of reading the gradients from arrays magnified by
+// (magnification * Gx_Gy_MAGNIFICATION), they are interpolated on the fly from the gradients of the original image
+// (imGx, imGy with h / magnification rows and w / magnification columns), so no magnified arrays are needed
+float _c_calculate_rgc_interpolated(int xM, int yM, float* imGx, float* imGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity, float shift_row, float shift_col) {
+
+    float vx, vy, Gx, Gy, dx, dy, distance, distanceWeight, GdotR, Dk;
+    int rMG, cMG;
+    float magnificationMG = magnification * Gx_Gy_MAGNIFICATION;
+
+    float xc = (xM + 0.5) / magnification;
+    float yc = (yM + 0.5) / magnification;
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
+    int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
+
+    // w and h are the magnified dimensions, while vx and vy are in original pixel units
+    int w_original = w / magnification;
+    int h_original = h / magnification;
+
+    for (int j = _start; j < _end; j++) {
+        vy = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
+        vy /= Gx_Gy_MAGNIFICATION;
+
+        if (0 < vy && vy <= h_original - 1) {
+            for (int i = _start; i < _end; i++) {
+                vx = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
+                vx /= Gx_Gy_MAGNIFICATION;
+
+                if (0 < vx && vx <= w_original - 1) {
+                    dx = vx - xc;
+                    dy = vy - yc;
+                    distance = sqrt(dx * dx + dy * dy);
+
+                    if (distance != 0 && distance <= tSO) {
+                        // Catmull-Rom interpolation of the original gradients at the same (magnification * Gx_Gy_MAGNIFICATION) grid
+                        // positions read by _c_calculate_rgc, shifted as the gradients magnified by ShiftAndMagnify
+                        rMG = (int)(vy * magnificationMG);
+                        cMG = (int)(vx * magnificationMG);
+                        Gx = _c_interpolate(imGx, rMG / magnificationMG - shift_row, cMG / magnificationMG - shift_col, h_original, w_original);
+                        Gy = _c_interpolate(imGy, rMG / magnificationMG - shift_row, cMG / magnificationMG - shift_col, h_original, w_original);
+
+                        distanceWeight = _c_calculate_dw(distance, tSS);
+                        distanceWeightSum += distanceWeight;
+                        GdotR = Gx*dx + Gy*dy;
+
+                        if (GdotR < 0) {
+                            Dk = _c_calculate_dk(Gx, Gy, dx, dy, distance);
+                            RGC += Dk * distanceWeight;
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
+
+// Number of neighbours stored per subpixel phase by _c_calculate_rgc_tables
+int _c_rgc_table_width(float Gx_Gy_MAGNIFICATION, float fwhm) {
+    int n = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1) + (int)(Gx_Gy_MAGNIFICATION * fwhm);
+    return n * n;
+}
+
+// The neighbourhood of a magnified pixel (xM, yM) only depends on its subpixel phase (xM % magnification,
+// yM % magnification), so the offsets and distance weights used by _c_calculate_rgc are computed once per phase.
+// For each of the magnification * magnification phases, up to table_width neighbours are stored:
+// offsets holds the (row, col) offsets in the gradient grid, relative to Gx_Gy_MAGNIFICATION times the
+// original pixel, weights holds the unit vector (ux, uy) pointing to the neighbour and its distance weight,
+// and counts holds the number of neighbours of the phase
+void _c_calculate_rgc_tables(int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, int* offsets, float* weights, int* counts) {
+
+    float vx, vy, dx, dy, distance;
+    int table_width = _c_rgc_table_width(Gx_Gy_MAGNIFICATION, fwhm);
+
+    int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
+    int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
+
+    for (int pY = 0; pY < magnification; pY++) {
+        for (int pX = 0; pX < magnification; pX++) {
+            int phase = pY * magnification + pX;
+            int n = 0;
+
+            float xc = (pX + 0.5) / magnification;
+            float yc = (pY + 0.5) / magnification;
+
+            for (int j = _start; j < _end; j++) {
+                int kY = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
+                vy = kY / Gx_Gy_MAGNIFICATION;
+
+                for (int i = _start; i < _end; i++) {
+                    int kX = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
+                    vx = kX / Gx_Gy_MAGNIFICATION;
+
+                    dx = vx - xc;
+                    dy = vy - yc;
+                    distance = sqrt(dx * dx + dy * dy);
+
+                    if (distance != 0 && distance <= tSO) {
+                        int idx = phase * table_width + n;
+                        offsets[idx * 2] = kY;
+                        offsets[idx * 2 + 1] = kX;
+                        weights[idx * 3] = dx / distance;
+                        weights[idx * 3 + 1] = dy / distance;
+                        weights[idx * 3 + 2] = _c_calculate_dw(distance, tSS);
+                        n++;
+                    }
+                }
+            }
+            counts[phase] = n;
+        }
+    }
+}
+
+// Same as _c_calculate_rgc, but the neighbour offsets and distance weights are read from the per-phase tables built
+// by _c_calculate_rgc_tables, so the inner loop is reduced to table lookups and a few multiply-adds.
+// Gx_Gy_MAGNIFICATION must be an integer
+float _c_calculate_rgc_tabulated(int xM, int yM, float* imIntGx, float* imIntGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity, int* offsets, float* weights, int* counts, int table_width) {
+
+    float vx, vy, Gx, Gy, ux, uy, distanceWeight, GdotR, Dk, G;
+    long idx;
+
+    int G_magnification = (int)Gx_Gy_MAGNIFICATION;
+    int wMG = (int)(w * Gx_Gy_MAGNIFICATION);
+    int phase = (yM % magnification) * magnification + (xM % magnification);
+    int kY0 = (yM / magnification) * G_magnification;
+    int kX0 = (xM / magnification) * G_magnification;
+
+    int* _offsets = &offsets[phase * table_width * 2];
+    float* _weights = &weights[phase * table_width * 3];
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    // w and h are the magnified dimensions, while vx and vy are in original pixel units
+    int w_original = w / magnification;
+    int h_original = h / magnification;
+
+    for (int n = 0; n < counts[phase]; n++) {
+        int kY = kY0 + _offsets[n * 2];
+        int kX = kX0 + _offsets[n * 2 + 1];
+        vy = kY / Gx_Gy_MAGNIFICATION;
+        vx = kX / Gx_Gy_MAGNIFICATION;
+
+        if (0 < vy && vy <= h_original - 1 && 0 < vx && vx <= w_original - 1) {
+            idx = (long)kY * magnification * wMG + (long)kX * magnification;
+            Gx = imIntGx[idx];
+            Gy = imIntGy[idx];
+            ux = _weights[n * 3];
+            uy = _weights[n * 3 + 1];
+            distanceWeight = _weights[n * 3 + 2];
+
+            distanceWeightSum += distanceWeight;
+            GdotR = Gx * ux + Gy * uy;
+
+            if (GdotR < 0) {
+                // same as _c_calculate_dk, with the offset already normalized by the distance
+                G = sqrt(Gx * Gx + Gy * Gy);
+                Dk = 1 - fabs(Gy * ux - Gx * uy) / G;
+                RGC += Dk * distanceWeight;
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
+
+// Trilinear interpolation of a (d, h, w) volume at (z, y, x), in voxel index coordinates, clamped to the volume
+float _c_interpolate_trilinear(float* volume, float z, float y, float x, int d, int h, int w) {
+    z = fmin(fmax(z, 0.0f), (float)(d - 1));
+    y = fmin(fmax(y, 0.0f), (float)(h - 1));
+    x = fmin(fmax(x, 0.0f), (float)(w - 1));
+
+    int z0 = (int)z;
+    int y0 = (int)y;
+    int x0 = (int)x;
+    int z1 = z0 + 1 < d ? z0 + 1 : z0;
+    int y1 = y0 + 1 < h ? y0 + 1 : y0;
+    int x1 = x0 + 1 < w ? x0 + 1 : x0;
+    float fz = z - z0;
+    float fy = y - y0;
+    float fx = x - x0;
+
+    long hw = (long)h * w;
+    float c00 = volume[z0 * hw + y0 * w + x0] * (1 - fx) + volume[z0 * hw + y0 * w + x1] * fx;
+    float c01 = volume[z0 * hw + y1 * w + x0] * (1 - fx) + volume[z0 * hw + y1 * w + x1] * fx;
+    float c10 = volume[z1 * hw + y0 * w + x0] * (1 - fx) + volume[z1 * hw + y0 * w + x1] * fx;
+    float c11 = volume[z1 * hw + y1 * w + x0] * (1 - fx) + volume[z1 * hw + y1 * w + x1] * fx;
+
+    return (c00 * (1 - fy) + c01 * fy) * (1 - fz) + (c10 * (1 - fy) + c11 * fy) * fz;
+}
+
+// Distance from the centre to the line through the neighbour along the gradient, |G x d| / |G|, as a fraction of
+// the distance, 1 if the gradient points exactly to the centre
+double _c_calculate_dk_3d(float Gx, float Gy, float Gz, float dx, float dy, float dz, float distance) {
+    float cx = Gy * dz - Gz * dy;
+    float cy = Gz * dx - Gx * dz;
+    float cz = Gx * dy - Gy * dx;
+    float Dk = sqrt(cx * cx + cy * cy + cz * cz) / sqrt(Gx * Gx + Gy * Gy + Gz * Gz);
+    if (isnan(Dk)) {
+        Dk = distance;
+    }
+    Dk = 1 - Dk / distance;
+    return Dk;
+}
+
+// 3D version of _c_calculate_rgc, for the magnified voxel (xM, yM, zM) of a (d, h, w) volume.
+// The gradients imGx, imGy and imGz are calculated by _c_gradient_3d on the original volume, where the gradient
+// at index i lies between voxels i and i + 1, and are interpolated at the Gx_Gy_MAGNIFICATION grid positions
+float _c_calculate_rgc_3d(int xM, int yM, int zM, float* imGx, float* imGy, float* imGz, int w, int h, int d, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity) {
+
+    float vx, vy, vz, Gx, Gy, Gz, dx, dy, dz, distance, distanceWeight, GdotR, Dk;
+
+    float xc = (xM + 0.5) / magnification;
+    float yc = (yM + 0.5) / magnification;
+    float zc = (zM + 0.5) / magnification;
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
+    int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
+
+    for (int k = _start; k < _end; k++) {
+        vz = (int)(Gx_Gy_MAGNIFICATION * zc) + k;
+        vz /= Gx_Gy_MAGNIFICATION;
+
+        if (0 < vz && vz <= d - 1) {
+            for (int j = _start; j < _end; j++) {
+                vy = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
+                vy /= Gx_Gy_MAGNIFICATION;
+
+                if (0 < vy && vy <= h - 1) {
+                    for (int i = _start; i < _end; i++) {
+                        vx = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
+                        vx /= Gx_Gy_MAGNIFICATION;
+
+                        if (0 < vx && vx <= w - 1) {
+                            dx = vx - xc;
+                            dy = vy - yc;
+                            dz = vz - zc;
+                            distance = sqrt(dx * dx + dy * dy + dz * dz);
+
+                            if (distance != 0 && distance <= tSO) {
+                                // the last gradient of each axis (index n - 2) lies at n - 1
+                                Gx = _c_interpolate_trilinear(imGx, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+                                Gy = _c_interpolate_trilinear(imGy, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+                                Gz = _c_interpolate_trilinear(imGz, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+
+                                distanceWeight = _c_calculate_dw(distance, tSS);
+                                distanceWeightSum += distanceWeight;
+                                GdotR = Gx * dx + Gy * dy + Gz * dz;
+
+                                if (GdotR < 0) {
+                                    Dk = _c_calculate_dk_3d(Gx, Gy, Gz, dx, dy, dz, distance);
+                                    RGC += Dk * distanceWeight;
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
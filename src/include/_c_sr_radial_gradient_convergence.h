@@ -9,4 +9,18 @@ double _c_calculate_dk(float Gx, float Gy, float dx, float dy, float distance);
 
 float _c_calculate_rgc(int xM, int yM, float* imIntGx, float* imIntGy, float* imInt, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity);
 
+float _c_calculate_rgc_interpolated(int xM, int yM, float* imGx, float* imGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity, float shift_row, float shift_col);
+
+int _c_rgc_table_width(float Gx_Gy_MAGNIFICATION, float fwhm);
+
+void _c_calculate_rgc_tables(int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, int* offsets, float* weights, int* counts);
+
+float _c_calculate_rgc_tabulated(int xM, int yM, float* imIntGx, float* imIntGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity, int* offsets, float* weights, int* counts, int table_width);
+
+float _c_interpolate_trilinear(float* volume, float z, float y, float x, int d, int h, int w);
+
+double _c_calculate_dk_3d(float Gx, float Gy, float Gz, float dx, float dy, float dz, float distance);
+
+float _c_calculate_rgc_3d(int xM, int yM, int zM, float* imGx, float* imGy, float* imGz, int w, int h, int d, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity);
+
 #endif
@@ -10,7 +10,7 @@ float _c_calculate_dk(float x, float y, float xc, float yc, float vGx, float vGy
     return Dk;
 }
 
-float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy, float* xRingCoordinates, float* yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w) {
+float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy, float* xRingCoordinates, float* yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w, float shift_row, float shift_col) {
     int sampleIter;
     float x0, y0, xc, yc, xRing, yRing, vGx, vGy, GMag, Dk, DivDFactor = 0, CGH = 0;
 
@@ -24,8 +24,8 @@ float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy
         x0 = xc + xRing;
         y0 = yc + yRing;
 
-        vGx = _c_interpolate(imGx, y0 / magnification, x0 / magnification, h, w);
-        vGy = _c_interpolate(imGy, y0 / magnification, x0 / magnification, h, w);
+        vGx = _c_interpolate(imGx, y0 / magnification - shift_row, x0 / magnification - shift_col, h, w);
+        vGy = _c_interpolate(imGy, y0 / magnification - shift_row, x0 / magnification - shift_col, h, w);
         GMag = sqrt(vGx * vGx + vGy * vGy);
 
         Dk = _c_calculate_dk(x0, y0, xc, yc, vGx, vGy, GMag, ringRadius);
@@ -40,7 +40,7 @@ float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy
     DivDFactor /= nRingCoordinates;
 
     if (radialityPositivityConstraint == 1) {
-        CGH = fmaxf(DivDFactor, 0);
+        CGH = fmax(DivDFactor, 0);
     } else {
         CGH = DivDFactor;
     }
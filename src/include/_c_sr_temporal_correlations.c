@@ -0,0 +1,82 @@
+#include <math.h>
+
+#include "_c_sr_temporal_correlations.h"
+
+// Pairwise product sum of a pixel time series x[t * stride], as calculate_pairwise_product_sum:
+// the sum over all pairs t0 <= t1 of r[t0] * r[t1], with r = max(x, 0), divided by the number of pairs.
+// Calculated in O(T) with sum_{t0 <= t1} r[t0] * r[t1] = ((sum r)^2 + sum r^2) / 2
+float _c_calculate_pps(float* x, int n_frames, long stride) {
+  float r, sum = 0, sum_sq = 0;
+
+  for (int t = 0; t < n_frames; t++) {
+    r = fmax(x[t * stride], 0);
+    sum += r;
+    sum_sq += r * r;
+  }
+
+  return (sum * sum + sum_sq) / ((float)n_frames * (n_frames + 1));
+}
+
+// Auto-cumulant of order 2, 3 or 4 of a pixel time series x[t * stride], as calculate_acrf_.
+// With do_integrate_lag_times, the series is binned in place between passes, so x must be a copy
+float _c_calculate_acrf(float* x, int n_frames, long stride, int order, int do_integrate_lag_times) {
+  float a, b, c, d;
+  float ab = 0, abc = 0, abcd = 0, cd = 0, ac = 0, bd = 0, ad = 0, bc = 0;
+  float mean = 0, out = 0;
+
+  for (int t = 0; t < n_frames; t++) {
+    mean += x[t * stride];
+  }
+  mean /= n_frames;
+
+  float n_binned_frames = n_frames;
+
+  while (n_binned_frames > order) {
+    ab = 0;
+
+    for (int t = 0; t < n_binned_frames - order; t++) {
+      a = x[t * stride] - mean;
+      b = x[(t + 1) * stride] - mean;
+      ab += a * b;
+
+      if (order == 3) {
+        c = x[(t + 2) * stride] - mean;
+        abc += a * b * c;
+      } else if (order == 4) {
+        c = x[(t + 2) * stride] - mean;
+        d = x[(t + 3) * stride] - mean;
+        abcd += a * b * c * d;
+        cd += c * d;
+        ac += a * c;
+        bd += b * d;
+        ad += a * d;
+        bc += b * c;
+      }
+
+      if (do_integrate_lag_times) {
+        int tbin = t * order;
+        x[t * stride] = 0;
+        if (tbin < n_binned_frames) {
+          for (int _t = 0; _t < order - 1 && tbin + _t < n_frames; _t++) {
+            x[t * stride] += x[(tbin + _t) * stride] / order;
+          }
+        }
+      }
+    }
+
+    if (order == 3) {
+      out = fabs(abc) / n_binned_frames;
+    } else if (order == 4) {
+      out = fabs(abcd - ab * cd - ac * bd - ad * bc) / n_binned_frames;
+    } else {
+      out = fabs(ab) / n_binned_frames;
+    }
+
+    if (!do_integrate_lag_times) {
+      break;
+    }
+    n_binned_frames = n_binned_frames / order;
+  }
+
+  return out;
+}
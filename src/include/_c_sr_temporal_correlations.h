@@ -0,0 +1,10 @@
+#ifndef _C_SR_TEMPORAL_CORRELATIONS_H
+#define _C_SR_TEMPORAL_CORRELATIONS_H
+
+#include <math.h>
+
+float _c_calculate_pps(float* x, int n_frames, long stride);
+
+float _c_calculate_acrf(float* x, int n_frames, long stride, int order, int do_integrate_lag_times);
+
+#endif
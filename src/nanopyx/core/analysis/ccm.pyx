@@ -3,7 +3,12 @@
 import numpy as np
 cimport numpy as np
 
+from functools import lru_cache
+
+from scipy import fft as sp_fft
+
 import cython
+from cython.parallel import prange
 from libc.math cimport pi
 
 from .ccm_helper_functions cimport _check_even_square, _make_even_square
@@ -29,23 +34,9 @@ cdef float[:, :, :] _calculate_ccm(float[:, :, :] img_stack, int ref):
     if not _check_even_square(img_stack):
         img_stack = _make_even_square(img_stack)
 
-    cdef int stack_w = img_stack.shape[2]
-    cdef int stack_h = img_stack.shape[1]
-    cdef int stack_n = img_stack.shape[0]
-    cdef float[:, :, :] ccm = np.empty((stack_n, stack_h, stack_w), dtype=np.float32)
-
-    cdef float[:, :] img_ref
-    cdef int i, _n 
-
-    for i in range(stack_n):
-        if ref == 0:
-            img_ref = img_stack[0]
-        else:
-            _n = max(0, i-1)
-            img_ref = img_stack[_n]
-        ccm[i] = _calculate_slice_ccm(img_ref, img_stack[i])
-
-    return ccm
+    if ref == 0:
+        return _calculate_ccm_batched(img_stack, img_stack[0])
+    return _calculate_ccm_batched(img_stack, None)
 
 
 def calculate_ccm_from_ref(np.ndarray img_stack, np.ndarray img_ref):
@@ -72,23 +63,82 @@ cdef float[:, :, :] _calculate_ccm_from_ref(float[:, :, :] img_stack, float[:, :
         tmp = _make_even_square(tmp)
         img_ref = tmp[0]
 
-    cdef int stack_w = img_stack.shape[2]
-    cdef int stack_h = img_stack.shape[1]
-    cdef int stack_n = img_stack.shape[0]
-    cdef float[:, :, :] ccm = np.empty((stack_n, stack_h, stack_w), dtype=np.float32)
+    return _calculate_ccm_batched(img_stack, img_ref)
 
-    for i in range(stack_n):
-        ccm[i] = _calculate_slice_ccm(img_ref, img_stack[i])
 
-    return ccm
+@lru_cache(maxsize=8)
+def _get_ccm_phase_ramp(int h, int w):
+    """
+    Phase ramp that circularly shifts a cross correlation by (h - 1 - h // 2, w - 1 - w // 2), which is the
+    fftshift followed by the flip of both axes of the correlation of the reference with the slice, applied in the
+    frequency domain so that neither needs a copy
+    :return: complex64 array with the shape of the real FFT of a (h, w) image, (h, w // 2 + 1)
+    """
+    freq_row = np.fft.fftfreq(h)[:, np.newaxis] * (h - 1 - h // 2)
+    freq_col = np.fft.rfftfreq(w)[np.newaxis, :] * (w - 1 - w // 2)
+    ramp = np.exp(-2j * pi * (freq_row + freq_col)).astype(np.complex64)
+    ramp.setflags(write=False)
+    return ramp
 
 
-cdef float[:, :] _calculate_slice_ccm(float[:, :] img_ref, float[:, :] img_slice):
-    cdef float[:, :] ccm_slice = np.fft.fftshift(np.fft.ifft2(np.fft.fft2(img_ref) * np.fft.fft2(img_slice).conj())).real.astype(np.float32)
-    ccm_slice = ccm_slice[::-1, ::-1]
-    _normalize_ccm(img_ref, img_slice, ccm_slice)
+cdef float[:, :, :] _calculate_ccm_batched(float[:, :, :] img_stack, img_ref, int workers=-1, int frames_per_batch=32):
+    """
+    Calculates the normalized cross correlation matrix of each slice of an even square stack against a reference,
+    with float32 real FFTs of batches of frames computed by multiple workers
+    :param img_stack: float32 array with shape (t, y, x)
+    :param img_ref: float32 array with shape (y, x), transformed only once, or None to use the previous slice as the
+        reference of each slice (the first slice is its own reference), reusing the FFT of the previous slice
+    :param workers: number of threads used by the FFTs, -1 uses all available cores
+    :param frames_per_batch: number of frames transformed together
+    :return: float32 array with shape (t, y, x)
+    """
+    cdef int stack_n = img_stack.shape[0]
+    cdef int stack_h = img_stack.shape[1]
+    cdef int stack_w = img_stack.shape[2]
+
+    stack = np.asarray(img_stack, dtype=np.float32)
+    ccm = np.empty((stack_n, stack_h, stack_w), dtype=np.float32)
+    ramp = _get_ccm_phase_ramp(stack_h, stack_w)
+
+    if img_ref is not None:
+        img_ref = np.ascontiguousarray(img_ref, dtype=np.float32)
+        ref_ft = np.conj(sp_fft.rfft2(img_ref, workers=workers))
+        ref_ft *= ramp
+
+    previous_ft = None
+    cdef int f0, f1
+    for f0 in range(0, stack_n, max(1, frames_per_batch)):
+        f1 = min(f0 + max(1, frames_per_batch), stack_n)
+        product = sp_fft.rfft2(stack[f0:f1], axes=(-2, -1), workers=workers)
+        if img_ref is None:
+            last_ft = product[f1 - f0 - 1].copy()
+            # each slice is correlated with the previous one, whose FFT is the previous one in the batch
+            ref_ft = np.conj(product[:f1 - f0 - 1])
+            if previous_ft is None:
+                ref_ft = np.concatenate((np.conj(product[:1]), ref_ft))
+            else:
+                ref_ft = np.concatenate((np.conj(previous_ft)[np.newaxis], ref_ft))
+            ref_ft *= ramp
+            previous_ft = last_ft
+        product *= ref_ft
+        ccm[f0:f1] = sp_fft.irfft2(product, s=(stack_h, stack_w), axes=(-2, -1), workers=workers)
+
+    cdef float[:, :, :] _ccm = ccm
+    cdef bint previous_ref = img_ref is None
+    cdef float[:, :] _img_ref = img_stack[0] if previous_ref else img_ref
+    cdef int i
+    with nogil:
+        for i in prange(stack_n):
+            if previous_ref:
+                _normalize_ccm(img_stack[max(0, i - 1)], img_stack[i], _ccm[i])
+            else:
+                _normalize_ccm(_img_ref, img_stack[i], _ccm[i])
+
+    return _ccm
 
-    return ccm_slice[0:ccm_slice.shape[0], 0:ccm_slice.shape[1]]
+
+cdef float[:, :] _calculate_slice_ccm(float[:, :] img_ref, float[:, :] img_slice):
+    return _calculate_ccm_batched(np.asarray(img_slice)[np.newaxis], img_ref)[0]
 
 def calculate_slice_ccm(np.ndarray img_ref, np.ndarray img_slice):
     return np.array(_calculate_slice_ccm(img_ref, img_slice))
@@ -173,18 +223,16 @@ cdef float[:,:,:] _calculate_rccm(float[:, :] img_slice, float[:, :] img_ref):
     cdef int height = img_slice.shape[0]
     cdef int width = img_slice.shape[1]
 
-    cdef float[:,:,:] rccm = np.empty((360,height,width), dtype=np.float32)
-
-    cdef float[:,:] rotated_img_slice
+    rotated_img_slices = np.empty((360,height,width), dtype=np.float32)
 
     cdef int degree
     cdef float radian
     for degree in range(360):
         radian = degree * pi/180
-        rotated_img_slice = Interpolator(img_slice).rotate(radian)
-        rccm[degree] = _calculate_slice_ccm(img_ref, rotated_img_slice)
+        rotated_img_slices[degree] = Interpolator(img_slice).rotate(radian)
 
-    return rccm
+    # all the rotations are correlated with the same reference, transformed once
+    return _calculate_ccm_batched(rotated_img_slices, img_ref)
 
 def calculate_ccm_cartesian(np.ndarray img_slice, np.ndarray img_ref): # TODO DEPRECATED?
     """
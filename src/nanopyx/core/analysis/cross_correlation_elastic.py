@@ -3,11 +3,13 @@ from math import sqrt
 from skimage.filters import gaussian
 
 from .ccm import calculate_ccm_from_ref
-from .estimate_shift import GetMaxOptimizer
+from .estimate_shift import get_subpixel_max
 from ..transform.blocks import assemble_frame_from_blocks
+from ..transform.interpolation_bicubic import interpolate
 
 
-def calculate_translation_mask(img_slice, img_ref, max_shift, blocks_per_axis, min_similarity, method="subpixel"):
+def calculate_translation_mask(img_slice, img_ref, max_shift, blocks_per_axis, min_similarity, method="subpixel",
+                               subpixel_method="parabolic"):
 
     width = img_slice.shape[1]
     height = img_slice.shape[0]
@@ -20,6 +22,7 @@ def calculate_translation_mask(img_slice, img_ref, max_shift, blocks_per_axis, m
 
     flow_arrows = []
     blocks_stack = []
+    block_starts = []
 
     for y_i in range(blocks_per_axis):
         for x_i in range(blocks_per_axis):
@@ -35,22 +38,27 @@ def calculate_translation_mask(img_slice, img_ref, max_shift, blocks_per_axis, m
                 ccm_y_start = int(slice_ccm.shape[0]/2 - max_shift)
                 slice_ccm = slice_ccm[ccm_y_start:ccm_y_start+(max_shift*2), ccm_x_start:ccm_x_start+(max_shift*2)]
 
-            if method == "subpixel":
-                optimizer = GetMaxOptimizer(slice_ccm)
-                max_coords = optimizer.get_max()
-                ccm_max_value = -optimizer.get_interpolated_px_value(max_coords)
-            else:
-                max_coords = np.unravel_index(slice_ccm.argmax(), slice_ccm.shape)
-                ccm_max_value = slice_ccm[max_coords[0], max_coords[1]]
-
-            ccm_width = slice_ccm.shape[1]
-            ccm_height = slice_ccm.shape[0]
             blocks_stack.append(slice_ccm)
-
-            if ccm_max_value >= min_similarity:
-                vector_x = (ccm_width/2.0 - max_coords[1] - 1)
-                vector_y = (ccm_height/2.0 - max_coords[0] - 1)
-                flow_arrows.append([x_start + block_width/2.0, y_start + block_height/2.0, vector_x, vector_y])
+            block_starts.append((x_start, y_start))
+
+    # the peaks of all blocks are fitted at once
+    ccms = np.array(blocks_stack)
+    if method == "subpixel":
+        max_coords = get_subpixel_max(ccms, method=subpixel_method)
+        ccm_max_values = [
+            interpolate(ccm.astype(np.float32), coords[1], coords[0]) for ccm, coords in zip(ccms, max_coords)
+        ]
+    else:
+        max_coords = [np.unravel_index(ccm.argmax(), ccm.shape) for ccm in ccms]
+        ccm_max_values = [ccm[coords[0], coords[1]] for ccm, coords in zip(ccms, max_coords)]
+
+    ccm_width = ccms.shape[2]
+    ccm_height = ccms.shape[1]
+    for (x_start, y_start), coords, ccm_max_value in zip(block_starts, max_coords, ccm_max_values):
+        if ccm_max_value >= min_similarity:
+            vector_x = (ccm_width/2.0 - coords[1] - 1)
+            vector_y = (ccm_height/2.0 - coords[0] - 1)
+            flow_arrows.append([x_start + block_width/2.0, y_start + block_height/2.0, vector_x, vector_y])
 
     if len(flow_arrows) == 0:
         print("Couldn't find any correlation between frames... try reducing the 'Min Similarity' parameter")
@@ -102,7 +110,7 @@ def calculate_translation_mask(img_slice, img_ref, max_shift, blocks_per_axis, m
     translation_matrix[:, :width] += translation_matrix_x
     translation_matrix[:, width:] += translation_matrix_y
 
-    blocks = assemble_frame_from_blocks(np.array(blocks_stack), blocks_per_axis, blocks_per_axis)
+    blocks = assemble_frame_from_blocks(ccms, blocks_per_axis, blocks_per_axis)
 
     return translation_matrix, blocks
 
@@ -1,11 +1,14 @@
 # cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=True
 
-from math import cos, fabs, sqrt
-
 import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+
 import numpy as np
 from matplotlib import pyplot as plt
-from scipy.ndimage import gaussian_filter
+from scipy import fft as sp_fft
 
 from ..utils.timeit import timeit2
 
@@ -14,12 +17,99 @@ from libc.math cimport ceil, exp, fmax, fmin, isnan, log, pow, round, sqrt
 
 from cython.parallel import prange
 
-from ..generate.mask cimport _get_circular_mask
 from ..transform.edges cimport _apodize_edges
-from ..transform.normalize cimport _normalizeFFT
 from ..utils.array cimport _get_max, _get_min
 
 
+@lru_cache(maxsize=8)
+def _get_squared_frequencies(int size):
+    """
+    Squared spatial frequency, in cycles per pixel, of each element of a centred (fftshift) square Fourier transform
+    :param size: size of the Fourier transform
+    :return: flattened float64 numpy array with size * size elements
+    """
+    freq = (np.arange(size) - size // 2) / size
+    return (freq[:, np.newaxis] ** 2 + freq[np.newaxis, :] ** 2).ravel()
+
+
+@lru_cache(maxsize=8)
+def _get_norm_pixels(int size):
+    """
+    Indices of the elements of a centred square Fourier transform inside the circular mask used for its norm
+    :param size: size of the Fourier transform
+    :return: numpy array with the flat indices
+    """
+    idx = np.arange(size) - size // 2
+    dist = idx[:, np.newaxis] ** 2 + idx[np.newaxis, :] ** 2
+    return np.flatnonzero(dist < size * size / 4.0)
+
+
+@lru_cache(maxsize=32)
+def _get_ring_bins(int size, float crmin, float crmax, int n_r):
+    """
+    Radial bins of the elements of a centred square Fourier transform used for the decorrelation curve. Only half of
+    the transform is sampled, as it is hermitian, and normalized frequencies in [crmin, crmax] are mapped to n_r bins
+    :param size: size of the Fourier transform
+    :param crmin: minimum normalized frequency
+    :param crmax: maximum normalized frequency
+    :param n_r: number of bins
+    :return: tuple of numpy arrays; flat indices of the sampled elements and the bin of each one
+    """
+    cdef int ox = <int>(size * (1-crmax)/2)
+    cdef int w = <int>(size * crmax)
+    x = np.arange(ox, ox + w)[:, np.newaxis]
+    y = np.arange(ox, ox + w)[np.newaxis, :]
+
+    # transform elements are visited column by column, up to the centre of the middle column
+    in_half = x * size + y <= (size * size) // 2 + size // 2
+    dist = ((x - size // 2) ** 2 + (y - size // 2) ** 2).astype(np.float32)
+    dist = np.sqrt(np.float32(4) * dist / np.float32(size * size))
+    in_range = in_half & (dist <= np.float32(crmax))
+
+    bins = (dist - np.float32(crmin)) / (np.float32(crmax) - np.float32(crmin)) * np.float32(n_r - 1)
+    bins = np.floor(np.maximum(bins, 0) + 0.5).astype(np.int64)
+    selected = in_range & (bins < n_r)
+
+    pixels = (np.broadcast_to(y, selected.shape) * size + np.broadcast_to(x, selected.shape))[selected]
+    return pixels, bins[selected]
+
+
+def _get_decorrelation_curve(spectrum, sigma, int size, float crmin, float crmax, int n_r):
+    """
+    Decorrelation curve between a Fourier transform and its normalized version, after removing a gaussian blurred
+    copy of the image, which in the frequency domain is a product with a gaussian high-pass filter
+    :param spectrum: flattened magnitude of the centred square Fourier transform of the image
+    :param sigma: standard deviation, in pixels, of the gaussian blur; None leaves the transform unfiltered
+    :param size: size of the Fourier transform
+    :param crmin: minimum normalized frequency of the curve
+    :param crmax: maximum normalized frequency of the curve
+    :param n_r: number of points of the curve
+    :return: float32 numpy array with n_r elements
+    """
+    ring_pixels, ring_bins = _get_ring_bins(size, crmin, crmax, n_r)
+    norm_pixels = _get_norm_pixels(size)
+    ring_values = spectrum[ring_pixels]
+    norm_values = spectrum[norm_pixels]
+
+    if sigma is not None:
+        frequencies = _get_squared_frequencies(size)
+        scale = -2 * (np.pi * sigma) ** 2
+        ring_values = ring_values * -np.expm1(scale * frequencies[ring_pixels])
+        norm_values = norm_values * -np.expm1(scale * frequencies[norm_pixels])
+
+    # the product of a transform with its normalized version is its magnitude, the normalized one has magnitude 1
+    cr = np.sqrt(np.sum(norm_values ** 2))
+    d = np.cumsum(np.bincount(ring_bins, weights=ring_values, minlength=n_r))
+    c = np.cumsum(np.bincount(ring_bins, weights=ring_values != 0, minlength=n_r))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        curve = np.where((cr == 0) | (c == 0), np.nan, np.sqrt(2) * d / (cr * np.sqrt(c))).astype(np.float32)
+    if np.isnan(curve[0]):
+        curve[0] = 0
+
+    return curve
+
+
 cdef class DecorrAnalysis:
 
     # autogen_pxd: cdef float[:] d0, kc, a_g
@@ -76,6 +166,21 @@ cdef class DecorrAnalysis:
         self.img = img.astype(np.float32)
         return self._run_analysis()
 
+    def run_batch_analysis(self, imgs: np.ndarray):
+        """
+        Method used to run the analysis on every frame of a time series, with the same starting parameters.
+        The Fourier transforms of all frames are computed together. The analysis results of the last frame are kept.
+        Args:
+            imgs (np.ndarray): image stack with shape (n_frames, y, x) to analyze
+        Returns:
+            np.ndarray: resolution of each frame
+        """
+        imgs = np.asarray(imgs, dtype=np.float32)
+        if imgs.ndim == 2:
+            imgs = imgs[np.newaxis]
+        self.img = imgs[imgs.shape[0] - 1]
+        return self._run_batch_analysis(imgs)
+
     cdef float[:, :] _get_preprocessed_image(self, img):
 
         cdef int new_size, ox, oy, x_in, y_in, x_out, y_out
@@ -114,26 +219,6 @@ cdef class DecorrAnalysis:
         return output
 
 
-    cdef float _linmap(self, float val, float valmin, float valmax, float mapmin, float mapmax) nogil:
-
-        cdef float out = 0
-        out = (val - valmin)/(valmax - valmin)
-        out = out * (mapmax-mapmin) + mapmin
-        return out
-
-    cdef float _get_corr_coef_norm(self, float[:, :] fft_real, float[:, :] fft_imag, float[:, :] mask):
-
-        cdef int y_i, x_i
-        cdef float c = 0
-
-        with nogil:
-            for y_i in prange(fft_real.shape[0]):
-                for x_i in range(fft_real.shape[1]):
-                    if mask[y_i, x_i] == 1:
-                        c += fft_real[y_i, x_i]**2 + fft_imag[y_i, x_i]**2
-
-        return sqrt(c)
-
     cdef float[:] _get_best_score(self, float[:] kc, float[:] a):
         cdef int k
         cdef float gm_max
@@ -172,71 +257,8 @@ cdef class DecorrAnalysis:
 
         return out
 
-    cdef float [:] _get_corr_coef_ring(self, float[:, :] fft_real, float[:, :] fft_imag, float[:, :] normalized_fft_real, float[:, :] normalized_fft_imag, float crmin, float crmax):
-
-        cdef float[:] out
-        cdef int y_i, x_i, d, width, height, ox, oy, w, h
-        cdef float dist, k
-        width = self.img_ref.shape[1]
-        height = self.img_ref.shape[0]
-        out = np.zeros((2*int(self.n_r)), dtype=np.float32)
-
-        d = 0
-        dist = 0.0
-        k = 0
-
-        ox = <int>(width * (1-crmax)/2)
-        oy = <int>(height * (1-crmax)/2)
-        w = <int>(width * crmax)
-        h = <int>(height * crmax)
-
-        with nogil:
-            for x_i in range(ox, ox+w):
-                for y_i in range(oy, oy+h):
-                    dist = (x_i-width/2)**2 + (y_i-height/2)**2
-                    dist = sqrt(4*dist/(width**2))
-                    k = x_i*self.img_ref.shape[0] + y_i
-                    if k > width*height/2 + height/2:
-                        return out
-                    else:
-                        if dist >= 0 and dist <= crmax:
-                            dist = self._linmap(dist, crmin, crmax, 0, self.n_r-1)
-                            if dist < 0:
-                                dist = 0
-                            d = <int>(round(dist))
-                            if d+self.n_r < out.shape[0]:
-                                out[d] += fft_real[y_i, x_i] * normalized_fft_real[y_i, x_i] + fft_imag[y_i, x_i] * normalized_fft_imag[y_i, x_i]
-                                out[d+self.n_r] += normalized_fft_real[y_i, x_i]**2 + normalized_fft_imag[y_i, x_i]**2
-
-        return out
-
-    cdef float[:] _compute_d0(self, float[:, :] fft_real, float[:, :] fft_imag):
-
-        cdef int k
-        cdef float d, c
-        cdef float[:] d0
-        cdef float[:, :, :] normalized_fft = _normalizeFFT(fft_real, fft_imag)
-        cdef float[:, :] mask = _get_circular_mask(fft_real.shape[1], 1)
-        cdef float cr = self._get_corr_coef_norm(fft_real, fft_imag, mask)
-        cdef float[:] coef = self._get_corr_coef_ring(fft_real, fft_imag, normalized_fft[0], normalized_fft[1], self.rmin, self.rmax)
-        d0 = np.zeros((self.n_r), dtype=np.float32)
-        for k in range(self.n_r):
-            d = 0
-            c = 0
-
-            for n in range(k+1):
-                d += coef[n]
-                c += coef[n+self.n_r]
-
-            if cr == 0 or c == 0:
-                d0[k] = float("nan")
-            else:
-                d0[k] = sqrt(2)*d/(cr*sqrt(c))
-
-        if isnan(d0[0]):
-            d0[0] = 0
-
-        return d0
+    cdef float[:] _compute_d0(self, spectrum):
+        return _get_decorrelation_curve(spectrum, None, self.img_ref.shape[1], self.rmin, self.rmax, self.n_r)
 
     cdef float[:] _get_d_corr_max(self, float[:] d, float r1, float r2) nogil:
         cdef float[:] t, out, temp_min
@@ -262,7 +284,7 @@ cdef class DecorrAnalysis:
                 temp_min = _get_min(t, int(out[0]), d_length-1)
 
                 if t[<int>(out[0])] - temp_min[1] > dt:
-                    return out
+                    break
                 else:
                     t[<int>(out[0])] = temp_min[1]
                     out[0] = d_length - 1
@@ -270,16 +292,15 @@ cdef class DecorrAnalysis:
         out[0] = r1 + (r2-r1)*out[0]/(self.n_r-1)
         return out
 
-    cdef float[:, :] _compute_d(self):
+    cdef float[:, :] _compute_d(self, spectrum):
 
-        cdef float[:] coef, kc, a, dg, result, results_gm, results_max
-        cdef complex[:, :] fft
-        cdef float[:, :] d_curve, img_ref, blurred, mask, fft_real, fft_imag
-        cdef float[:, :, :] normalized_fft
+        cdef float[:] kc, a, dg, result, results_gm, results_max
+        cdef float[:, :] d_curve
         cdef int count = 0
-        cdef float g_max, g_min, crmin, crmax, d, c, ind1, ind2, cr
-        cdef double sig
-        cdef int refine, k, j, h, i
+        cdef float g_max, g_min, crmin, crmax, ind1, ind2
+        cdef int refine, k, j, h
+        cdef int size = self.img_ref.shape[1]
+        cdef int n_workers = min(os.cpu_count() or 1, self.n_g)
 
         d_curve = np.zeros((self.n_r, 2*self.n_g), dtype=np.float32)
 
@@ -290,43 +311,23 @@ cdef class DecorrAnalysis:
 
         g_min = 0.14
 
-        img_ref = np.copy(self.img_ref)
-        img_ref = self._get_preprocessed_image(img_ref)
-        blurred = np.copy(self.img_ref)
-
         crmin = self.rmin
         crmax = self.rmax
 
-        mask = _get_circular_mask(img_ref.shape[1], 1)
-
         for refine in range(2):
-            for k in range(self.n_g):
-                sig = exp(log(g_min) + (log(g_max) - log(g_min))*(<float>(k)/(self.n_g-1)))
-                blurred = np.copy(self.img_ref)
-                blurred = gaussian_filter(blurred, sig)
-                blurred = np.copy(self.img_ref) - blurred
-                fft = np.fft.fftshift(np.fft.fft2(blurred))
-                fft_real = np.real(fft).astype(np.float32)
-                fft_imag = np.imag(fft).astype(np.float32)
-                normalized_fft = _normalizeFFT(fft_real, fft_imag)
-                cr = self._get_corr_coef_norm(fft_real, fft_imag, mask)
-                coef = self._get_corr_coef_ring(fft_real, fft_imag, normalized_fft[0], normalized_fft[1], crmin, crmax)
-
-                for i in range(self.n_r):
-                    d = 0
-                    c = 0
-
-                    for n in range(i+1):
-                        d += coef[n]
-                        c += coef[n+self.n_r]
-                    if cr == 0 or c == 0:
-                        d_curve[i][count] = float("nan") # TODO: check this is ok, this is a workaround for differences in java and python
-                    else:
-                        d_curve[i][count] = sqrt(2)*d/(cr*sqrt(c))
-
-                if isnan(d_curve[0][count]):
-                    d_curve[0][count] = 0
-                count += 1
+            sigmas = [
+                exp(log(g_min) + (log(g_max) - log(g_min))*(<float>(k)/(self.n_g-1))) for k in range(self.n_g)
+            ]
+            # high-pass filtered curves are independent of each other, the sweep is spread across threads
+            with ThreadPoolExecutor(max_workers=max(1, n_workers)) as executor:
+                curves = list(
+                    executor.map(
+                        _get_decorrelation_curve,
+                        repeat(spectrum), sigmas, repeat(size), repeat(crmin), repeat(crmax), repeat(self.n_r)
+                    )
+                )
+            np.asarray(d_curve)[:, count:count + self.n_g] = np.stack(curves, axis=1)
+            count += self.n_g
 
             if refine == 0:
                 kc = np.zeros((self.n_g+1), dtype=np.float32)
@@ -402,14 +403,9 @@ cdef class DecorrAnalysis:
 
         return d_curve
 
-    cdef _run_analysis(self):
-
-        cdef float[:] out
-        cdef complex[:, :] img_fft
-        cdef float[:, :] img_ref, img_f, temp, fft_real, fft_imag
-        cdef float resolution
-        img_ref = np.copy(self.img)
-        img_f = np.copy(self.img)
+    cdef float[:, :] _get_reference_image(self, float[:, :] img):
+        cdef float[:, :] img_ref = np.copy(img)
+        cdef float[:, :] img_f = np.copy(img)
 
         if self.x0 == self.x1 or self.y0 == self.y1:
             self.img_ref = img_ref
@@ -417,24 +413,44 @@ cdef class DecorrAnalysis:
             self.img_ref = img_ref[self.y0:self.y1, self.x0:self.x1]
 
         img_f = _apodize_edges(img_f)
-        temp = self._get_preprocessed_image(img_f)
-        self.img_ref = np.copy(temp)
-        img_fft = np.fft.fftshift(np.fft.fft2(temp))
-        fft_real = np.real(img_fft).astype(np.float32)
-        fft_imag = np.imag(img_fft).astype(np.float32)
-        fft_real[fft_real.shape[0]//2, fft_real.shape[1]//2] = 0
-        fft_imag[fft_imag.shape[0]//2, fft_imag.shape[1]//2] = 0
-        self.d0 = self._compute_d0(fft_real, fft_imag)
+        return self._get_preprocessed_image(img_f)
+
+    cdef _analyse_spectrum(self, float[:, :] img_ref, spectrum):
+
+        cdef float[:] out
+        self.img_ref = np.copy(img_ref)
+        self.d0 = self._compute_d0(spectrum)
         out = self._get_d_corr_max(self.d0, 0, 1)
         self.kc0 = out[0]
         self.a0 = out[1]
-        self.d = self._compute_d()
+        self.d = self._compute_d(spectrum)
 
         self.resolution = 2 * self.pixel_size / self.kc_max
 
+    cdef _run_analysis(self):
+        self._run_batch_analysis(np.asarray(self.img)[np.newaxis])
+
         if self.do_plot:
             self.plot_results()
 
+    cdef _run_batch_analysis(self, float[:, :, :] imgs):
+
+        cdef int i
+        cdef int n_frames = imgs.shape[0]
+        img_refs = np.array([np.asarray(self._get_reference_image(imgs[i])) for i in range(n_frames)])
+
+        # the reference spectra of all frames are computed once, the high-pass filters are applied to them
+        spectra = np.abs(sp_fft.fftshift(sp_fft.fft2(img_refs, workers=-1), axes=(-2, -1))).astype(np.float64)
+        spectra[:, spectra.shape[1]//2, spectra.shape[2]//2] = 0
+        spectra = spectra.reshape(n_frames, -1)
+
+        resolutions = np.zeros(n_frames, dtype=np.float32)
+        for i in range(n_frames):
+            self._analyse_spectrum(img_refs[i], spectra[i])
+            resolutions[i] = self.resolution
+
+        return resolutions
+
     def plot_results(self):
         """
         Returns the plot of the results of the analysis as a numpy array
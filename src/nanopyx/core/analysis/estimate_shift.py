@@ -34,3 +34,139 @@ class GetMaxOptimizer(object):
         minimizer = minimize(self.get_interpolated_px_value, (y_max, x_max), method="Nelder-Mead", options={"maxiter": 1000})
         return minimizer.x
 
+
+
+SUBPIXEL_METHODS = ("optimizer", "parabolic", "gaussian", "centroid", "upsampled_dft")
+
+
+def get_subpixel_max(ccm, method="parabolic", upsample_factor=20, centroid_radius=1):
+    """
+    Estimates the position of the maximum of one or several cross correlation matrices with subpixel precision.
+    All closed-form estimators work on the whole batch at once, "optimizer" runs GetMaxOptimizer on each matrix and is
+    kept as a reference.
+    Coordinates follow the same convention as GetMaxOptimizer, the centre of pixel (y, x) is at (y + 0.5, x + 0.5).
+    :param ccm: numpy array with shape (y, x) or (n, y, x)
+    :param method: str; one of SUBPIXEL_METHODS
+        "parabolic": 3-point parabola fit along each axis around the integer maximum
+        "gaussian": 3-point gaussian fit (parabola on the log values), falls back to "parabolic" for non-positive
+        neighbourhoods
+        "centroid": background subtracted centre of mass of the (2 * centroid_radius + 1) ** 2 window around the
+        integer maximum
+        "upsampled_dft": maximum of the DFT interpolated matrix evaluated on a grid upsample_factor times finer than
+        the pixel grid, over +-1 pixel around the integer maximum
+    :param upsample_factor: int; grid refinement used by "upsampled_dft"
+    :param centroid_radius: int; half width of the window used by "centroid"
+    :return: numpy array with shape (2,) or (n, 2); (y, x) coordinates of the maximum of each ccm
+    """
+    ccm = np.asarray(ccm)
+    if ccm.ndim not in (2, 3):
+        raise ValueError(f"ccm must have 2 or 3 dimensions, got shape {ccm.shape}")
+    if method not in SUBPIXEL_METHODS:
+        raise ValueError(f"Unknown subpixel method '{method}', must be one of {SUBPIXEL_METHODS}")
+
+    single = ccm.ndim == 2
+    stack = ccm[np.newaxis] if single else ccm
+
+    if method == "optimizer":
+        coords = np.array([GetMaxOptimizer(np.ascontiguousarray(c, dtype=np.float32)).get_max() for c in stack])
+    else:
+        stack = stack.astype(np.float64)
+        n, h, w = stack.shape
+        y_max, x_max = np.unravel_index(stack.reshape(n, -1).argmax(axis=1), (h, w))
+        if method == "centroid":
+            dy, dx = _centroid_offsets(stack, y_max, x_max, int(centroid_radius))
+        elif method == "upsampled_dft":
+            dy, dx = _upsampled_dft_offsets(stack, y_max, x_max, int(upsample_factor))
+        else:
+            dy = _three_point_offsets(stack, y_max, x_max, 1, 0, method == "gaussian")
+            dx = _three_point_offsets(stack, y_max, x_max, 0, 1, method == "gaussian")
+        coords = np.stack((y_max + dy + 0.5, x_max + dx + 0.5), axis=1)
+
+    return coords[0] if single else coords
+
+
+def _three_point_offsets(stack, y_max, x_max, step_y, step_x, gaussian):
+    """
+    Subpixel offsets of the maxima along one axis from a 3-point parabola or gaussian fit.
+    Maxima on the border of the matrix keep their integer position.
+    :param stack: float64 array with shape (n, y, x)
+    :param y_max: row of the integer maximum of each matrix
+    :param x_max: column of the integer maximum of each matrix
+    :param step_y: 1 to fit along the rows, 0 otherwise
+    :param step_x: 1 to fit along the columns, 0 otherwise
+    :param gaussian: bool; fit a gaussian instead of a parabola
+    :return: numpy array with shape (n,)
+    """
+    n, h, w = stack.shape
+    frames = np.arange(n)
+    inside = (y_max - step_y >= 0) & (y_max + step_y < h) & (x_max - step_x >= 0) & (x_max + step_x < w)
+    y0 = np.clip(y_max - step_y, 0, h - 1)
+    y1 = np.clip(y_max + step_y, 0, h - 1)
+    x0 = np.clip(x_max - step_x, 0, w - 1)
+    x1 = np.clip(x_max + step_x, 0, w - 1)
+    left = stack[frames, y0, x0]
+    centre = stack[frames, y_max, x_max]
+    right = stack[frames, y1, x1]
+
+    if gaussian:
+        positive = (left > 0) & (centre > 0) & (right > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            left = np.where(positive, np.log(np.where(positive, left, 1)), left)
+            centre = np.where(positive, np.log(np.where(positive, centre, 1)), centre)
+            right = np.where(positive, np.log(np.where(positive, right, 1)), right)
+
+    denominator = left - 2 * centre + right
+    valid = inside & (denominator < 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offsets = np.where(valid, 0.5 * (left - right) / np.where(valid, denominator, 1), 0)
+    return np.clip(offsets, -0.5, 0.5)
+
+
+def _centroid_offsets(stack, y_max, x_max, radius):
+    """
+    Subpixel offsets of the maxima from the centre of mass of the window around them.
+    The window minimum is subtracted so that flat backgrounds do not pull the centroid to the window centre.
+    :param stack: float64 array with shape (n, y, x)
+    :param y_max: row of the integer maximum of each matrix
+    :param x_max: column of the integer maximum of each matrix
+    :param radius: int; half width of the window
+    :return: tuple of two numpy arrays with shape (n,); row and column offsets
+    """
+    n, h, w = stack.shape
+    offsets = np.arange(-radius, radius + 1)
+    rows = y_max[:, np.newaxis, np.newaxis] + offsets[np.newaxis, :, np.newaxis]
+    cols = x_max[:, np.newaxis, np.newaxis] + offsets[np.newaxis, np.newaxis, :]
+    inside = (rows >= 0) & (rows < h) & (cols >= 0) & (cols < w)
+    window = stack[np.arange(n)[:, np.newaxis, np.newaxis], np.clip(rows, 0, h - 1), np.clip(cols, 0, w - 1)]
+    background = np.where(inside, window, np.inf).min(axis=(1, 2), keepdims=True)
+    weights = np.where(inside, window - background, 0)
+    total = weights.sum(axis=(1, 2))
+    valid = total > 0
+    total = np.where(valid, total, 1)
+    dy = np.where(valid, (weights * offsets[np.newaxis, :, np.newaxis]).sum(axis=(1, 2)) / total, 0)
+    dx = np.where(valid, (weights * offsets[np.newaxis, np.newaxis, :]).sum(axis=(1, 2)) / total, 0)
+    return dy, dx
+
+
+def _upsampled_dft_offsets(stack, y_max, x_max, upsample_factor):
+    """
+    Subpixel offsets of the maxima from a matrix-multiply DFT evaluated on a finer grid around them
+    (Guizar-Sicairos et al., Opt. Lett. 33, 156 (2008)).
+    :param stack: float64 array with shape (n, y, x)
+    :param y_max: row of the integer maximum of each matrix
+    :param x_max: column of the integer maximum of each matrix
+    :param upsample_factor: int; number of grid points per pixel
+    :return: tuple of two numpy arrays with shape (n,); row and column offsets
+    """
+    n, h, w = stack.shape
+    upsample_factor = max(1, upsample_factor)
+    grid = np.arange(-upsample_factor, upsample_factor + 1) / upsample_factor
+    spectrum = np.fft.fft2(stack)
+    # trigonometric interpolation of each matrix, rows @ spectrum @ cols evaluates it on the fine grid
+    rows_y = (y_max[:, np.newaxis] + grid)[:, :, np.newaxis]
+    cols_x = (x_max[:, np.newaxis] + grid)[:, np.newaxis, :]
+    rows = np.exp(2j * np.pi * rows_y * np.fft.fftfreq(h)[np.newaxis, np.newaxis, :])
+    cols = np.exp(2j * np.pi * np.fft.fftfreq(w)[np.newaxis, :, np.newaxis] * cols_x)
+    upsampled = np.real(rows @ spectrum @ cols)
+    k_y, k_x = np.unravel_index(upsampled.reshape(n, -1).argmax(axis=1), upsampled.shape[1:])
+    return grid[k_y], grid[k_x]
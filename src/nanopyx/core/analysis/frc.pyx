@@ -1,19 +1,68 @@
 # cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=True
 
 import io
+from functools import lru_cache
+
 import numpy as np
 from matplotlib import pyplot as plt
+from scipy import fft as sp_fft
 from scipy.signal import savgol_filter
 from scipy.signal.windows import tukey
-from ..transform.padding import pad_w_zeros_2d
+from scipy.sparse import csr_matrix
 
 cimport numpy as np
-from cython.parallel import prange
-from libc.math cimport sqrt, fabs, pi, cos, fmin
-from ..utils.math cimport _get_sine
 from .ccm_helper_functions cimport _check_even_square, _make_even_square
 
 
+@lru_cache(maxsize=8)
+def _get_frc_ring_operator(int size):
+    """
+    Builds the operator that sums the bilinearly interpolated samples of each FRC ring, for Fourier transforms of a
+    given size. Each ring of radius r is sampled every 1/r radians, so that consecutive samples are one pixel apart.
+    The operator is cached and reused for every image pair of the same size.
+    :param size: size of the square, even sized, Fourier transforms
+    :return: tuple; scipy.sparse.csr_matrix with shape (size // 2 - 1, size * size), whose row r holds the
+        interpolation weights of all samples of ring r, and a numpy array with the number of samples of each ring
+    """
+    cdef int max_r = size // 2 - 1
+    n_samples = np.zeros(max_r, dtype=np.float32)
+    rings = []
+    angles = []
+    for r in range(1, max_r):
+        ring_angles = np.arange(0, np.float32(np.pi * 2), np.float32(1.0 / r), dtype=np.float32)
+        n_samples[r] = ring_angles.shape[0]
+        rings.append(np.full(ring_angles.shape[0], r, dtype=np.int32))
+        angles.append(ring_angles)
+    rings = np.concatenate(rings)
+    angles = np.concatenate(angles)
+    radii = rings.astype(np.float32)
+
+    cos_a = np.cos(angles.astype(np.float64)).astype(np.float32)
+    sin_a = np.sqrt(np.float32(1) - cos_a * cos_a)
+    sin_a[angles > np.pi] *= -1
+    x = np.float32(max_r + 1) + radii * cos_a
+    y = np.float32(max_r + 1) + radii * sin_a
+
+    x_base = x.astype(np.int64)
+    y_base = y.astype(np.int64)
+    x_fraction = np.clip(x - x_base, 0, None).astype(np.float64)
+    y_fraction = np.clip(y - y_base, 0, None).astype(np.float64)
+    lower_left = y_base * size + x_base
+
+    indices = np.concatenate((lower_left, lower_left + 1, lower_left + size, lower_left + size + 1))
+    weights = np.concatenate(
+        (
+            (1 - x_fraction) * (1 - y_fraction),
+            x_fraction * (1 - y_fraction),
+            (1 - x_fraction) * y_fraction,
+            x_fraction * y_fraction,
+        )
+    )
+    operator = csr_matrix((weights, (np.tile(rings, 4), indices)), shape=(max_r, size * size))
+
+    return operator, n_samples
+
+
 cdef class FIRECalculator:
 
     # autogen_pxd: cdef float pixel_size, threshold
@@ -30,30 +79,11 @@ cdef class FIRECalculator:
         self.fire_number = 0
         self.field_of_view = 0
 
-    cdef float[:, :] _get_squared_tapered_image(self, float[:, :] img):
-        cdef float[:] taper_x = tukey(img.shape[1], alpha=0.25).astype(np.float32)
-        cdef float[:] taper_y = tukey(img.shape[0], alpha=0.25).astype(np.float32)
-        cdef float[:] img_data = np.ravel(img)
-        cdef float[:] new_data = np.empty(img_data.shape[0], dtype=np.float32)
-
-        cdef int max_y_1, max_x_1, old_width, new_size, y_i, x_i, i, ii
-        cdef float y_tmp
-
-        max_x_1 = img.shape[1]
-        max_y_1 = img.shape[0]
-        old_width = img.shape[1]
-        new_size = img.shape[0]
-
-        for y_i in range(0, max_y_1):
-            y_tmp = taper_y[y_i]
-            
-            i = y_i * old_width
-            ii = y_i * new_size
-            for x_i in range(0, max_x_1):
-                new_data[ii] = img_data[i] * taper_x[x_i] * y_tmp
-                i += 1
-                ii += 1
-        return np.reshape(new_data, (img.shape[0], img.shape[1]))
+    cdef float[:, :, :] _get_squared_tapered_images(self, float[:, :, :] imgs):
+        cdef float[:] taper_x = tukey(imgs.shape[2], alpha=0.25).astype(np.float32)
+        cdef float[:] taper_y = tukey(imgs.shape[1], alpha=0.25).astype(np.float32)
+
+        return np.asarray(imgs) * np.asarray(taper_y)[:, np.newaxis] * np.asarray(taper_x)[np.newaxis, :]
 
     cdef float _interpolate_y(self, float x1, float y1, float x2, float y2, float x):
 
@@ -62,58 +92,6 @@ cdef class FIRECalculator:
 
         return m * x + c
 
-    cdef _compute(self, float[:, :] images, float[:] data_a1, float[:] data_b1, float[:] data_a2, float[:] data_b2):
-
-        cdef int i
-        cdef float a1, a2, b1, b2
-
-        cdef int size = data_a1.shape[0]
-
-        with nogil:
-            for i in prange(size):
-                a1 = data_a1[i]
-                a2 = data_a2[i]
-                b1 = data_b1[i]
-                b2 = data_b2[i]
-                
-                images[0, i] = a1 * a2 + b1 * b2
-                images[1, i] = a1 * a1 + b1 * b1
-                images[2, i] = a2 * a2 + b2 * b2
-
-    cdef float[:] _get_interpolated_values(self, float y, float x, float[:, :] images, int maxx) nogil:
-        cdef int x_base = int(x)
-        cdef int y_base = int(y)
-        cdef float x_fraction = x - x_base
-        cdef float y_fraction = y - y_base
-        if x_fraction < 0:
-            x_fraction = 0
-        if y_fraction < 0:
-            y_fraction = 0
-
-        cdef int lower_left_index = y_base * maxx + x_base
-        cdef int lower_right_index = lower_left_index + 1
-        cdef int upper_left_index = lower_left_index + maxx
-        cdef int upper_right_index = upper_left_index + 1
-
-        cdef float[:] values
-        with gil:
-            values = np.zeros((images.shape[0]), dtype=np.float32)
-        cdef float lower_left, lower_right, upper_left, upper_right, upper_average, lower_average
-
-        cdef int i
-
-        for i in prange(images.shape[0]):
-            lower_left = images[i][lower_left_index]
-            lower_right = images[i][lower_right_index]
-            upper_left = images[i][upper_left_index]
-            upper_right = images[i][upper_right_index]
-
-            upper_average = upper_left + x_fraction * (upper_right - upper_left)
-            lower_average = lower_left + x_fraction * (lower_right - lower_left)
-            values[i] = lower_average + y_fraction * (upper_average - lower_average)
-
-        return values
-
     cdef _get_smoothed_curve(self):
         cdef float[:] smoothed_values = savgol_filter(self.frc_curve[:, 1], window_length=<int>(0.0707*self.frc_curve.shape[0]), polyorder=3)
         self.frc_curve[:, 1] = smoothed_values
@@ -122,81 +100,56 @@ cdef class FIRECalculator:
         cdef int curve_dims = self.frc_curve.shape[0]
         self.threshold_curve = np.full((curve_dims), 1.0/7.0, dtype=np.float32)
 
-    cdef _calculate_frc_value(self, int centre, int size, float[:, :] images, float pixel_size):
-        cdef int radius = 1
-        cdef int max_r = centre - 1
-        cdef float[:] spatial_frequency = np.linspace(0, 1/(2*pixel_size), max_r, dtype=np.float32)
-        cdef float limit = pi * 2
-        cdef float[:, :] results = np.zeros((max_r, 3), dtype=np.float32)
-        results[0][0] = 0
-        results[0][1] = 1
-        results[0][2] = 1
-
-        cdef int r, n_sum, i
-        cdef float sum_0, sum_1, sum_2, angle_step, x, y, cos_a, angle
-        cdef float[:] values, angles
-        
-        for r in range(radius, max_r):
-            sum_0 = 0
-            sum_1 = 0
-            sum_2 = 0
-
-            angle_step = 1.0/r
-            n_sum = 0
-            angles = np.arange(0, limit, angle_step, dtype=np.float32)
-            for i in range(angles.shape[0]):
-                angle = angles[i]
-                cos_a = cos(angle)
-                x = max_r + 1 + r * cos_a
-                y = max_r + 1 + r * _get_sine(angle, cos_a)
-                values = self._get_interpolated_values(y, x, images, size)
-                sum_0 += values[0]
-                sum_1 += values[1]
-                sum_2 += values[2]
-                n_sum += 1
-            results[r][0] = spatial_frequency[r]
-            results[r][1] = sum_0/sqrt(sum_1*sum_2)
-            results[r][2] = n_sum
+    cdef _calculate_frc_values(self, int size, float[:, :, :] images, float pixel_size):
+        cdef int n_pairs = images.shape[0]
+        cdef int max_r = size // 2 - 1
+        operator, n_samples = _get_frc_ring_operator(size)
+
+        # ring sums of the cross-power and of both power spectra, for every pair at once
+        sums = np.asarray(operator @ np.asarray(images).reshape(n_pairs * 3, size * size).T).T.reshape(n_pairs, 3, max_r)
+
+        results = np.zeros((n_pairs, max_r, 3), dtype=np.float32)
+        results[:, :, 0] = np.linspace(0, 1/(2*pixel_size), max_r, dtype=np.float32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results[:, :, 1] = sums[:, 0] / np.sqrt(sums[:, 1] * sums[:, 2])
+        results[:, :, 2] = n_samples
+        results[:, 0, 0] = 0
+        results[:, 0, 1] = 1
+        results[:, 0, 2] = 1
 
         return results
 
     def calculate_fft(self, img: np.ndarray):
         return np.fft.fftshift(np.fft.fft2(img))
 
-    cdef _calculate_frc_curve(self, float[:, :] img1, float[:, :] img2):
+    cdef _calculate_frc_curves(self, float[:, :, :] imgs1, float[:, :, :] imgs2):
+
+        cdef float[:, :, :] imgs_1 = imgs1
+        cdef float[:, :, :] imgs_2 = imgs2
+
+        if not _check_even_square(imgs_1):
+            imgs_1 = _make_even_square(imgs_1)
+            imgs_2 = _make_even_square(imgs_2)
+
+        imgs_1 = self._get_squared_tapered_images(imgs_1)
+        imgs_2 = self._get_squared_tapered_images(imgs_2)
 
-        cdef float[:, :] img_1 = np.copy(img1)
-        cdef float[:, :] img_2 = np.copy(img2)
-        cdef int max_width = img_1.shape[1]
-        cdef int max_height = img_1.shape[0]
-
-        img_1 = pad_w_zeros_2d(np.array(img_1), max_height, max_width)
-        img_2 = pad_w_zeros_2d(np.array(img_2), max_height, max_width)
-
-        if not _check_even_square(np.array([img_1], dtype=np.float32)):
-            img_1 = _make_even_square(np.array([img_1], dtype=np.float32))[0]
-            img_2 = _make_even_square(np.array([img_2], dtype=np.float32))[0]
-
-        img_1 = self._get_squared_tapered_image(img_1)
-        img_2 = self._get_squared_tapered_image(img_2)
-        
-        cdef complex[:, :] fft_1 = self.calculate_fft(np.array(img_1, dtype=np.float32))
-        cdef complex[:, :] fft_2 = self.calculate_fft(np.array(img_2, dtype=np.float32))
-        
-        cdef int size = fft_1.shape[0]
+        fft_1 = sp_fft.fftshift(sp_fft.fft2(np.asarray(imgs_1), workers=-1), axes=(-2, -1))
+        fft_2 = sp_fft.fftshift(sp_fft.fft2(np.asarray(imgs_2), workers=-1), axes=(-2, -1))
+
+        cdef int n_pairs = fft_1.shape[0]
+        cdef int size = fft_1.shape[1]
         self.field_of_view = size
-        cdef int centre = size // 2
-        cdef float[:] data_a1, data_a2, data_b1, data_b2
-        cdef float[:, :] images
-        data_a1 = np.real(fft_1).ravel().astype(np.float32)
-        data_b1 = np.imag(fft_1).ravel().astype(np.float32)
-        data_a2 = np.real(fft_2).ravel().astype(np.float32)
-        data_b2 = np.imag(fft_2).ravel().astype(np.float32)
 
-        images = np.zeros((3, data_a1.shape[0]), dtype=np.float32)
-        self._compute(images, data_a1, data_b1, data_a2, data_b2)
+        images = np.empty((n_pairs, 3, size * size), dtype=np.float32)
+        images[:, 0] = np.real(fft_1 * np.conj(fft_2)).reshape(n_pairs, -1)
+        images[:, 1] = (np.real(fft_1) ** 2 + np.imag(fft_1) ** 2).reshape(n_pairs, -1)
+        images[:, 2] = (np.real(fft_2) ** 2 + np.imag(fft_2) ** 2).reshape(n_pairs, -1)
+
+        return self._calculate_frc_values(size, images, self.pixel_size)
 
-        self.frc_curve = self._calculate_frc_value(centre, size, images, self.pixel_size)
+    cdef _calculate_frc_curve(self, float[:, :] img1, float[:, :] img2):
+        self.frc_curve = self._calculate_frc_curves(np.asarray(img1)[np.newaxis], np.asarray(img2)[np.newaxis])[0]
 
     cdef _get_intersections(self):
         cdef float[:, :] frc_curve = np.copy(self.frc_curve)
@@ -251,6 +204,9 @@ cdef class FIRECalculator:
 
     cdef _calculate_fire_number(self, float[:, :] img_1, float[:, :] img_2):
         self._calculate_frc_curve(img_1, img_2)
+        self._calculate_fire_number_from_curve()
+
+    cdef _calculate_fire_number_from_curve(self):
         self._get_smoothed_curve()
         self._calculate_threshold_curve()
         self._get_intersections()
@@ -262,6 +218,36 @@ cdef class FIRECalculator:
 
     def calculate_fire_number(self, img_1, img_2):
         return self._calculate_fire_number(img_1.astype(np.float32), img_2.astype(np.float32))
+
+    def calculate_frc_curves(self, imgs_1, imgs_2):
+        """
+        Calculates the FRC curves of many image pairs at once, sharing the ring operator between them
+        :param imgs_1: numpy array with shape (n_pairs, y, x)
+        :param imgs_2: numpy array with the same shape as imgs_1
+        :return: numpy array with shape (n_pairs, n_rings, 3); spatial frequency, FRC value and number of samples of
+            each ring, before smoothing
+        """
+        imgs_1 = np.ascontiguousarray(imgs_1, dtype=np.float32)
+        imgs_2 = np.ascontiguousarray(imgs_2, dtype=np.float32)
+        if imgs_1.ndim != 3 or imgs_1.shape != imgs_2.shape:
+            raise ValueError(f"Expected two stacks with the same (n_pairs, y, x) shape, got {imgs_1.shape} and {imgs_2.shape}")
+        return self._calculate_frc_curves(imgs_1, imgs_2)
+
+    def calculate_fire_numbers(self, imgs_1, imgs_2):
+        """
+        Calculates the FIRE number of many image pairs at once, the FRC curve and FIRE number of the last pair are
+        kept as the calculator results
+        :param imgs_1: numpy array with shape (n_pairs, y, x)
+        :param imgs_2: numpy array with the same shape as imgs_1
+        :return: numpy array with shape (n_pairs,); FIRE number of each pair, 0 if the FRC never crosses the threshold
+        """
+        curves = self.calculate_frc_curves(imgs_1, imgs_2)
+        fire_numbers = np.zeros(curves.shape[0], dtype=np.float32)
+        for i in range(curves.shape[0]):
+            self.frc_curve = curves[i]
+            self._calculate_fire_number_from_curve()
+            fire_numbers[i] = self.fire_number
+        return fire_numbers
     
     def plot_frc_curve(self):
         """
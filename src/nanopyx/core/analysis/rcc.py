@@ -1,11 +1,16 @@
 # REF: based on https://github.com/jungmannlab/picasso/blob/d867f561ffeafce752f37968a20698556d04dafb/picasso/imageprocess.py
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import lmfit
+from scipy import fft as sp_fft
 from tqdm import tqdm
 
 from .ccm import calculate_ccm_from_ref
 from .ccm_helper_functions import check_even_square, make_even_square
+from .estimate_shift import get_subpixel_max
 
 # TODO: fix max_shift parameter
 
@@ -89,50 +94,132 @@ def get_image_shift(im1: np.ndarray, im2: np.ndarray, box: int, max_shift: int =
     return -xc, -yc
 
 
-def rcc(im_frames: np.ndarray, max_shift=None) -> tuple:
+def rcc(
+    im_frames: np.ndarray,
+    max_shift=None,
+    subpixel_method: str = "gaussian",
+    weighted: bool = False,
+    max_residual: float = None,
+    pairs_per_batch: int = 64,
+    n_workers: int = None,
+) -> tuple:
+    """
+    Redundant cross-correlation drift estimation, every pair of frames is cross-correlated and the drift of each frame
+    is solved from the overdetermined set of pair shifts.
+    Each frame is transformed once, the cross-power spectra of the pairs are formed in batches and the batches are
+    spread across threads, each fitting the peaks of its pairs at once.
+    :param im_frames: numpy array with shape (n_frames, y, x)
+    :param max_shift: maximum expected shift between any two frames, in pixels; None or 0 searches the whole ccm
+    :param subpixel_method: method used to fit the ccm peaks, see estimate_shift.SUBPIXEL_METHODS
+    :param weighted: weight each pair by its peak correlation when solving the shifts
+    :param max_residual: pairs whose shift disagrees with the solution by more than this, in pixels, are rejected
+        and the shifts are solved again; None keeps every pair
+    :param pairs_per_batch: number of pairs cross-correlated together
+    :param n_workers: number of batches processed concurrently, defaults to the number of cores
+    :return: tuple of numpy arrays with shape (n_frames,); drift along x and y, relative to the first frame
+    """
     # REF: https://github.com/yinawang28/RCC
     if not check_even_square(im_frames.astype(np.float32)):
         im_frames = np.array(make_even_square(im_frames.astype(np.float32)))
-    n_frames = im_frames.shape[0]
+    im_frames = np.asarray(im_frames, dtype=np.float32)
+    n_frames, h, w = im_frames.shape
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    # zero mean and unit norm frames, so that the ccm values are Pearson's correlations
+    means = im_frames.mean(axis=(1, 2), keepdims=True)
+    norms = np.sqrt(np.sum((im_frames - means) ** 2, axis=(1, 2), keepdims=True))
+    valid_frames = (norms[:, 0, 0] > 0) & (np.sum(im_frames, axis=(1, 2)) != 0)
+    spectra = sp_fft.rfft2((im_frames - means) / np.where(norms > 0, norms, 1), workers=-1).astype(np.complex64)
+
+    pairs_i, pairs_j = np.triu_indices(n_frames, 1)
+    n_pairs = pairs_i.shape[0]
+    pair_shifts = np.zeros((n_pairs, 2))
+    pair_weights = np.zeros(n_pairs)
+
+    centre_y, centre_x = h // 2, w // 2
+    if max_shift:
+        y0, y1 = max(0, centre_y - int(max_shift)), min(h, centre_y + int(max_shift) + 1)
+        x0, x1 = max(0, centre_x - int(max_shift)), min(w, centre_x + int(max_shift) + 1)
+    else:
+        y0, y1, x0, x1 = 0, h, 0, w
+
+    def _process(p0, p1):
+        i, j = pairs_i[p0:p1], pairs_j[p0:p1]
+        ccms = sp_fft.irfft2(np.conj(spectra[i]) * spectra[j], s=(h, w), workers=1)
+        ccms = sp_fft.fftshift(ccms, axes=(1, 2))[:, y0:y1, x0:x1]
+        # coordinates from get_subpixel_max are pixel centred
+        coords = get_subpixel_max(ccms, method=subpixel_method) - 0.5
+        pair_shifts[p0:p1, 0] = centre_x - x0 - coords[:, 1]
+        pair_shifts[p0:p1, 1] = centre_y - y0 - coords[:, 0]
+        pair_weights[p0:p1] = np.clip(ccms.reshape(p1 - p0, -1).max(axis=1), 0, None)
+
+    batches = [(p0, min(p0 + pairs_per_batch, n_pairs)) for p0 in range(0, n_pairs, pairs_per_batch)]
+    with tqdm(total=n_pairs, desc="Correlating image pairs", unit="pairs") as progress_bar:
+        with ThreadPoolExecutor(max_workers=max(1, n_workers)) as executor:
+            for batch, future in zip(batches, [executor.submit(_process, *batch) for batch in batches]):
+                future.result()
+                progress_bar.update(batch[1] - batch[0])
+
+    # pairs with an empty frame carry no information, as in get_image_shift
+    invalid_pairs = ~(valid_frames[pairs_i] & valid_frames[pairs_j])
+    pair_shifts[invalid_pairs] = 0
+    pair_weights[invalid_pairs] = 0
+
     shifts_x = np.zeros((n_frames, n_frames))
     shifts_y = np.zeros((n_frames, n_frames))
-    n_pairs = int(n_frames * (n_frames - 1) / 2)
-    flag = 0
-
-    with tqdm(
-        total=n_pairs, desc="Correlating image pairs", unit="pairs"
-    ) as progress_bar:
-        for i in range(n_frames - 1):
-            for j in range(i + 1, n_frames):
-                progress_bar.update()
-                shifts_x[i, j], shifts_y[i, j] = get_image_shift(
-                    im_frames[i], im_frames[j], 5, max_shift
-                )
-                flag += 1
-
-    return minimize_shifts(shifts_x, shifts_y)
-
-
-def minimize_shifts(shifts_x, shifts_y, shifts_z=None):
+    shifts_x[pairs_i, pairs_j] = pair_shifts[:, 0]
+    shifts_y[pairs_i, pairs_j] = pair_shifts[:, 1]
+    weights = None
+    if weighted:
+        weights = np.zeros((n_frames, n_frames))
+        weights[pairs_i, pairs_j] = pair_weights
+
+    return minimize_shifts(shifts_x, shifts_y, weights=weights, max_residual=max_residual)
+
+
+def minimize_shifts(shifts_x, shifts_y, shifts_z=None, weights=None, max_residual=None):
+    """
+    Solves the shift of every frame from the shifts between all pairs of frames, in the least squares sense.
+    :param shifts_x: numpy array with shape (n, n); shifts_x[i, j] is the shift from frame i to frame j, for i < j
+    :param shifts_y: same as shifts_x, along y
+    :param shifts_z: same as shifts_x, along z; None for 2D shifts
+    :param weights: numpy array with shape (n, n); weight of each pair, None weights all pairs equally
+    :param max_residual: pairs whose shift disagrees with the solution by more than this are rejected and the shifts
+        are solved again, as long as every frame stays connected to the others; None keeps every pair
+    :return: tuple of numpy arrays with shape (n,); shift of each frame relative to the first one
+    """
     n_channels = shifts_x.shape[0]
-    n_pairs = int(n_channels * (n_channels - 1) / 2)
     n_dims = 2 if shifts_z is None else 3
-    rij = np.zeros((n_pairs, n_dims))
-    A = np.zeros((n_pairs, n_channels - 1))
-    flag = 0
-    for i in range(n_channels - 1):
-        for j in range(i + 1, n_channels):
-            rij[flag, 0] = shifts_x[i, j]
-            rij[flag, 1] = shifts_y[i, j]
-            if n_dims == 3:
-                rij[flag, 2] = shifts_z[i, j]
-            A[flag, i:j] = 1
-            flag += 1
-    Dj = np.dot(np.linalg.pinv(A), rij)
-    shift_x = np.insert(np.cumsum(Dj[:, 0]), 0, 0)
-    shift_y = np.insert(np.cumsum(Dj[:, 1]), 0, 0)
-    if n_dims == 2:
-        return shift_x, shift_y
-    else:
-        shift_z = np.insert(np.cumsum(Dj[:, 2]), 0, 0)
-        return shift_x, shift_y, shift_z
+    pairs_i, pairs_j = np.triu_indices(n_channels, 1)
+    rij = np.stack([s[pairs_i, pairs_j] for s in (shifts_x, shifts_y, shifts_z)[:n_dims]], axis=1)
+    # each pair shift is the sum of the shifts between consecutive frames i to j - 1
+    steps = np.arange(n_channels - 1)
+    A = ((steps >= pairs_i[:, np.newaxis]) & (steps < pairs_j[:, np.newaxis])).astype(np.float64)
+    sqrt_w = np.ones(pairs_i.shape[0]) if weights is None else np.sqrt(np.clip(weights[pairs_i, pairs_j], 0, None))
+
+    kept = sqrt_w > 0
+    if np.linalg.matrix_rank(A[kept]) < n_channels - 1:
+        # not every frame is constrained by a pair with a positive weight
+        kept = np.ones(pairs_i.shape[0], dtype=bool)
+        sqrt_w = np.ones(pairs_i.shape[0])
+
+    while True:
+        Dj = np.dot(np.linalg.pinv(A[kept] * sqrt_w[kept, np.newaxis]), rij[kept] * sqrt_w[kept, np.newaxis])
+        if max_residual is None:
+            break
+        residuals = np.linalg.norm(A @ Dj - rij, axis=1)
+        outliers = kept & (residuals > max_residual)
+        if not np.any(outliers):
+            break
+        candidate = kept & ~outliers
+        if np.linalg.matrix_rank(A[candidate]) < n_channels - 1:
+            # dropping every outlier disconnects the frames, only the worst one is dropped
+            candidate = kept.copy()
+            candidate[np.argmax(np.where(outliers, residuals, -np.inf))] = False
+            if np.linalg.matrix_rank(A[candidate]) < n_channels - 1:
+                break
+        kept = candidate
+
+    shifts = [np.insert(np.cumsum(Dj[:, d]), 0, 0) for d in range(n_dims)]
+    return tuple(shifts)
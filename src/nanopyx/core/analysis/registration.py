@@ -5,7 +5,7 @@ import numpy as np
 
 from skimage.filters import window
 
-from .estimate_shift import GetMaxOptimizer
+from .estimate_shift import GetMaxOptimizer, get_subpixel_max
 from .ccm_helper_functions import make_even_square
 from .ccm import calculate_slice_ccm
 from ..transform.interpolation_catmull_rom import Interpolator
@@ -150,17 +150,18 @@ class Registration:
         return translated
 
     @staticmethod
-    def phase_correlation(im1:np.ndarray, im2:np.ndarray)->tuple:
+    def phase_correlation(im1:np.ndarray, im2:np.ndarray, subpixel_method:str="parabolic")->tuple:
         """
         Perform phase correlation between two images and return the shift that maximizes the overlap between the images
         :param im1: 2D array of np.float32
         :param im2: 2D array of np.float32
+        :param subpixel_method: method used to locate the maximum of the ccm, see estimate_shift.SUBPIXEL_METHODS
         :return: coordinate tuple of the maximum point of the ccm and max value of the ccm
         """
 
         ccm = calculate_slice_ccm(im1, im2)
         optimizer = GetMaxOptimizer(ccm)
-        shifts = optimizer.get_max()
+        shifts = get_subpixel_max(ccm, method=subpixel_method)
         maxsim = -optimizer.get_interpolated_px_value(shifts)
 
         return shifts, maxsim
@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .decorr import DecorrAnalysis
+from .frc import FIRECalculator
+from ..transform.blocks import assemble_frame_from_blocks, split_frame_into_blocks
+
+# smallest block size whose FRC curve is long enough for the smoothing window of FIRECalculator
+FRC_MIN_BLOCK_SIZE = 116
+
+
+def calculate_resolution_map(
+    img_1: np.ndarray,
+    img_2: np.ndarray = None,
+    method: str = "frc",
+    n_rows: int = 4,
+    n_cols: int = 4,
+    overlap: int = 0,
+    pixel_size: float = 1,
+    units: str = "pixel",
+    n_workers: int = None,
+    **kwargs,
+):
+    """
+    Calculates a local resolution map, as in NanoJ-SQUIRREL, by splitting the image into blocks and estimating the
+    resolution of each one. Blocks are processed concurrently, in groups that share the Fourier transforms and the
+    cached ring maps of their common size.
+    :param img_1: numpy array with shape (y, x); for "frc" also (n_frames, y, x), whose even and odd frame means are
+        compared when img_2 is None; for "decorr" a stack is averaged over the frames
+    :param img_2: numpy array with shape (y, x); second independent image of the same field, used by "frc"
+    :param method: "frc" for Fourier ring correlation (FIRECalculator) or "decorr" for decorrelation analysis
+        (DecorrAnalysis)
+    :param n_rows: number of blocks along y
+    :param n_cols: number of blocks along x
+    :param overlap: number of pixels each block extends into its neighbours on every side, so that blocks can be
+        larger than the map spacing; for "frc" it is increased when needed so that blocks have at least
+        FRC_MIN_BLOCK_SIZE pixels
+    :param pixel_size: pixel size, in units
+    :param units: name of the pixel size units
+    :param n_workers: number of groups of blocks processed concurrently, defaults to the number of cores
+    :param kwargs: additional keyword arguments passed to DecorrAnalysis
+    :return: numpy array with shape (y // n_rows * n_rows, x // n_cols * n_cols) where every pixel of a block holds
+        its resolution, in units; 0 where the FRC does not cross the threshold
+    """
+    if method not in ("frc", "decorr"):
+        raise ValueError(f"Unknown resolution method '{method}', must be 'frc' or 'decorr'")
+
+    img_1 = np.asarray(img_1, dtype=np.float32)
+    if method == "frc" and img_2 is None:
+        if img_1.ndim != 3 or img_1.shape[0] < 2:
+            raise ValueError("FRC needs img_2 or an img_1 stack with at least 2 frames")
+        img_1, img_2 = img_1[0::2].mean(axis=0), img_1[1::2].mean(axis=0)
+    elif img_1.ndim == 3:
+        img_1 = img_1.mean(axis=0)
+
+    # the blocks tile the largest area of the image divisible by the number of blocks
+    rows = img_1.shape[0] // n_rows * n_rows
+    cols = img_1.shape[1] // n_cols * n_cols
+    if method == "frc":
+        block_size = min(rows // n_rows, cols // n_cols)
+        overlap = max(overlap, -(-(FRC_MIN_BLOCK_SIZE - block_size) // 2))
+        if block_size + 2 * overlap > min(rows, cols):
+            raise ValueError(
+                f"FRC needs blocks of at least {FRC_MIN_BLOCK_SIZE} pixels, which do not fit in an image of shape "
+                f"{img_1.shape}"
+            )
+
+    def _split(img):
+        return np.asarray(split_frame_into_blocks(np.ascontiguousarray(img[:rows, :cols]), n_rows, n_cols, overlap))
+
+    blocks_1 = _split(img_1)
+    if method == "frc":
+        img_2 = np.asarray(img_2, dtype=np.float32)
+        if img_2.shape != img_1.shape:
+            raise ValueError(f"img_2 has shape {img_2.shape}, expected {img_1.shape}")
+        blocks_2 = _split(img_2)
+
+    n_blocks = n_rows * n_cols
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers, n_blocks))
+
+    # each group of blocks gets its own calculator, as calculators keep the results of their last analysis
+    def _process(b0, b1):
+        if method == "frc":
+            calculator = FIRECalculator(pixel_size=pixel_size, units=units)
+            return calculator.calculate_fire_numbers(blocks_1[b0:b1], blocks_2[b0:b1])
+        else:
+            decorr = DecorrAnalysis(pixel_size=pixel_size, units=units, **kwargs)
+            return decorr.run_batch_analysis(blocks_1[b0:b1])
+
+    group_size = -(-n_blocks // n_workers)
+    groups = [(b0, min(b0 + group_size, n_blocks)) for b0 in range(0, n_blocks, group_size)]
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        resolutions = np.concatenate(list(executor.map(lambda group: _process(*group), groups)))
+
+    block_shape = (rows // n_rows, cols // n_cols)
+    blocks = np.broadcast_to(resolutions[:, np.newaxis, np.newaxis], (n_blocks,) + block_shape)
+    return np.asarray(assemble_frame_from_blocks(blocks, n_rows, n_cols))
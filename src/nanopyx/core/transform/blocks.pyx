@@ -28,29 +28,44 @@ cdef float[:, :] _assemble_frame_from_blocks(float[:, :, :] blocks_stack, int n_
 
     return reconstructed_image
 
-def split_frame_into_blocks(img: np.ndarray, n_rows: int, n_cols: int):
-    return _split_frame_into_blocks(img, n_rows, n_cols)
+def split_frame_into_blocks(img: np.ndarray, n_rows: int, n_cols: int, overlap: int = 0):
+    """
+    Splits a frame into n_rows * n_cols blocks, ordered row by row as expected by assemble_frame_from_blocks
+    :param img: numpy array with shape (y, x), each dimension a multiple of the number of blocks along it
+    :param n_rows: number of blocks along y
+    :param n_cols: number of blocks along x
+    :param overlap: number of pixels each block extends into its neighbours on every side; blocks at the border of
+        the frame are shifted inwards so that all blocks have the same shape
+    :return: numpy array with shape (n_rows * n_cols, y // n_rows + 2 * overlap, x // n_cols + 2 * overlap)
+    """
+    return _split_frame_into_blocks(img, n_rows, n_cols, overlap)
 
-cdef float[:, :, :] _split_frame_into_blocks(float[:, :] img, int n_rows, int n_cols) nogil:
+cdef float[:, :, :] _split_frame_into_blocks(float[:, :] img, int n_rows, int n_cols, int overlap=0) nogil:
     
         cdef int block_cols_len = img.shape[1] // n_cols
         cdef int block_rows_len = img.shape[0] // n_rows
         cdef int cols_len = block_cols_len * n_cols
         cdef int rows_len = block_rows_len * n_rows
-        cdef int row_i, col_i, count
+        cdef int window_cols_len = block_cols_len + 2 * overlap
+        cdef int window_rows_len = block_rows_len + 2 * overlap
+        cdef int row_i, col_i, count, row_start, col_start
         cdef float[:, :, :] blocks_stack
     
         with gil:
             assert img.shape[0] == rows_len
             assert img.shape[1] == cols_len
-            blocks_stack = np.empty((n_rows * n_cols, block_rows_len, block_cols_len), dtype=np.float32)
+            assert overlap >= 0
+            assert window_rows_len <= rows_len and window_cols_len <= cols_len, "overlapping blocks larger than the frame"
+            blocks_stack = np.empty((n_rows * n_cols, window_rows_len, window_cols_len), dtype=np.float32)
             assert blocks_stack.shape[0] == n_rows * n_cols
-            assert blocks_stack.shape[1] == block_rows_len
-            assert blocks_stack.shape[2] == block_cols_len
+            assert blocks_stack.shape[1] == window_rows_len
+            assert blocks_stack.shape[2] == window_cols_len
             count = 0
             for row_i in range(n_rows):
+                row_start = min(max(row_i*block_rows_len - overlap, 0), rows_len - window_rows_len)
                 for col_i in range(n_cols):
-                    blocks_stack[count] = img[row_i*block_rows_len:(row_i+1)*block_rows_len, col_i*block_cols_len:(col_i+1)*block_cols_len]
+                    col_start = min(max(col_i*block_cols_len - overlap, 0), cols_len - window_cols_len)
+                    blocks_stack[count] = img[row_start:row_start+window_rows_len, col_start:col_start+window_cols_len]
                     count += 1
     
-        return blocks_stack
\ No newline at end of file
+        return blocks_stack
@@ -22,11 +22,15 @@ from . import interpolation_lanczos
 def fourier_zoom(image: np.ndarray, magnification: float = 2) -> np.ndarray:
     """
     Zoom an image by zero-padding its Discrete Fourier transform.
-    :param image: 2D grid of pixel values.
+    :param image: 2D grid of pixel values, or 3D stack of 2D grids with shape (nFrames, rows, cols).
     :param magnification: Factor by which to multiply the dimensions of the image.
     :return: zoomed image.
     """
 
+    if image.ndim == 3 or not float(magnification).is_integer():
+        zoomed = interpolation_fft_zoom.magnify_stack(image, magnification)
+        return zoomed if image.ndim == 3 else zoomed[0]
+
     return interpolation_fft_zoom.magnify(image, magnification)
 
 
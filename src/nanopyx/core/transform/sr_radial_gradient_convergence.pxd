@@ -6,6 +6,8 @@ cdef extern from "_c_sr_radial_gradient_convergence.h":
 cdef extern from "_c_gradients.h":
     void _c_gradient_roberts_cross(float* pixels, float* GxArray, float* GyArray, int w, int h) nogil
 
+# nanopyx-c-file: _c_interpolation_catmull_rom.c
+
 # pyx2pxd: starting point
 # autogenerated by pyx2pxd - https://github.com/HenriquesLab/pyx2pxd
 
@@ -1,3 +1,7 @@
+import copy
+from collections import deque
+from itertools import islice
+
 import numpy as np
 
 
@@ -23,28 +27,333 @@ def calculate_SRRF_temporal_correlations(im: np.array, order: int = 1, do_integr
 
 # def calculate_eSRRF_temporal_correlations()
 
-    
-def calculate_pairwise_product_sum(rad_array):
-    n_time_points, height_m, width_m = rad_array.shape
 
-    out_array = np.zeros((height_m, width_m), dtype=np.float32)
-    #max_array = np.max(rad_array, axis=0)
-    counter = 0
-    pps = 0
-
-    for t0 in range(n_time_points):
-        r0 = np.maximum(rad_array[t0],0)
-        if np.any(r0) > 0:
-            for t1 in range(t0, n_time_points):
-                r1 = np.maximum(rad_array[t1],0)
-                pps += r0 * r1
-                counter += 1
+# SRRF orders, as used by calculate_SRRF_temporal_correlations, and the equivalent TemporalReduction
+SRRF_ORDER_REDUCTIONS = {0: "max", 1: "mean", -1: "pps", 2: "ac2", 3: "ac3", 4: "ac4"}
+
+
+class TemporalReduction:
+    """
+    Reduces an image stack along time, taking the frames in chunks, so that only the per-pixel state of the
+    reduction is kept in memory instead of the full stack.
+    Supported reductions are "mean", "max", "var" (variance), "tac2" (lag 1 auto-correlation, as calculate_tac2),
+    "ac2", "ac3" and "ac4" (auto-cumulants of order 2 to 4, as calculate_acrf_ without lag time integration)
+    and "pps" (pairwise product sum, as calculate_pairwise_product_sum). SRRF orders (0, 1, -1, 2, 3, 4) are also
+    accepted.
+    Lagged products are expanded into sums of products of the raw frames, so that they can be accumulated before the
+    mean is known; the frames are shifted by the mean of the first chunk, and sums are kept in float64, to limit
+    cancellation.
+    Adding a frame costs O(pixels), so the result can be updated as frames are acquired. With a window_size, the
+    oldest frames are removed as new ones arrive (sliding window), and reductions of consecutive parts of a stack
+    (e.g. calculated by parallel workers) can be combined with merge.
+
+    >>> reduction = TemporalReduction("var")
+    >>> reduction.add(np.ones((3, 2, 2), dtype=np.float32))
+    >>> reduction.add(np.zeros((1, 2, 2), dtype=np.float32))
+    >>> reduction.get_result()[0, 0]
+    0.1875
+    """
+
+    reductions = ("mean", "max", "var", "tac2", "ac2", "ac3", "ac4", "pps")
+
+    def __init__(self, reduction="mean", window_size: int = None):
+        """
+        :param reduction: name of the reduction or SRRF order
+        :param window_size: if set, only the last window_size frames are kept in the reduction, older frames are
+            removed as new ones are added; the frames in the window are kept in memory
+        """
+        reduction = SRRF_ORDER_REDUCTIONS.get(reduction, reduction)
+        if reduction not in self.reductions:
+            raise ValueError(f"Reduction must be one of {self.reductions} or an SRRF order, got {reduction}")
+        if window_size is not None and window_size < 1:
+            raise ValueError(f"window_size must be at least 1, got {window_size}")
+        self.reduction = reduction
+        self.window_size = window_size
+
+        # lagged products use frames t to t + window - 1, and the product starting at t is only accumulated once
+        # frame t + span is available (calculate_acrf_ skips the last order frames)
+        if reduction == "tac2":
+            self._window, self._span = 2, 1
+        elif reduction.startswith("ac"):
+            self._window = self._span = int(reduction[2])
+        else:
+            self._window = self._span = 0
+
+        self._reset()
+
+    def add(self, frames):
+        """
+        Adds frames to the reduction
+        :param frames: a frame with shape (rows, cols) or frames with shape (n_frames, rows, cols)
+        """
+        frames = np.asarray(frames, dtype=np.float32)
+        if frames.ndim == 2:
+            frames = frames[np.newaxis]
+        if frames.shape[0] == 0:
+            return
+
+        if self.n_frames == 0:
+            self._initialize(frames)
+        elif frames.shape[1:] != self._shape:
+            raise ValueError(f"Frames with shape {frames.shape[1:]} do not match the reduction shape {self._shape}")
+        self._accumulate(frames)
+
+        if self.window_size is not None:
+            # copied, as acquisition code often reuses its frame buffers
+            self._frames.extend(frames.copy())
+            while self.n_frames > self.window_size:
+                self._remove_oldest()
+
+    def remove(self, n_frames: int = 1):
+        """
+        Removes the oldest frames from the reduction, only available when window_size is set
+        :param n_frames: number of frames to remove
+        """
+        if self.window_size is None:
+            raise ValueError("Frames can only be removed from a reduction with a window_size")
+        if n_frames > self.n_frames:
+            raise ValueError(f"Cannot remove {n_frames} frames from a reduction with {self.n_frames} frames")
+        for _ in range(n_frames):
+            self._remove_oldest()
+
+    def merge(self, other: "TemporalReduction"):
+        """
+        Merges another reduction into this one, as if its frames had been added after the frames of this reduction;
+        used to combine reductions of consecutive parts of a stack, e.g. calculated by parallel workers
+        :param other: reduction of the frames that follow the frames of this reduction, it is not modified
+        """
+        if other.reduction != self.reduction:
+            raise ValueError(f"Cannot merge a {other.reduction} reduction into a {self.reduction} reduction")
+        if self.window_size is not None or other.window_size is not None:
+            raise ValueError("Reductions with a window_size cannot be merged")
+        if other.n_frames == 0:
+            return
+        if self.n_frames == 0:
+            self.__dict__.update(copy.deepcopy(other.__dict__))
+            return
+        if other._shape != self._shape:
+            raise ValueError(f"Cannot merge a reduction with shape {other._shape} into one with shape {self._shape}")
+
+        if self.reduction == "max":
+            np.maximum(self._max, other._max, out=self._max)
+            self.n_frames += other.n_frames
+            return
+
+        if self._shift is not None:
+            other = copy.deepcopy(other)
+            other._set_shift(self._shift)
+
+        self._sum += other._sum
+        if self._sum_sq is not None:
+            self._sum_sq += other._sum_sq
+
+        if self._window > 0:
+            for mask in self._products:
+                self._products[mask] += other._products[mask]
+            self._n_windows += other._n_windows
+
+            # windows starting in the last frames of this reduction continue into the first frames of the other
+            stack = np.concatenate((self._previous, other._head))
+            n_windows = min(self._previous.shape[0], stack.shape[0] - self._span)
+            if n_windows > 0:
+                self._accumulate_windows(stack, n_windows)
+            self._previous = np.concatenate((self._previous, other._previous))[-self._span :].copy()
+            self._head = np.concatenate((self._head, other._head))[: self._span].copy()
+
+        self.n_frames += other.n_frames
+
+    def get_result(self) -> np.ndarray:
+        """
+        Calculates the reduction of the frames added so far
+        :return: float32 array with shape (rows, cols)
+        """
+        if self.n_frames == 0:
+            raise ValueError("No frames were added to the reduction")
+
+        n = self.n_frames
+        if self.reduction == "max":
+            return self._max.copy()
+        if self.reduction == "mean":
+            return (self._sum / n).astype(np.float32)
+        if self.reduction == "pps":
+            # sum over all pairs t0 <= t1 of r[t0] * r[t1], divided by the number of pairs
+            return ((self._sum * self._sum + self._sum_sq) / (n * (n + 1))).astype(np.float32)
+
+        mean = self._sum / n
+        if self.reduction == "var":
+            return (self._sum_sq / n - mean * mean).astype(np.float32)
+
+        if self._n_windows == 0:
+            return np.zeros_like(self._sum, dtype=np.float32)
+
+        # sums over the windows of the product of the frames in each mask, centered on the mean
+        def centered(mask):
+            return self._expand_products(mask, -mean)
+
+        if self.reduction == "tac2":
+            return (centered(0b11) / self._n_windows).astype(np.float32)
+        if self.reduction == "ac2":
+            out = centered(0b11)
+        elif self.reduction == "ac3":
+            out = centered(0b111)
+        else:
+            out = (
+                centered(0b1111)
+                - centered(0b0011) * centered(0b1100)
+                - centered(0b0101) * centered(0b1010)
+                - centered(0b1001) * centered(0b0110)
+            )
+        return (np.absolute(out) / n).astype(np.float32)
+
+    def _reset(self):
+        self.n_frames = 0
+        self._n_windows = 0
+        self._shape = None
+        self._shift = None
+        self._sum = None
+        self._sum_sq = None
+        self._max = None
+        self._products = None
+        self._previous = None
+        self._head = None
+        self._frames = deque() if self.window_size is not None else None
+
+    def _initialize(self, frames):
+        shape = self._shape = frames.shape[1:]
+        if self.reduction == "max":
+            self._max = frames.max(axis=0)
+            return
+        self._sum = np.zeros(shape, dtype=np.float64)
+        if self.reduction in ("var", "pps"):
+            self._sum_sq = np.zeros(shape, dtype=np.float64)
+        if self.reduction in ("var", "tac2", "ac2", "ac3", "ac4"):
+            self._shift = frames.mean(axis=0, dtype=np.float64)
+        if self._window > 0:
+            self._products = {mask: np.zeros(shape, dtype=np.float64) for mask in range(1, 2**self._window)}
+            self._previous = np.zeros((0,) + shape, dtype=np.float64)
+            self._head = np.zeros((0,) + shape, dtype=np.float64)
+
+    def _rectify(self, frames):
+        if self.reduction == "pps":
+            return np.maximum(frames, 0).astype(np.float64)
+        return frames - self._shift
+
+    def _accumulate(self, frames):
+        self.n_frames += frames.shape[0]
+
+        if self.reduction == "max":
+            np.maximum(self._max, frames.max(axis=0), out=self._max)
+            return
+
+        if self.reduction == "mean":
+            self._sum += frames.sum(axis=0, dtype=np.float64)
+            return
+
+        rectified = self._rectify(frames)
+        self._sum += rectified.sum(axis=0)
+
+        if self.reduction in ("var", "pps"):
+            self._sum_sq += np.einsum("ijk,ijk->jk", rectified, rectified)
+            return
+
+        # the first frames are kept to complete the windows of a reduction merged before this one
+        if self._frames is None and self._head.shape[0] < self._span:
+            self._head = np.concatenate((self._head, rectified[: self._span - self._head.shape[0]]))
+
+        # lagged products, the frames still waiting for the rest of their window are kept in self._previous
+        stack = np.concatenate((self._previous, rectified))
+        n_windows = stack.shape[0] - self._span
+        if n_windows > 0:
+            self._accumulate_windows(stack, n_windows)
+            self._previous = stack[n_windows:].copy()
         else:
-            counter += n_time_points - t0
-    pps = pps/ max(counter,1)
-    out_array = pps
+            self._previous = stack
+
+    def _accumulate_windows(self, stack, n_windows, sign=1):
+        # products of every subset (mask) of the frames in the windows starting at t = 0 to n_windows - 1
+        products = {}
+        for mask in range(1, 2**self._window):
+            lag = mask.bit_length() - 1
+            lagged = stack[lag : lag + n_windows]
+            low = mask ^ (1 << lag)
+            products[mask] = lagged if low == 0 else products[low] * lagged
+            if sign > 0:
+                self._products[mask] += products[mask].sum(axis=0)
+            else:
+                self._products[mask] -= products[mask].sum(axis=0)
+        self._n_windows += sign * n_windows
+
+    def _remove_oldest(self):
+        frame = self._frames.popleft()
+        if self.n_frames == 1:
+            self._reset()
+            return
+        self.n_frames -= 1
+
+        if self.reduction == "max":
+            # only pixels where the removed frame held the maximum need to look at the rest of the window
+            stale = frame >= self._max
+            if stale.any():
+                self._max[stale] = np.max([f[stale] for f in self._frames], axis=0)
+            return
+
+        if self.reduction == "mean":
+            self._sum -= frame
+            return
+
+        rectified = self._rectify(frame)
+        self._sum -= rectified
+
+        if self.reduction in ("var", "pps"):
+            self._sum_sq -= rectified * rectified
+            return
+
+        if self._n_windows > 0:
+            # the oldest accumulated window is the one starting at the removed frame
+            following = [self._rectify(f) for f in islice(self._frames, self._window - 1)]
+            self._accumulate_windows(np.stack([rectified] + following), 1, sign=-1)
+        else:
+            self._previous = self._previous[1:]
+
+    def _expand_products(self, mask, delta):
+        # sum over the windows of the product of the frames in mask, each shifted by delta:
+        # prod(x_i + delta) = sum over the subsets of the mask of prod(x_i in subset) * delta**(missing frames)
+        total = np.zeros_like(self._sum)
+        sub = mask
+        while True:
+            n_missing = bin(mask).count("1") - bin(sub).count("1")
+            term = self._n_windows if sub == 0 else self._products[sub]
+            total += term * delta**n_missing
+            if sub == 0:
+                break
+            sub = (sub - 1) & mask
+        return total
+
+    def _set_shift(self, shift):
+        # re-expresses the accumulated sums for frames shifted by shift instead of self._shift
+        delta = self._shift - shift
+        n = self.n_frames
+        if self._sum_sq is not None:
+            self._sum_sq += 2 * delta * self._sum + n * delta * delta
+        if self._window > 0:
+            self._products = {mask: self._expand_products(mask, delta) for mask in self._products}
+            self._previous = self._previous + delta
+            self._head = self._head + delta
+        self._sum += n * delta
+        self._shift = shift
 
-    return out_array
+    
+def calculate_pairwise_product_sum(rad_array):
+    """
+    Sum over all pairs of frames t0 <= t1 of the product of the rectified frames, divided by the number of pairs,
+    calculated in O(T) with sum_{t0 <= t1} r[t0] * r[t1] = ((sum r)^2 + sum r^2) / 2
+    """
+    n_time_points = rad_array.shape[0]
+    rectified = np.maximum(rad_array, 0)
+    pps_sum = rectified.sum(axis=0, dtype=np.float64)
+    pps_sum_sq = np.einsum("ijk,ijk->jk", rectified, rectified, dtype=np.float64)
+
+    return ((pps_sum * pps_sum + pps_sum_sq) / (n_time_points * (n_time_points + 1))).astype(np.float32)
 
 
 def calculate_acrf_(rad_array, order, do_integrate_lag_times):
@@ -68,7 +377,7 @@ def calculate_acrf_(rad_array, order, do_integrate_lag_times):
         while (t < n_time_points - order):
             ab = ab + (im[t] - mean) * (im[t+1] - mean)
             if order == 3:
-                abc = abc + (im[t] - mean) * (im[t+1] - mean) + (im[t+2] - mean)
+                abc = abc + (im[t] - mean) * (im[t+1] - mean) * (im[t+2] - mean)
             if order == 4:
                 a = im[t] - mean
                 b = im[t+1] - mean
@@ -98,7 +407,7 @@ def calculate_acrf_(rad_array, order, do_integrate_lag_times):
                 tbin = t * order
                 ab = ab + (im[t] - mean) * (im[t+1] - mean)
                 if order == 3:
-                    abc = abc + (im[t] - mean) * (im[t+1] - mean) + (im[t+2] - mean)
+                    abc = abc + (im[t] - mean) * (im[t+1] - mean) * (im[t+2] - mean)
                 if order == 4:
                     a = im[t] - mean
                     b = im[t+1] - mean
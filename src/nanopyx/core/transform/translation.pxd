@@ -1 +1,7 @@
+cdef extern from "_c_interpolation_catmull_rom.h":
+    float _c_interpolate(float * image, float r, float c, int rows, int cols) nogil
+
+# pyx2pxd: starting point
 # Code below is autogenerated by pyx2pxd - https://github.com/HenriquesLab/pyx2pxd
+
+cdef void _translate_frame(float* image, float* image_out, float shift_row, float shift_col, int rows, int cols) nogil
@@ -1,24 +1,71 @@
 # cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=True
 
+import os
+
 import numpy as np
 cimport numpy as np
 
-from cython.parallel import prange
-
-from .interpolation_catmull_rom cimport Interpolator
+from cython.parallel import prange, threadid
+from libc.string cimport memcpy
 
 
-def translate_array(float[:, :, :] img_arr, float[:, :] drift_t):
+def translate_array(float[:, :, :] img_arr, float[:, :] drift_t, out=None):
     """
     Translate an array of images using the drift data.
+    All frames are shifted in parallel using Catmull-Rom interpolation, without holding the GIL.
+    :param img_arr: float32 array with shape (n_slices, rows, columns), translated in place if out is None; arrays
+        that are not C-contiguous are copied to a contiguous buffer first
+    :param drift_t: drift table with shape (n_slices, 3), each slice is shifted by drift_t[i, 1] along the rows and
+        drift_t[i, 2] along the columns
+    :param out: optional C-contiguous float32 array with the same shape as img_arr that receives the translated images
+    :return: the translated array (img_arr or out)
     """
 
     cdef int n_slices = img_arr.shape[0]
-    cdef float drift_x, drift_y
+    cdef int rows = img_arr.shape[1]
+    cdef int cols = img_arr.shape[2]
+    cdef bint in_place = out is None
+    cdef int n_threads = max(1, min(os.cpu_count() or 1, n_slices))
+
+    # shares the memory of C-contiguous arrays
+    cdef float[:, :, ::1] _img = np.ascontiguousarray(img_arr)
+
+    cdef float[:, :, ::1] _out
+    if in_place:
+        # interpolation reads the neighbours of each pixel in the original frame,
+        # so each thread shifts into its own buffer before copying back
+        _out = np.empty((n_threads, rows, cols), dtype=np.float32)
+    else:
+        if tuple(out.shape) != (n_slices, rows, cols):
+            raise ValueError(f"out has shape {tuple(out.shape)}, expected {(n_slices, rows, cols)}")
+        _out = out
 
-    for i in range(n_slices):
-        drift_x = drift_t[i][1]
-        drift_y = drift_t[i][2]
-        img_arr[i,  :, :] = Interpolator(img_arr[i])._shift(drift_y, drift_x)
+    cdef int i, t
+    with nogil:
+        for i in prange(n_slices, num_threads=n_threads):
+            if in_place:
+                t = threadid()
+                _translate_frame(&_img[i, 0, 0], &_out[t, 0, 0], drift_t[i, 1], drift_t[i, 2], rows, cols)
+                memcpy(&_img[i, 0, 0], &_out[t, 0, 0], rows * cols * sizeof(float))
+            else:
+                _translate_frame(&_img[i, 0, 0], &_out[i, 0, 0], drift_t[i, 1], drift_t[i, 2], rows, cols)
 
-    return img_arr
+    if in_place:
+        if not img_arr.is_c_contig():
+            img_arr[...] = _img
+        return img_arr
+    return out
+
+
+cdef void _translate_frame(float* image, float* image_out, float shift_row, float shift_col, int rows, int cols) nogil:
+    """
+    Shifts a single frame using Catmull-Rom interpolation, pixels shifted in from outside the frame are set to 0
+    :param image: pointer to the frame, with shape (rows, cols)
+    :param image_out: pointer to the output frame, must not overlap with image
+    :param shift_row: shift along the rows
+    :param shift_col: shift along the columns
+    """
+    cdef int i, j
+    for i in range(rows):
+        for j in range(cols):
+            image_out[i * cols + j] = _c_interpolate(image, i - shift_row, j - shift_col, rows, cols)
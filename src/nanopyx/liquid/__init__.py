@@ -17,8 +17,11 @@ import warnings
 
 from .__njit__ import njit_works
 from .__opencl__ import cl, cl_array, cl_ctx, cl_queue, opencl_works, print_opencl_info
+from ._le_binning import Binning
 from ._le_interpolation_bicubic import ShiftAndMagnify as BCShiftAndMagnify
 from ._le_interpolation_bicubic import ShiftScaleRotate as BCShiftScaleRotate
+from ._le_interpolation_bilinear import ShiftAndMagnify as BLShiftAndMagnify
+from ._le_interpolation_bilinear import ShiftScaleRotate as BLShiftScaleRotate
 from ._le_interpolation_catmull_rom import ShiftAndMagnify as CRShiftAndMagnify
 from ._le_interpolation_catmull_rom import ShiftScaleRotate as CRShiftScaleRotate
 from ._le_interpolation_lanczos import ShiftAndMagnify as LZShiftAndMagnify
@@ -26,3 +29,5 @@ from ._le_interpolation_lanczos import ShiftScaleRotate as LZShiftScaleRotate
 from ._le_interpolation_nearest_neighbor import ShiftAndMagnify as NNShiftAndMagnify
 from ._le_interpolation_nearest_neighbor import ShiftScaleRotate as NNShiftScaleRotate
 from ._le_mandelbrot_benchmark import MandelbrotBenchmark
+from ._le_temporal_correlations import TemporalCorrelations
+from ._le_translation import Translation
@@ -14,6 +14,74 @@ def check_image(image: np.ndarray) -> np.ndarray:
     return image
 
 
+def check_batch(image):
+    """
+    Converts an image (rows, cols), a sequence of images (frames, rows, cols) or a batch of sequences, e.g.
+    (channels, frames, rows, cols) or (channels, timepoints, frames, rows, cols), into a float32 sequence of images,
+    so that every frame of every channel and timepoint is an independent work item of the engines
+    :param image: The image, sequence or batch of sequences
+    :return: (3D float32 array with shape (nFrames, rows, cols), shape of the batch axes or None if the image has
+        less than 4 dimensions), see restore_batch
+    """
+    image = np.asarray(image)
+    if image.ndim < 4:
+        return check_image(image), None
+    batch_shape = image.shape[:-2]
+    return check_image(image.reshape((-1,) + image.shape[-2:])), batch_shape
+
+
+def restore_batch(image, batch_shape):
+    """
+    Restores the batch axes of the output of an engine, see check_batch
+    :param image: The output, with shape (nFrames, rows, cols)
+    :param batch_shape: The shape of the batch axes returned by check_batch
+    :return: The output, with shape batch_shape + (rows, cols)
+    """
+    if batch_shape is None:
+        return image
+    image = np.asarray(image)
+    return image.reshape(batch_shape + image.shape[-2:])
+
+
+def get_drift_shifts(drift_table, n_frames: int, batch_shape=None):
+    """
+    Converts a drift table into the per frame shifts applied by the magnifying engines while they magnify and
+    sample the frames, equivalent to correcting the drift with DriftCorrector.apply_correction beforehand
+    :param drift_table: None, or a drift table with shape (frames, 3) as DriftEstimatorTable.drift_table, frame i
+        is shifted by drift_table[i, 1] rows and drift_table[i, 2] columns, as by translation.translate_array
+    :param n_frames: The number of frames of the (flattened, see check_batch) image
+    :param batch_shape: The batch shape returned by check_batch, the stacks of a batch share the drift table
+    :return: (shift_row, shift_col), float32 arrays with n_frames values, 0 if there is no drift table
+    """
+    if drift_table is None:
+        return np.zeros(n_frames, dtype=np.float32), np.zeros(n_frames, dtype=np.float32)
+    drift_table = np.asarray(drift_table, dtype=np.float32)
+    frames_per_stack = n_frames if batch_shape is None else batch_shape[-1]
+    if drift_table.ndim != 2 or drift_table.shape[0] != frames_per_stack or drift_table.shape[1] < 3:
+        raise ValueError(f"Drift table has shape {drift_table.shape}, expected ({frames_per_stack}, 3)")
+    n_stacks = n_frames // frames_per_stack
+    shift_row = np.ascontiguousarray(np.tile(drift_table[:, 1], n_stacks))
+    shift_col = np.ascontiguousarray(np.tile(drift_table[:, 2], n_stacks))
+    return shift_row, shift_col
+
+
+def check_volume(image) -> np.ndarray:
+    """
+    Converts a volume (slices, rows, cols) or a sequence of volumes (frames, slices, rows, cols) into a C-contiguous
+    float32 array with shape (frames, slices, rows, cols)
+    :param image: The volume or sequence of volumes
+    :return: The 4D float32 array
+    """
+    image = np.asarray(image)
+    if image.ndim != 3 and image.ndim != 4:
+        raise ValueError("Image must be 3D or 4D (sequence of 3D volumes)")
+    if image.ndim == 3:
+        image = image[np.newaxis]
+    if min(image.shape[1:]) < 2:
+        raise ValueError(f"Volumes must have at least 2 slices, rows and columns, got {image.shape[1:]}")
+    return np.ascontiguousarray(image, dtype=np.float32)
+
+
 def value2array(v, n_frames: int) -> np.ndarray:
     """
     Convert a value to an array of the same length as the number of frames
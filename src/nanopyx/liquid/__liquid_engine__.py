@@ -4,6 +4,7 @@ import difflib
 from pathlib import Path
 import inspect
 import random
+import threading
 
 import numpy as np
 import yaml
@@ -16,6 +17,10 @@ __config_folder__ = os.path.join(__home_folder__, ".nanopyx")
 if not os.path.exists(__config_folder__):
     os.makedirs(__config_folder__)
 
+# engine instances may be shared by threads (e.g. tiled execution), so the run times in the config and the config
+# files are only accessed while holding this lock
+__config_lock__ = threading.Lock()
+
 # flake8: noqa: E501
 
 
@@ -93,10 +98,16 @@ class LiquidEngine:
         self._config_file = os.path.join(base_path, self.__class__.__name__ + ".yml")
 
         # Load config file if it exists, otherwise create an empty config
+        self._cfg = None
         if not clear_config and os.path.exists(self._config_file):
-            with open(self._config_file) as f:
-                self._cfg = yaml.load(f, Loader=yaml.FullLoader)
-        else:
+            with __config_lock__:
+                try:
+                    with open(self._config_file) as f:
+                        self._cfg = yaml.load(f, Loader=yaml.FullLoader)
+                except yaml.YAMLError:
+                    # e.g. a config left incomplete by an older version, the run times are measured again
+                    pass
+        if not isinstance(self._cfg, dict):
             self._cfg = {}
 
         # Initialize missing dictionaries in cfg
@@ -221,17 +232,18 @@ class LiquidEngine:
         # Get the call args
         call_args = self._get_args_repr(*args, **kwargs)
 
-        # Check if the run type has been run
-        r = self._cfg[run_type]
-        # If not, return None
-        if call_args not in r:
-            return None, None, None
-
-        # Get the run times
-        c = r[call_args]
-        sum = c[0]  # Sum of run times
-        sum_sq = c[1]  # Sum of squared run times (for std)
-        n = c[2]  # Number of runs
+        with __config_lock__:
+            # Check if the run type has been run
+            r = self._cfg[run_type]
+            # If not, return None
+            if call_args not in r:
+                return None, None, None
+
+            # Get the run times
+            c = r[call_args]
+            sum = c[0]  # Sum of run times
+            sum_sq = c[1]  # Sum of squared run times (for std)
+            n = c[2]  # Number of runs
         mean = sum / n
         if (n - 1) > 0:
             std = np.sqrt((sum_sq - n * mean**2) / (n - 1))
@@ -266,28 +278,32 @@ class LiquidEngine:
         self._last_run_time = delta  # Store the last run time
         call_args = self._get_args_repr(*args, **kwargs)  # Get the call args
 
-        # Check if the run type has been run
-        r = self._cfg[run_type]
-        if call_args not in r:
-            r[call_args] = [0, 0, 0]
-
-        # Get the run times
-        c = r[call_args]
-        # add the time it took to run, later used for average
-        c[0] = c[0] + delta
-        # add the time it took to run squared, later used for standard deviation
-        c[1] = c[1] + delta * delta
-        # increment the number of times it was run
-        c[2] += 1
-
-        self._print(
-            f"Storing run time: {delta} (m={c[0]/c[2]:.2f},n={c[2]})",
-            call_args,
-            run_type,
-        )
+        with __config_lock__:
+            # Check if the run type has been run
+            r = self._cfg[run_type]
+            if call_args not in r:
+                r[call_args] = [0, 0, 0]
+
+            # Get the run times
+            c = r[call_args]
+            # add the time it took to run, later used for average
+            c[0] = c[0] + delta
+            # add the time it took to run squared, later used for standard deviation
+            c[1] = c[1] + delta * delta
+            # increment the number of times it was run
+            c[2] += 1
+
+            self._print(
+                f"Storing run time: {delta} (m={c[0]/c[2]:.2f},n={c[2]})",
+                call_args,
+                run_type,
+            )
 
-        with open(self._config_file, "w") as f:
-            yaml.dump(self._cfg, f)
+            # write a temporary file and rename it, so that other processes never read a partially written config
+            tmp_file = f"{self._config_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                yaml.dump(self._cfg, f)
+            os.replace(tmp_file, self._config_file)
 
     def _get_fastest_run_type(self, *args, **kwargs) -> str:
         """
@@ -308,38 +324,39 @@ class LiquidEngine:
         call_args = self._get_args_repr(*args, **kwargs)
         # print(call_args)
 
-        for run_type in self._run_types:
+        with __config_lock__:
+            for run_type in self._run_types:
 
-            if run_type not in self._cfg:
-                self._cfg[run_type] = {}
-                continue
+                if run_type not in self._cfg:
+                    self._cfg[run_type] = {}
+                    continue
 
-            if call_args not in self._cfg[run_type] and len(self._cfg[run_type]) > 0:
-                # find the most similar call_args by score
-                score_current = self._get_args_score(call_args)
-                delta_best = 1e99
-                similar_call_args: str = None
-                for _call_args in self._cfg[run_type]:
-                    score = self._get_args_score(_call_args)
-                    delta = abs(score - score_current)
-                    if delta < delta_best:
-                        delta_best = delta
-                        similar_call_args = _call_args
-                if similar_call_args is not None:
-                    call_args = similar_call_args
-                else:
-                    # find the most similar call_args by string similarity
-                    similar_args = difflib.get_close_matches(call_args, self._cfg[run_type].keys())
-                    if len(similar_args) > 0:
-                        call_args = similar_args[0]
-
-            if call_args in self._cfg[run_type]:
-                run_info = self._cfg[run_type][call_args]
-                runtime_sum = run_info[0]
-                runtime_count = run_info[2]
-                speed = runtime_count / runtime_sum
-                speed_and_type.append((speed, run_type))
-                self._print(f"{run_type} run time: {speed:.2f} runs/s")
+                if call_args not in self._cfg[run_type] and len(self._cfg[run_type]) > 0:
+                    # find the most similar call_args by score
+                    score_current = self._get_args_score(call_args)
+                    delta_best = 1e99
+                    similar_call_args: str = None
+                    for _call_args in self._cfg[run_type]:
+                        score = self._get_args_score(_call_args)
+                        delta = abs(score - score_current)
+                        if delta < delta_best:
+                            delta_best = delta
+                            similar_call_args = _call_args
+                    if similar_call_args is not None:
+                        call_args = similar_call_args
+                    else:
+                        # find the most similar call_args by string similarity
+                        similar_args = difflib.get_close_matches(call_args, self._cfg[run_type].keys())
+                        if len(similar_args) > 0:
+                            call_args = similar_args[0]
+
+                if call_args in self._cfg[run_type]:
+                    run_info = self._cfg[run_type][call_args]
+                    runtime_sum = run_info[0]
+                    runtime_count = run_info[2]
+                    speed = runtime_count / runtime_sum
+                    speed_and_type.append((speed, run_type))
+                    self._print(f"{run_type} run time: {speed:.2f} runs/s")
 
         if len(speed_and_type) == 0:
             return fastest
@@ -0,0 +1,316 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.ndimage import maximum_filter, shift
+
+from ..core.transform.sr_temporal_correlations import TemporalReduction
+
+DEFAULT_MEMORY_BUDGET = 2 * 1024**3  # 2 GB
+
+
+def get_tiles(rows: int, cols: int, tile_rows: int, tile_cols: int, halo: int) -> list:
+    """
+    Splits a (rows, cols) frame into tiles with an overlapping halo
+    :param rows: number of rows of the frame
+    :param cols: number of columns of the frame
+    :param tile_rows: number of rows of each tile, without halo
+    :param tile_cols: number of columns of each tile, without halo
+    :param halo: number of pixels added to each side of a tile, clipped at the frame borders
+    :return: list of tuples (r0, r1, c0, c1, hr0, hr1, hc0, hc1), where r0:r1, c0:c1 is the region the tile
+        is responsible for and hr0:hr1, hc0:hc1 is the region read from the frame, including the halo
+
+    >>> get_tiles(10, 10, 5, 10, 2)
+    [(0, 5, 0, 10, 0, 7, 0, 10), (5, 10, 0, 10, 3, 10, 0, 10)]
+    """
+    tiles = []
+    for r0 in range(0, rows, tile_rows):
+        r1 = min(r0 + tile_rows, rows)
+        for c0 in range(0, cols, tile_cols):
+            c1 = min(c0 + tile_cols, cols)
+            tiles.append(
+                (r0, r1, c0, c1, max(0, r0 - halo), min(rows, r1 + halo), max(0, c0 - halo), min(cols, c1 + halo))
+            )
+    return tiles
+
+
+def get_tile_shape(
+    n_frames: int,
+    rows: int,
+    cols: int,
+    halo: int,
+    bytes_per_pixel: float,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    n_workers: int = 1,
+) -> tuple:
+    """
+    Calculates the largest square tile, and the number of frames processed per tile, so that n_workers tiles
+    processed concurrently fit within the memory budget
+    :param n_frames: number of frames
+    :param rows: number of rows of each frame
+    :param cols: number of columns of each frame
+    :param halo: number of pixels added to each side of a tile
+    :param bytes_per_pixel: memory needed, per input pixel of a single frame, to process a tile
+        (input, intermediates and output)
+    :param memory_budget: maximum number of bytes used by all the tiles in flight
+    :param n_workers: number of tiles processed concurrently
+    :return: (frames_per_tile, tile_rows, tile_cols)
+
+    >>> get_tile_shape(1, 1000, 1000, 2, 4, memory_budget=4 * 104**2)
+    (1, 100, 100)
+    """
+    budget_per_worker = memory_budget / max(1, n_workers)
+    frames = n_frames
+
+    while True:
+        side = int(np.sqrt(budget_per_worker / (bytes_per_pixel * frames))) - 2 * halo
+        # tiles smaller than the halo spend most of their time on the halo, so trade frames for area first
+        if (side >= 2 * halo and side > 0) or frames == 1:
+            break
+        frames = max(1, frames // 2)
+
+    if side < 1:
+        raise ValueError(f"Memory budget of {memory_budget} bytes is too small to process a tile with a halo of {halo}")
+
+    return frames, min(side, rows), min(side, cols)
+
+
+def run_tiled(
+    run_function,
+    image: np.ndarray,
+    magnification: int,
+    halo: int,
+    bytes_per_pixel: float,
+    out=None,
+    tile_shape: tuple = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    n_workers: int = None,
+) -> np.ndarray:
+    """
+    Runs a magnifying function over overlapping tiles and stitches the results
+    :param run_function: function called as run_function(tile, f0, f1) with a 3D float32 tile holding frames
+        f0:f1 of the image, including the halo, and returning the tile magnified by magnification
+    :param image: 3D float32 array with shape (nFrames, rows, cols)
+    :param magnification: integer magnification applied by run_function
+    :param halo: number of input pixels added to each side of a tile so that the output is seamless,
+        it should cover the support of the kernels used by run_function
+    :param bytes_per_pixel: memory needed, per input pixel of a single frame, to process a tile
+    :param out: destination with shape (nFrames, rows * magnification, cols * magnification) supporting slice
+        assignment (e.g. np.ndarray, np.memmap or a chunked zarr array); a str is used as the path of a .npy
+        file opened as a memory-map; if None, a new array is allocated
+    :param tile_shape: (tile_rows, tile_cols) without halo; if None, calculated from the memory budget
+    :param memory_budget: maximum number of bytes used by all the tiles in flight
+    :param n_workers: number of tiles processed concurrently, defaults to the number of cores
+    :return: the destination array
+    """
+    n_frames, rows, cols = image.shape
+    rowsM = rows * magnification
+    colsM = cols * magnification
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    if tile_shape is None:
+        frames_per_tile, tile_rows, tile_cols = get_tile_shape(
+            n_frames, rows, cols, halo, bytes_per_pixel, memory_budget, n_workers
+        )
+    else:
+        frames_per_tile = n_frames
+        tile_rows, tile_cols = tile_shape
+
+    if out is None:
+        out = np.zeros((n_frames, rowsM, colsM), dtype=np.float32)
+    elif type(out) is str:
+        out = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=(n_frames, rowsM, colsM))
+
+    if tuple(out.shape) != (n_frames, rowsM, colsM):
+        raise ValueError(f"Destination shape {tuple(out.shape)} does not match {(n_frames, rowsM, colsM)}")
+
+    # chunked destinations are not necessarily safe for concurrent writes
+    write_lock = threading.Lock()
+
+    def _process(f0, f1, r0, r1, c0, c1, hr0, hr1, hc0, hc1):
+        tile = np.ascontiguousarray(image[f0:f1, hr0:hr1, hc0:hc1])
+        tile_out = np.asarray(run_function(tile, f0, f1))
+        tr0 = (r0 - hr0) * magnification
+        tc0 = (c0 - hc0) * magnification
+        with write_lock:
+            out[f0:f1, r0 * magnification : r1 * magnification, c0 * magnification : c1 * magnification] = tile_out[
+                :, tr0 : tr0 + (r1 - r0) * magnification, tc0 : tc0 + (c1 - c0) * magnification
+            ]
+
+    tiles = get_tiles(rows, cols, tile_rows, tile_cols, halo)
+    jobs = [
+        (f0, min(f0 + frames_per_tile, n_frames)) + tile
+        for f0 in range(0, n_frames, frames_per_tile)
+        for tile in tiles
+    ]
+
+    if n_workers == 1:
+        for job in jobs:
+            _process(*job)
+    else:
+        # bounded number of tiles in flight, so that the memory budget is respected
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for i in range(0, len(jobs), n_workers):
+                for future in [executor.submit(_process, *job) for job in jobs[i : i + n_workers]]:
+                    future.result()
+
+    if hasattr(out, "flush"):
+        out.flush()
+
+    return out
+
+
+def run_reduced(
+    run_function,
+    image: np.ndarray,
+    reduction="mean",
+    frames_per_timepoint: int = 0,
+    frames_per_chunk: int = None,
+    bytes_per_frame: float = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+) -> np.ndarray:
+    """
+    Runs a function over chunks of frames and reduces its output along time as each chunk is produced, so that
+    the per-frame output stack is never materialized
+    :param run_function: function called as run_function(chunk, f0, f1) with a 3D float32 array holding the frames
+        f0 to f1 - 1 of the image, and returning one output frame per input frame
+    :param image: 3D float32 array with shape (nFrames, rows, cols)
+    :param reduction: temporal reduction applied to the output of each timepoint, see
+        nanopyx.core.transform.sr_temporal_correlations.TemporalReduction
+    :param frames_per_timepoint: number of frames reduced into each output frame, 0 uses all the frames;
+        trailing frames that do not fill a timepoint are ignored
+    :param frames_per_chunk: number of frames passed to run_function at once; if None, calculated from
+        bytes_per_frame and the memory budget
+    :param bytes_per_frame: memory needed by run_function and the reduction per input frame
+    :param memory_budget: maximum number of bytes used by a chunk
+    :return: float32 array with shape (nTimepoints, output rows, output cols)
+    """
+    n_frames = image.shape[0]
+    if frames_per_timepoint <= 0 or frames_per_timepoint > n_frames:
+        frames_per_timepoint = n_frames
+    n_timepoints = n_frames // frames_per_timepoint
+
+    if frames_per_chunk is None:
+        frames_per_chunk = n_frames if bytes_per_frame is None else int(memory_budget // bytes_per_frame)
+    frames_per_chunk = max(1, min(frames_per_chunk, frames_per_timepoint))
+
+    out = None
+    for t in range(n_timepoints):
+        accumulator = TemporalReduction(reduction)
+        for f0 in range(t * frames_per_timepoint, (t + 1) * frames_per_timepoint, frames_per_chunk):
+            f1 = min(f0 + frames_per_chunk, (t + 1) * frames_per_timepoint)
+            accumulator.add(np.asarray(run_function(np.ascontiguousarray(image[f0:f1]), f0, f1)))
+        result = accumulator.get_result()
+        if out is None:
+            out = np.empty((n_timepoints,) + result.shape, dtype=np.float32)
+        out[t] = result
+
+    return out
+
+
+def get_activity_mask(image: np.ndarray, threshold: float, dilation: int = 0) -> np.ndarray:
+    """
+    Calculates a low resolution activity mask of the pixels above an intensity threshold, grown so that the
+    neighbourhood of the active pixels is also evaluated by the magnifying kernels
+    :param image: 3D float32 array with shape (nFrames, rows, cols)
+    :param threshold: intensity threshold
+    :param dilation: number of pixels the active region of each frame is grown by, in each direction
+    :return: boolean array with the same shape as image
+
+    >>> get_activity_mask(np.array([[[0, 0, 0, 5, 0, 0]]], dtype=np.float32), 1, dilation=1).astype(int)
+    array([[[0, 0, 1, 1, 1, 0]]])
+    """
+    mask = np.asarray(image) > threshold
+    if dilation > 0:
+        mask = maximum_filter(mask, size=(1, 2 * dilation + 1, 2 * dilation + 1))
+    return mask
+
+
+def get_active_runs(shape: tuple, mask=None) -> np.ndarray:
+    """
+    Compacts an activity mask into a work list of horizontal runs of active pixels, so that the magnifying kernels
+    only visit the active pixels
+    :param shape: (nFrames, rows, cols) of the image
+    :param mask: boolean array with shape (rows, cols), applied to every frame, or (nFrames, rows, cols);
+        if None, every pixel is active and each row of each frame is a run
+    :return: int32 array with shape (n_runs, 4) holding the frame, row, first column and last column + 1 of each
+        run, ordered by frame and row
+
+    >>> get_active_runs((1, 2, 6), np.array([[0, 1, 1, 0, 1, 0], [0, 0, 0, 0, 0, 0]], dtype=bool))
+    array([[0, 0, 1, 3],
+           [0, 0, 4, 5]], dtype=int32)
+    """
+    n_frames, rows, cols = shape
+    if mask is None:
+        runs = np.zeros((n_frames * rows, 4), dtype=np.int32)
+        runs[:, 0] = np.repeat(np.arange(n_frames), rows)
+        runs[:, 1] = np.tile(np.arange(rows), n_frames)
+        runs[:, 3] = cols
+        return runs
+
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim == 2:
+        mask = mask[np.newaxis]
+    if mask.shape[1:] != (rows, cols) or mask.shape[0] not in (1, n_frames):
+        raise ValueError(f"Mask shape {mask.shape} does not match the image shape {tuple(shape)}")
+    mask = np.broadcast_to(mask, (n_frames, rows, cols))
+
+    padded = np.zeros((n_frames, rows, cols + 2), dtype=np.int8)
+    padded[:, :, 1:-1] = mask
+    edges = np.diff(padded, axis=2)
+    f, r, c0 = np.nonzero(edges == 1)
+    c1 = np.nonzero(edges == -1)[2]
+    return np.ascontiguousarray(np.stack((f, r, c0, c1), axis=1), dtype=np.int32)
+
+
+def get_active_pixels(runs: np.ndarray) -> np.ndarray:
+    """
+    Expands a work list of runs, as returned by get_active_runs, into the list of its pixels
+    :param runs: int32 array with shape (n_runs, 4)
+    :return: int32 array with shape (n_pixels, 3) holding the frame, row and column of each active pixel
+
+    >>> get_active_pixels(np.array([[0, 0, 1, 3], [1, 2, 4, 5]], dtype=np.int32))
+    array([[0, 0, 1],
+           [0, 0, 2],
+           [1, 2, 4]], dtype=int32)
+    """
+    lengths = runs[:, 3] - runs[:, 2]
+    pixels = np.empty((lengths.sum(), 3), dtype=np.int32)
+    pixels[:, 0] = np.repeat(runs[:, 0], lengths)
+    pixels[:, 1] = np.repeat(runs[:, 1], lengths)
+    # position within each run, added to the first column of the run
+    starts = np.cumsum(lengths) - lengths
+    pixels[:, 2] = np.arange(pixels.shape[0]) - np.repeat(starts - runs[:, 2], lengths)
+    return pixels
+
+
+def get_work_list(image: np.ndarray, mask=None, dilation: int = 0, shift_row=None, shift_col=None):
+    """
+    Builds the work list of the magnifying kernels from the mask argument of their run methods
+    :param image: 3D float32 array with shape (nFrames, rows, cols)
+    :param mask: None to process every pixel, a number used as an intensity threshold (see get_activity_mask) or a
+        boolean region of interest with shape (rows, cols), (nFrames, rows, cols) or the batch shape of the image
+        (see __interpolation_tools__.check_batch), in drift corrected coordinates
+    :param dilation: number of pixels the thresholded activity mask is grown by
+    :param shift_row: per frame drift correction applied by the kernels, see __interpolation_tools__.get_drift_shifts
+    :param shift_col: per frame drift correction applied by the kernels
+    :return: the runs of active pixels (see get_active_runs), or None if every pixel is processed
+    """
+    if mask is None:
+        return None
+    if np.isscalar(mask):
+        if shift_row is None or not (np.any(shift_row) or np.any(shift_col)):
+            mask = get_activity_mask(image, mask, dilation)
+        else:
+            # the activity is found in the drifting frames, move it to the drift corrected positions, with an
+            # extra pixel of dilation for the subpixel part of the shifts
+            mask = get_activity_mask(image, mask, dilation + 1)
+            for f in range(mask.shape[0]):
+                mask[f] = shift(mask[f].astype(np.uint8), (shift_row[f], shift_col[f]), order=0) > 0
+    elif np.ndim(mask) > 3:
+        mask = np.reshape(mask, (-1,) + np.shape(mask)[-2:])
+    return get_active_runs(image.shape, mask)
+
@@ -0,0 +1,502 @@
+# cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=False
+
+import numpy as np
+
+cimport numpy as np
+
+from cython.parallel import prange
+
+from .__liquid_engine__ import LiquidEngine
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+
+# binning modes, must match the defines in _le_binning_.cl
+_MODES = {"sum": 0, "mean": 1, "max": 2}
+_EDGES = ("crop", "pad")
+
+cdef int BINNING_SUM = 0
+cdef int BINNING_MEAN = 1
+cdef int BINNING_MAX = 2
+
+ctypedef fused bin_t:
+    unsigned short
+    int
+    long long
+    float
+
+
+def _check_binning_image(image) -> np.ndarray:
+    """
+    Checks the image dimensions and converts it to one of the types the binning kernels work with, without
+    converting integers (e.g. camera data) to float
+    :param image: 2D or 3D array
+    :return: 3D array of type np.uint16, np.int32, np.int64 or np.float32
+    """
+    image = np.asarray(image)
+    if image.ndim != 2 and image.ndim != 3:
+        raise ValueError("Image must be 2D and 3D (sequence of 2D images)")
+    if image.dtype in (np.uint8, np.uint16):
+        image = image.astype(np.uint16, copy=False)
+    elif image.dtype in (np.int8, np.int16, np.int32):
+        image = image.astype(np.int32, copy=False)
+    elif image.dtype in (np.uint32, np.int64, np.uint64):
+        if image.dtype == np.uint64 and image.size > 0 and image.max() > np.iinfo(np.int64).max:
+            raise ValueError("uint64 images with values above the int64 range cannot be binned")
+        image = image.astype(np.int64, copy=False)
+    else:
+        image = image.astype(np.float32, copy=False)
+    if image.ndim == 2:
+        image = image.reshape((1, image.shape[0], image.shape[1]))
+    return np.ascontiguousarray(image)
+
+
+def _get_binned_shape(image_shape, int bin_factor, str edge) -> tuple:
+    """
+    Calculates the shape of the binned image
+    :param image_shape: (nFrames, rows, cols)
+    :param bin_factor: number of pixels binned along each dimension
+    :param edge: "crop" drops the rows and columns that do not fill a bin, "pad" keeps them in partial bins
+    :return: (nFrames, rowsB, colsB)
+    """
+    nFrames, rows, cols = image_shape
+    if edge == "pad":
+        return nFrames, -(-rows // bin_factor), -(-cols // bin_factor)
+    return nFrames, rows // bin_factor, cols // bin_factor
+
+
+def _get_output_shapes(shape, int mode, bint is_float) -> tuple:
+    """
+    Calculates the shapes of the integer and float outputs of the binning kernels, the unused one is a placeholder
+    """
+    if is_float or mode == BINNING_MEAN:
+        return (1, 1, 1), tuple(shape)
+    return tuple(shape), (1, 1, 1)
+
+
+def _get_binned_output(image_out_int, image_out_float, int mode, dtype) -> np.ndarray:
+    """
+    Selects the output of the binning kernels: sums are int64 for integer images (so they cannot overflow),
+    means are always float32 and maxima keep the input type
+    """
+    if mode == BINNING_MEAN or dtype == np.float32:
+        return image_out_float
+    if mode == BINNING_MAX:
+        return image_out_int.astype(dtype)
+    return image_out_int
+
+
+class Binning(LiquidEngine):
+    """
+    Pixel binning using the NanoPyx Liquid Engine
+    """
+
+    _has_opencl = True
+    _has_threaded = True
+    _has_threaded_static = True
+    _has_threaded_dynamic = True
+    _has_threaded_guided = True
+    _has_unthreaded = True
+    _has_python = False
+    _has_njit = False
+
+    def __init__(self):
+        super().__init__()
+
+    def run(self, image, int bin_factor, str mode = "sum", str edge = "crop", run_type=None) -> np.ndarray:
+        """
+        Bins the last two dimensions of an image by summing, averaging or taking the maximum of each
+        bin_factor x bin_factor block of pixels. Integer images are accumulated as integers, so uint16 camera
+        data is neither promoted to float nor overflows
+        :param image: The image to bin
+        :type image: np.ndarray or memoryview, 2D or 3D
+        :param bin_factor: Number of pixels binned along each dimension
+        :param mode: "sum", "mean" or "max"
+        :param edge: "crop" drops the rows and columns that do not fill a bin, "pad" keeps them in partial bins
+        :return: The binned image; sums of integer images are int64, means are float32 and maxima are uint16 for
+            unsigned 8 and 16 bit images, int32 for signed 8 to 32 bit images, int64 for uint32, int64 and uint64
+            images and float32 otherwise
+        """
+        image = _check_binning_image(image)
+        if bin_factor < 1:
+            raise ValueError("Binning factor must be greater than 0")
+        if mode not in _MODES:
+            raise ValueError(f"Mode must be one of {list(_MODES)}")
+        if edge not in _EDGES:
+            raise ValueError(f"Edge must be one of {list(_EDGES)}")
+        if min(_get_binned_shape(image.shape, bin_factor, edge)[1:]) < 1:
+            raise ValueError("Binning factor must not be larger than the image")
+        return self._run(image, bin_factor, _MODES[mode], edge == "pad", run_type=run_type)
+
+    def benchmark(self, image, int bin_factor, str mode = "sum", str edge = "crop"):
+        """
+        Benchmark the Binning run function in multiple run types
+        :param image: The image to bin
+        :type image: np.ndarray or memoryview, 2D or 3D
+        :param bin_factor: Number of pixels binned along each dimension
+        :param mode: "sum", "mean" or "max"
+        :param edge: "crop" or "pad"
+        :return: The benchmark results
+        :rtype: [[run_time, run_type_name, return_value], ...]
+        """
+        image = _check_binning_image(image)
+        return super().benchmark(image, bin_factor, _MODES[mode], edge == "pad")
+
+    def run_chunked(self, image, int bin_factor, str mode = "sum", str edge = "crop", int frames_per_chunk = 64, out=None, run_type=None) -> np.ndarray:
+        """
+        Bins a large stack a few frames at a time, so that only one chunk is ever converted and held in memory
+        :param image: 3D array-like supporting slicing along the first axis (e.g. np.memmap, zarr or tifffile arrays)
+        :param bin_factor: Number of pixels binned along each dimension
+        :param mode: "sum", "mean" or "max"
+        :param edge: "crop" or "pad"
+        :param frames_per_chunk: Number of frames binned per call
+        :param out: Destination array, if None a new array is allocated
+        :param run_type: The run type used for each chunk, if None the fastest is chosen per chunk
+        :return: The binned stack
+        """
+        n_frames = image.shape[0]
+        for f0 in range(0, n_frames, frames_per_chunk):
+            binned = self.run(image[f0 : f0 + frames_per_chunk], bin_factor, mode, edge, run_type=run_type)
+            if out is None:
+                out = np.empty((n_frames,) + binned.shape[1:], dtype=binned.dtype)
+            out[f0 : f0 + binned.shape[0]] = binned
+        return out
+
+    def stream(self, chunks, int bin_factor, str mode = "sum", str edge = "crop", run_type=None):
+        """
+        Bins chunks of frames as they are produced, e.g. by a file reader or acquisition
+        :param chunks: Iterable of 2D or 3D arrays
+        :param bin_factor: Number of pixels binned along each dimension
+        :param mode: "sum", "mean" or "max"
+        :param edge: "crop" or "pad"
+        :param run_type: The run type used for each chunk, if None the fastest is chosen per chunk
+        :return: Generator of binned 3D chunks
+        """
+        for chunk in chunks:
+            yield self.run(chunk, bin_factor, mode, edge, run_type=run_type)
+
+    def _run_opencl(self, image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        code = self._get_cl_code("_le_binning_.cl")
+
+        shape = _get_binned_shape(image.shape, bin_factor, "pad" if pad else "crop")
+        shape_int, shape_float = _get_output_shapes(shape, mode, image.dtype == np.float32)
+
+        image_in = cl_array.to_device(cl_queue, image)
+        image_out_int = cl_array.zeros(cl_queue, shape_int, dtype=np.int64)
+        image_out_float = cl_array.zeros(cl_queue, shape_float, dtype=np.float32)
+
+        # Create the program
+        prg = cl.Program(cl_ctx, code).build()
+        kernel = {np.uint16: prg.binning_ushort, np.int32: prg.binning_int, np.int64: prg.binning_long, np.float32: prg.binning_float}[image.dtype.type]
+
+        # Run the kernel
+        kernel(
+            cl_queue,
+            shape,
+            None,
+            image_in.data,
+            image_out_int.data,
+            image_out_float.data,
+            np.int32(image.shape[1]),
+            np.int32(image.shape[2]),
+            np.int32(bin_factor),
+            np.int32(mode),
+        )
+
+        # Wait for queue to finish
+        cl_queue.finish()
+
+        return _get_binned_output(image_out_int.get(), image_out_float.get(), mode, image.dtype)
+
+    # tag-start: _le_binning.Binning._run_unthreaded
+    def _run_unthreaded(self, bin_t[:,:,:] image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsB, colsB
+        nFrames, rowsB, colsB = _get_binned_shape((nFrames, rows, cols), bin_factor, "pad" if pad else "crop")
+
+        # integer images are accumulated in 64 bit integers, float images in double precision
+        shape_int, shape_float = _get_output_shapes((nFrames, rowsB, colsB), mode, bin_t is float)
+        image_out_int = np.zeros(shape_int, dtype=np.int64)
+        image_out_float = np.zeros(shape_float, dtype=np.float32)
+        cdef long long[:,:,:] _image_out_int = image_out_int
+        cdef float[:,:,:] _image_out_float = image_out_float
+
+        cdef int i, f, rB, cB, r, c, r0, r1, c0, c1
+        cdef long long acc_int
+        cdef double acc_float
+
+        with nogil:
+            for i in range(nFrames * rowsB):
+                f = i // rowsB
+                rB = i % rowsB
+                r0 = rB * bin_factor
+                r1 = min(r0 + bin_factor, rows)
+                for cB in range(colsB):
+                    c0 = cB * bin_factor
+                    c1 = min(c0 + bin_factor, cols)
+                    if bin_t is float:
+                        acc_float = 0
+                        if mode == BINNING_MAX:
+                            acc_float = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_float = max(acc_float, image[f, r, c])
+                                else:
+                                    acc_float = acc_float + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            acc_float = acc_float / ((r1 - r0) * (c1 - c0))
+                        _image_out_float[f, rB, cB] = <float>acc_float
+                    else:
+                        acc_int = 0
+                        if mode == BINNING_MAX:
+                            acc_int = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_int = max(acc_int, <long long>image[f, r, c])
+                                else:
+                                    acc_int = acc_int + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            _image_out_float[f, rB, cB] = <float>(<double>acc_int / ((r1 - r0) * (c1 - c0)))
+                        else:
+                            _image_out_int[f, rB, cB] = acc_int
+
+        return _get_binned_output(image_out_int, image_out_float, mode, np.asarray(image).dtype)
+    # tag-end
+
+    # tag-copy: _le_binning.Binning._run_unthreaded; replace('_run_unthreaded', '_run_threaded'); replace('range(nFrames * rowsB)', 'prange(nFrames * rowsB)')
+    def _run_threaded(self, bin_t[:,:,:] image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsB, colsB
+        nFrames, rowsB, colsB = _get_binned_shape((nFrames, rows, cols), bin_factor, "pad" if pad else "crop")
+
+        # integer images are accumulated in 64 bit integers, float images in double precision
+        shape_int, shape_float = _get_output_shapes((nFrames, rowsB, colsB), mode, bin_t is float)
+        image_out_int = np.zeros(shape_int, dtype=np.int64)
+        image_out_float = np.zeros(shape_float, dtype=np.float32)
+        cdef long long[:,:,:] _image_out_int = image_out_int
+        cdef float[:,:,:] _image_out_float = image_out_float
+
+        cdef int i, f, rB, cB, r, c, r0, r1, c0, c1
+        cdef long long acc_int
+        cdef double acc_float
+
+        with nogil:
+            for i in prange(nFrames * rowsB):
+                f = i // rowsB
+                rB = i % rowsB
+                r0 = rB * bin_factor
+                r1 = min(r0 + bin_factor, rows)
+                for cB in range(colsB):
+                    c0 = cB * bin_factor
+                    c1 = min(c0 + bin_factor, cols)
+                    if bin_t is float:
+                        acc_float = 0
+                        if mode == BINNING_MAX:
+                            acc_float = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_float = max(acc_float, image[f, r, c])
+                                else:
+                                    acc_float = acc_float + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            acc_float = acc_float / ((r1 - r0) * (c1 - c0))
+                        _image_out_float[f, rB, cB] = <float>acc_float
+                    else:
+                        acc_int = 0
+                        if mode == BINNING_MAX:
+                            acc_int = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_int = max(acc_int, <long long>image[f, r, c])
+                                else:
+                                    acc_int = acc_int + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            _image_out_float[f, rB, cB] = <float>(<double>acc_int / ((r1 - r0) * (c1 - c0)))
+                        else:
+                            _image_out_int[f, rB, cB] = acc_int
+
+        return _get_binned_output(image_out_int, image_out_float, mode, np.asarray(image).dtype)
+    # tag-end
+
+    # tag-copy: _le_binning.Binning._run_unthreaded; replace('_run_unthreaded', '_run_threaded_static'); replace('range(nFrames * rowsB)', 'prange(nFrames * rowsB, schedule="static")')
+    def _run_threaded_static(self, bin_t[:,:,:] image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsB, colsB
+        nFrames, rowsB, colsB = _get_binned_shape((nFrames, rows, cols), bin_factor, "pad" if pad else "crop")
+
+        # integer images are accumulated in 64 bit integers, float images in double precision
+        shape_int, shape_float = _get_output_shapes((nFrames, rowsB, colsB), mode, bin_t is float)
+        image_out_int = np.zeros(shape_int, dtype=np.int64)
+        image_out_float = np.zeros(shape_float, dtype=np.float32)
+        cdef long long[:,:,:] _image_out_int = image_out_int
+        cdef float[:,:,:] _image_out_float = image_out_float
+
+        cdef int i, f, rB, cB, r, c, r0, r1, c0, c1
+        cdef long long acc_int
+        cdef double acc_float
+
+        with nogil:
+            for i in prange(nFrames * rowsB, schedule="static"):
+                f = i // rowsB
+                rB = i % rowsB
+                r0 = rB * bin_factor
+                r1 = min(r0 + bin_factor, rows)
+                for cB in range(colsB):
+                    c0 = cB * bin_factor
+                    c1 = min(c0 + bin_factor, cols)
+                    if bin_t is float:
+                        acc_float = 0
+                        if mode == BINNING_MAX:
+                            acc_float = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_float = max(acc_float, image[f, r, c])
+                                else:
+                                    acc_float = acc_float + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            acc_float = acc_float / ((r1 - r0) * (c1 - c0))
+                        _image_out_float[f, rB, cB] = <float>acc_float
+                    else:
+                        acc_int = 0
+                        if mode == BINNING_MAX:
+                            acc_int = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_int = max(acc_int, <long long>image[f, r, c])
+                                else:
+                                    acc_int = acc_int + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            _image_out_float[f, rB, cB] = <float>(<double>acc_int / ((r1 - r0) * (c1 - c0)))
+                        else:
+                            _image_out_int[f, rB, cB] = acc_int
+
+        return _get_binned_output(image_out_int, image_out_float, mode, np.asarray(image).dtype)
+    # tag-end
+
+    # tag-copy: _le_binning.Binning._run_unthreaded; replace('_run_unthreaded', '_run_threaded_dynamic'); replace('range(nFrames * rowsB)', 'prange(nFrames * rowsB, schedule="dynamic")')
+    def _run_threaded_dynamic(self, bin_t[:,:,:] image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsB, colsB
+        nFrames, rowsB, colsB = _get_binned_shape((nFrames, rows, cols), bin_factor, "pad" if pad else "crop")
+
+        # integer images are accumulated in 64 bit integers, float images in double precision
+        shape_int, shape_float = _get_output_shapes((nFrames, rowsB, colsB), mode, bin_t is float)
+        image_out_int = np.zeros(shape_int, dtype=np.int64)
+        image_out_float = np.zeros(shape_float, dtype=np.float32)
+        cdef long long[:,:,:] _image_out_int = image_out_int
+        cdef float[:,:,:] _image_out_float = image_out_float
+
+        cdef int i, f, rB, cB, r, c, r0, r1, c0, c1
+        cdef long long acc_int
+        cdef double acc_float
+
+        with nogil:
+            for i in prange(nFrames * rowsB, schedule="dynamic"):
+                f = i // rowsB
+                rB = i % rowsB
+                r0 = rB * bin_factor
+                r1 = min(r0 + bin_factor, rows)
+                for cB in range(colsB):
+                    c0 = cB * bin_factor
+                    c1 = min(c0 + bin_factor, cols)
+                    if bin_t is float:
+                        acc_float = 0
+                        if mode == BINNING_MAX:
+                            acc_float = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_float = max(acc_float, image[f, r, c])
+                                else:
+                                    acc_float = acc_float + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            acc_float = acc_float / ((r1 - r0) * (c1 - c0))
+                        _image_out_float[f, rB, cB] = <float>acc_float
+                    else:
+                        acc_int = 0
+                        if mode == BINNING_MAX:
+                            acc_int = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_int = max(acc_int, <long long>image[f, r, c])
+                                else:
+                                    acc_int = acc_int + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            _image_out_float[f, rB, cB] = <float>(<double>acc_int / ((r1 - r0) * (c1 - c0)))
+                        else:
+                            _image_out_int[f, rB, cB] = acc_int
+
+        return _get_binned_output(image_out_int, image_out_float, mode, np.asarray(image).dtype)
+    # tag-end
+
+    # tag-copy: _le_binning.Binning._run_unthreaded; replace('_run_unthreaded', '_run_threaded_guided'); replace('range(nFrames * rowsB)', 'prange(nFrames * rowsB, schedule="guided")')
+    def _run_threaded_guided(self, bin_t[:,:,:] image, int bin_factor, int mode, bint pad) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsB, colsB
+        nFrames, rowsB, colsB = _get_binned_shape((nFrames, rows, cols), bin_factor, "pad" if pad else "crop")
+
+        # integer images are accumulated in 64 bit integers, float images in double precision
+        shape_int, shape_float = _get_output_shapes((nFrames, rowsB, colsB), mode, bin_t is float)
+        image_out_int = np.zeros(shape_int, dtype=np.int64)
+        image_out_float = np.zeros(shape_float, dtype=np.float32)
+        cdef long long[:,:,:] _image_out_int = image_out_int
+        cdef float[:,:,:] _image_out_float = image_out_float
+
+        cdef int i, f, rB, cB, r, c, r0, r1, c0, c1
+        cdef long long acc_int
+        cdef double acc_float
+
+        with nogil:
+            for i in prange(nFrames * rowsB, schedule="guided"):
+                f = i // rowsB
+                rB = i % rowsB
+                r0 = rB * bin_factor
+                r1 = min(r0 + bin_factor, rows)
+                for cB in range(colsB):
+                    c0 = cB * bin_factor
+                    c1 = min(c0 + bin_factor, cols)
+                    if bin_t is float:
+                        acc_float = 0
+                        if mode == BINNING_MAX:
+                            acc_float = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_float = max(acc_float, image[f, r, c])
+                                else:
+                                    acc_float = acc_float + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            acc_float = acc_float / ((r1 - r0) * (c1 - c0))
+                        _image_out_float[f, rB, cB] = <float>acc_float
+                    else:
+                        acc_int = 0
+                        if mode == BINNING_MAX:
+                            acc_int = image[f, r0, c0]
+                        for r in range(r0, r1):
+                            for c in range(c0, c1):
+                                if mode == BINNING_MAX:
+                                    acc_int = max(acc_int, <long long>image[f, r, c])
+                                else:
+                                    acc_int = acc_int + image[f, r, c]
+                        if mode == BINNING_MEAN:
+                            _image_out_float[f, rB, cB] = <float>(<double>acc_int / ((r1 - r0) * (c1 - c0)))
+                        else:
+                            _image_out_int[f, rB, cB] = acc_int
+
+        return _get_binned_output(image_out_int, image_out_float, mode, np.asarray(image).dtype)
+    # tag-end
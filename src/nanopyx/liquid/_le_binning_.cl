@@ -0,0 +1,176 @@
+// binning modes, must match _MODES in _le_binning.pyx
+#define BINNING_SUM 0
+#define BINNING_MEAN 1
+#define BINNING_MAX 2
+
+// tag-start: _le_binning_.binning_ushort
+__kernel void binning_ushort(__global ushort *image_in,
+                             __global long *image_out_int,
+                             __global float *image_out_float, int rows,
+                             int cols, int bin_factor, int mode) {
+
+  int f = get_global_id(0);
+  int rB = get_global_id(1);
+  int cB = get_global_id(2);
+
+  int rowsB = get_global_size(1);
+  int colsB = get_global_size(2);
+
+  int r0 = rB * bin_factor;
+  int r1 = min(r0 + bin_factor, rows);
+  int c0 = cB * bin_factor;
+  int c1 = min(c0 + bin_factor, cols);
+
+  __global ushort *frame = &image_in[(long)f * rows * cols];
+  long acc = 0;
+  if (mode == BINNING_MAX) {
+    acc = frame[r0 * cols + c0];
+  }
+
+  for (int r = r0; r < r1; r++) {
+    for (int c = c0; c < c1; c++) {
+      if (mode == BINNING_MAX) {
+        acc = max(acc, (long)frame[r * cols + c]);
+      } else {
+        acc = acc + frame[r * cols + c];
+      }
+    }
+  }
+
+  long idx = (long)f * rowsB * colsB + rB * colsB + cB;
+  if (mode == BINNING_MEAN) {
+    image_out_float[idx] = (float)acc / ((r1 - r0) * (c1 - c0));
+  } else {
+    image_out_int[idx] = acc;
+  }
+}
+// tag-end
+
+// tag-copy: _le_binning_.binning_ushort; replace("ushort", "int")
+__kernel void binning_int(__global int *image_in,
+                             __global long *image_out_int,
+                             __global float *image_out_float, int rows,
+                             int cols, int bin_factor, int mode) {
+
+  int f = get_global_id(0);
+  int rB = get_global_id(1);
+  int cB = get_global_id(2);
+
+  int rowsB = get_global_size(1);
+  int colsB = get_global_size(2);
+
+  int r0 = rB * bin_factor;
+  int r1 = min(r0 + bin_factor, rows);
+  int c0 = cB * bin_factor;
+  int c1 = min(c0 + bin_factor, cols);
+
+  __global int *frame = &image_in[(long)f * rows * cols];
+  long acc = 0;
+  if (mode == BINNING_MAX) {
+    acc = frame[r0 * cols + c0];
+  }
+
+  for (int r = r0; r < r1; r++) {
+    for (int c = c0; c < c1; c++) {
+      if (mode == BINNING_MAX) {
+        acc = max(acc, (long)frame[r * cols + c]);
+      } else {
+        acc = acc + frame[r * cols + c];
+      }
+    }
+  }
+
+  long idx = (long)f * rowsB * colsB + rB * colsB + cB;
+  if (mode == BINNING_MEAN) {
+    image_out_float[idx] = (float)acc / ((r1 - r0) * (c1 - c0));
+  } else {
+    image_out_int[idx] = acc;
+  }
+}
+// tag-end
+
+// tag-copy: _le_binning_.binning_ushort; replace("ushort", "long")
+__kernel void binning_long(__global long *image_in,
+                             __global long *image_out_int,
+                             __global float *image_out_float, int rows,
+                             int cols, int bin_factor, int mode) {
+
+  int f = get_global_id(0);
+  int rB = get_global_id(1);
+  int cB = get_global_id(2);
+
+  int rowsB = get_global_size(1);
+  int colsB = get_global_size(2);
+
+  int r0 = rB * bin_factor;
+  int r1 = min(r0 + bin_factor, rows);
+  int c0 = cB * bin_factor;
+  int c1 = min(c0 + bin_factor, cols);
+
+  __global long *frame = &image_in[(long)f * rows * cols];
+  long acc = 0;
+  if (mode == BINNING_MAX) {
+    acc = frame[r0 * cols + c0];
+  }
+
+  for (int r = r0; r < r1; r++) {
+    for (int c = c0; c < c1; c++) {
+      if (mode == BINNING_MAX) {
+        acc = max(acc, (long)frame[r * cols + c]);
+      } else {
+        acc = acc + frame[r * cols + c];
+      }
+    }
+  }
+
+  long idx = (long)f * rowsB * colsB + rB * colsB + cB;
+  if (mode == BINNING_MEAN) {
+    image_out_float[idx] = (float)acc / ((r1 - r0) * (c1 - c0));
+  } else {
+    image_out_int[idx] = acc;
+  }
+}
+// tag-end
+
+// tag-copy: _le_binning_.binning_ushort; replace("ushort", "float"); replace("long acc", "double acc"); replace("(long)frame", "(double)frame"); replace("image_out_int[idx] = acc", "image_out_float[idx] = acc")
+__kernel void binning_float(__global float *image_in,
+                             __global long *image_out_int,
+                             __global float *image_out_float, int rows,
+                             int cols, int bin_factor, int mode) {
+
+  int f = get_global_id(0);
+  int rB = get_global_id(1);
+  int cB = get_global_id(2);
+
+  int rowsB = get_global_size(1);
+  int colsB = get_global_size(2);
+
+  int r0 = rB * bin_factor;
+  int r1 = min(r0 + bin_factor, rows);
+  int c0 = cB * bin_factor;
+  int c1 = min(c0 + bin_factor, cols);
+
+  __global float *frame = &image_in[(long)f * rows * cols];
+  double acc = 0;
+  if (mode == BINNING_MAX) {
+    acc = frame[r0 * cols + c0];
+  }
+
+  for (int r = r0; r < r1; r++) {
+    for (int c = c0; c < c1; c++) {
+      if (mode == BINNING_MAX) {
+        acc = max(acc, (double)frame[r * cols + c]);
+      } else {
+        acc = acc + frame[r * cols + c];
+      }
+    }
+  }
+
+  long idx = (long)f * rowsB * colsB + rB * colsB + cB;
+  if (mode == BINNING_MEAN) {
+    image_out_float[idx] = (float)acc / ((r1 - r0) * (c1 - c0));
+  } else {
+    image_out_float[idx] = acc;
+  }
+}
+// tag-end
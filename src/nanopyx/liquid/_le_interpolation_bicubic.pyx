@@ -11,6 +11,7 @@ from libc.math cimport cos, sin
 from .__interpolation_tools__ import check_image, value2array
 from .__liquid_engine__ import LiquidEngine
 from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+from .__tiling__ import DEFAULT_MEMORY_BUDGET, run_tiled
 
 
 cdef extern from "_c_interpolation_bicubic.h":
@@ -31,6 +32,8 @@ class ShiftAndMagnify(LiquidEngine):
     _has_python = False
     _has_njit = False
 
+    _tile_halo = 2  # support of the interpolation kernel, in pixels
+
     def __init__(self):
         super().__init__()
 
@@ -79,6 +82,38 @@ class ShiftAndMagnify(LiquidEngine):
         return super().benchmark(image, shift_row, shift_col, magnification_row, magnification_col)
     # tag-end
 
+    # tag-copy: _le_interpolation_nearest_neighbor.ShiftAndMagnify.run_tiled
+    def run_tiled(self, image, shift_row, shift_col, int magnification, out=None, tile_shape=None, memory_budget=DEFAULT_MEMORY_BUDGET, n_workers=None, run_type="Unthreaded") -> np.ndarray:
+        """
+        Shift and magnify an image in overlapping tiles processed in parallel, for fields of view whose magnified
+        output does not fit in memory
+        :param image: The image to shift and magnify
+        :type image: np.ndarray or memoryview
+        :param shift_row: The number of rows to shift the image
+        :type shift_row: int or float or np.ndarray
+        :param shift_col: The number of columns to shift the image
+        :type shift_col: int or float or np.ndarray
+        :param magnification: The integer magnification factor for rows and columns
+        :type magnification: int
+        :param out: Destination array or path of a .npy file to memory-map, see __tiling__.run_tiled
+        :param tile_shape: (tile_rows, tile_cols) without halo, if None it is calculated from the memory budget
+        :param memory_budget: Maximum number of bytes used by the tiles in flight
+        :param n_workers: Number of tiles processed concurrently, defaults to the number of cores
+        :param run_type: The run type used for each tile
+        :return: The shifted and magnified image
+        """
+        image = check_image(image)
+        shift_row = np.asarray(value2array(shift_row, image.shape[0]), dtype=np.float32)
+        shift_col = np.asarray(value2array(shift_col, image.shape[0]), dtype=np.float32)
+        halo = self._tile_halo + int(np.ceil(max(np.abs(shift_row).max(), np.abs(shift_col).max())))
+        _run = self._run_types[run_type]
+
+        def _run_tile(tile, f0, f1):
+            return _run(tile, shift_row[f0:f1], shift_col[f0:f1], magnification, magnification)
+
+        return run_tiled(_run_tile, image, magnification, halo, 4 * (1 + magnification * magnification), out=out, tile_shape=tile_shape, memory_budget=memory_budget, n_workers=n_workers)
+    # tag-end
+
     # tag-copy: _le_interpolation_nearest_neighbor.ShiftAndMagnify._run_opencl; replace("nearest_neighbor", "bicubic")
     def _run_opencl(self, image, shift_row, shift_col, float magnification_row, float magnification_col) -> np.ndarray:
         # Swap row and columns because opencl is strange and stores the
@@ -8,23 +8,87 @@ from cython.parallel import parallel, prange
 
 from libc.math cimport sqrt, pow
 from .__liquid_engine__ import LiquidEngine
-from .__interpolation_tools__ import check_image
+from .__interpolation_tools__ import check_batch, check_image, get_drift_shifts, restore_batch
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+from .__tiling__ import DEFAULT_MEMORY_BUDGET, get_active_pixels, get_active_runs, get_work_list, run_reduced, run_tiled
 from nanopyx.liquid import CRShiftAndMagnify
 
 cdef extern from "_c_sr_radial_gradient_convergence.h":
     float _c_calculate_rgc(int xM, int yM, float* imIntGx, float* imIntGy, float* imInt, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity) nogil
+    float _c_calculate_rgc_interpolated(int xM, int yM, float* imGx, float* imGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity, float shift_row, float shift_col) nogil
+    int _c_rgc_table_width(float Gx_Gy_MAGNIFICATION, float fwhm) nogil
+    void _c_calculate_rgc_tables(int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, int* offsets, float* weights, int* counts) nogil
+    float _c_calculate_rgc_tabulated(int xM, int yM, float* imIntGx, float* imIntGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity, int* offsets, float* weights, int* counts, int table_width) nogil
+
+cdef extern from "_c_interpolation_catmull_rom.h":
+    float _c_interpolate(float *image, float row, float col, int rows, int cols) nogil
 
 cdef extern from "_c_gradients.h":
     void _c_gradient_roberts_cross(float* pixels, float* GxArray, float* GyArray, int w, int h) nogil
 
 # cdef float Gx_Gy_MAGNIFICATION = 2.0
 
+
+def _get_rgc_tables(int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS):
+    """
+    Computes the per subpixel phase neighbour offsets and distance weights used by _c_calculate_rgc_tabulated
+    :return: offsets with shape (magnification**2, table_width, 2), weights with shape (magnification**2, table_width, 3)
+        and counts with shape (magnification**2,)
+    """
+    cdef int table_width = _c_rgc_table_width(Gx_Gy_MAGNIFICATION, fwhm)
+    offsets = np.zeros((magnification * magnification, table_width, 2), dtype=np.int32)
+    weights = np.zeros((magnification * magnification, table_width, 3), dtype=np.float32)
+    counts = np.zeros(magnification * magnification, dtype=np.int32)
+
+    cdef int[:,:,::1] _offsets = offsets
+    cdef float[:,:,::1] _weights = weights
+    cdef int[::1] _counts = counts
+    _c_calculate_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, &_offsets[0,0,0], &_weights[0,0,0], &_counts[0])
+
+    return offsets, weights, counts
+
+
+def _calculate_rgc_sweep_radius(float[:,:,:] gradient_col_interp, float[:,:,:] gradient_row_interp, int magnification, float radius):
+    """
+    Calculates the radial gradient convergence, without sensitivity exponent or intensity weighting, from gradients
+    already magnified by magnification * 2, as used by RadialGradientConvergence.run_sweep
+    :return: float32 array with shape (nFrames, rows * magnification, cols * magnification)
+    """
+    cdef float sigma = radius / 2.355
+    cdef float tSS = 2 * sigma * sigma
+    cdef float tSO = 2 * sigma + 1
+    cdef float Gx_Gy_MAGNIFICATION = 2.0
+
+    cdef int nFrames = gradient_col_interp.shape[0]
+    cdef int rowsM = <int>(gradient_col_interp.shape[1] / Gx_Gy_MAGNIFICATION)
+    cdef int colsM = <int>(gradient_col_interp.shape[2] / Gx_Gy_MAGNIFICATION)
+
+    rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, radius, tSO, tSS)
+    cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+    cdef float[:,:,::1] _rgc_weights = rgc_weights
+    cdef int[::1] _rgc_counts = rgc_counts
+    cdef int table_width = rgc_offsets.shape[1]
+
+    rgc_map = np.empty((nFrames, rowsM, colsM), dtype=np.float32)
+    cdef float[:,:,:] _rgc_map = rgc_map
+
+    cdef int p, f, rM, cM
+    with nogil:
+        for p in prange(nFrames * rowsM):
+            f = p // rowsM
+            rM = p % rowsM
+            for cM in range(colsM):
+                _rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, magnification, Gx_Gy_MAGNIFICATION, 1, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
+
+    return rgc_map
+
+
 class RadialGradientConvergence(LiquidEngine):
     """
     Radial gradient convergence using the NanoPyx Liquid Engine
     """
 
-    _has_opencl = False
+    _has_opencl = True
     _has_threaded = True
     _has_threaded_static = True
     _has_threaded_dynamic = True
@@ -37,18 +101,326 @@ class RadialGradientConvergence(LiquidEngine):
         super().__init__()
     
 
-    def run(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, run_type = None): 
-        image = check_image(image)
-        return self._run(image, magnification, radius, sensitivity, doIntensityWeighting, run_type=run_type)
+    def run(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, mask = None, drift_table = None, run_type = None): 
+        """
+        Calculates the radial gradient convergence
+        :param image: The image to process, with shape (rows, cols), (nFrames, rows, cols) or a batch of sequences such as
+            (channels, nFrames, rows, cols), whose frames are all processed in a single pass, see check_batch
+        :param magnification: The magnification factor
+        :param radius: The radius (fwhm) of the convergence neighbourhood, in pixels
+        :param sensitivity: The sensitivity exponent
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param low_memory: If True, the magnified image and gradients are not materialized but interpolated on the fly
+            from the original image and gradients, so peak memory scales with the output instead of ~9x the output,
+            at the cost of repeating the interpolation for each neighbourhood
+        :param mask: If set, only the magnified pixels of the active low resolution pixels are calculated and the
+            others are 0; either an intensity threshold, grown by the convergence radius, or a boolean region of
+            interest with shape (rows, cols) or (nFrames, rows, cols), see __tiling__.get_work_list
+        :param drift_table: If set, the drift of each frame is corrected while the image and gradients are magnified,
+            instead of resampling the frames with DriftCorrector.apply_correction first; a drift table with shape
+            (nFrames, 3), see __interpolation_tools__.get_drift_shifts
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The radial gradient convergence map, with the batch axes of the image
+        """
+        image, batch_shape = check_batch(image)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0], batch_shape)
+        active_runs = get_work_list(image, mask, int(np.ceil(radius)), shift_row, shift_col)
+        return restore_batch(self._run(image, magnification, radius, sensitivity, doIntensityWeighting, low_memory, active_runs, shift_row, shift_col, run_type=run_type), batch_shape)
     
 
-    def benchmark(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    def benchmark(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, mask = None, drift_table = None):
+        image, batch_shape = check_batch(image)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0], batch_shape)
+        active_runs = get_work_list(image, mask, int(np.ceil(radius)), shift_row, shift_col)
+        results = super().benchmark(image, magnification, radius, sensitivity, doIntensityWeighting, low_memory, active_runs, shift_row, shift_col)
+        return [[run_time, run_type, restore_batch(out, batch_shape)] for run_time, run_type, out in results]
+
+    def run_tiled(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, out=None, tile_shape=None, memory_budget=DEFAULT_MEMORY_BUDGET, n_workers=None, run_type="Unthreaded"):
+        """
+        Calculates the radial gradient convergence in overlapping tiles processed in parallel, for fields of view
+        whose magnified output and intermediates do not fit in memory
+        :param image: The image to process
+        :param magnification: The magnification factor
+        :param radius: The radius (fwhm) of the convergence neighbourhood, in pixels
+        :param sensitivity: The sensitivity exponent
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param low_memory: Whether to interpolate the image and gradients on the fly, see run
+        :param out: Destination array or path of a .npy file to memory-map, see __tiling__.run_tiled
+        :param tile_shape: (tile_rows, tile_cols) without halo, if None it is calculated from the memory budget
+        :param memory_budget: Maximum number of bytes used by the tiles in flight
+        :param n_workers: Number of tiles processed concurrently, defaults to the number of cores
+        :param run_type: The run type used for each tile
+        :return: The radial gradient convergence map
+        """
         image = check_image(image)
-        return super().benchmark(image, magnification, radius, sensitivity, doIntensityWeighting)
-    
+        # convergence neighbourhood + Catmull-Rom support of the interpolated gradients + Roberts cross
+        halo = int(np.ceil(radius)) + 4
+        _run = self._run_types[run_type]
+
+        def _run_tile(tile, f0, f1):
+            return _run(tile, magnification, radius, sensitivity, doIntensityWeighting, low_memory)
+
+        if low_memory:
+            # input and gradients, the RGC map at M
+            bytes_per_pixel = 4 * (3 + magnification**2)
+        else:
+            # input and gradients, the image and RGC map at M and both gradients at 2M
+            bytes_per_pixel = 4 * (3 + 2 * magnification**2 + 8 * magnification**2)
+        return run_tiled(_run_tile, image, magnification, halo, bytes_per_pixel, out=out, tile_shape=tile_shape, memory_budget=memory_budget, n_workers=n_workers)
+
+    def run_reduced(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, reduction="mean", frames_per_timepoint: int = 0, frames_per_chunk: int = None, memory_budget=DEFAULT_MEMORY_BUDGET, low_memory: bool = False, drift_table=None, run_type=None):
+        """
+        Calculates the radial gradient convergence and reduces it along time as the frames are processed, so that
+        only a chunk of the per-frame RGC maps is kept in memory
+        :param image: The image to process
+        :param magnification: The magnification factor
+        :param radius: The radius (fwhm) of the convergence neighbourhood, in pixels
+        :param sensitivity: The sensitivity exponent
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param reduction: The temporal reduction ("mean", "max", "var", "tac2", "ac2", "ac3", "ac4", "pps" or an
+            SRRF order), see nanopyx.core.transform.sr_temporal_correlations.TemporalReduction
+        :param frames_per_timepoint: Number of frames reduced into each output frame, 0 uses all the frames
+        :param frames_per_chunk: Number of frames processed at once, if None it is calculated from the memory budget
+        :param memory_budget: Maximum number of bytes used by a chunk
+        :param low_memory: Whether to interpolate the image and gradients on the fly, see run
+        :param drift_table: Drift table corrected while the frames are magnified, see run
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The reduced radial gradient convergence maps, with shape (nTimepoints, rows * M, cols * M)
+        """
+        image = check_image(image)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0])
+
+        def _run_chunk(chunk, f0, f1):
+            return self._run(chunk, magnification, radius, sensitivity, doIntensityWeighting, low_memory, None, shift_row[f0:f1], shift_col[f0:f1], run_type=run_type)
+
+        if low_memory:
+            bytes_per_pixel = 4 * (3 + magnification**2)
+        else:
+            bytes_per_pixel = 4 * (3 + 2 * magnification**2 + 8 * magnification**2)
+        # the float64 lagged products of the reduction, at most 16 per magnified pixel
+        bytes_per_pixel += 8 * 16 * magnification**2
+        bytes_per_frame = image.shape[1] * image.shape[2] * bytes_per_pixel
+        return run_reduced(_run_chunk, image, reduction, frames_per_timepoint, frames_per_chunk, bytes_per_frame, memory_budget)
+
+
+    def run_sweep(self, image, magnification: int = 5, radii=(1.5,), sensitivities=(1,), doIntensityWeighting: bool = True, score=None, pixel_size: float = 1):
+        """
+        Calculates the radial gradient convergence for every combination of radius and sensitivity, e.g. to choose
+        the parameters of a reconstruction. The magnified image and gradients are calculated once for all the
+        combinations, the convergence once per radius, and the sensitivities are applied as a final exponent
+        :param image: The image to process
+        :param magnification: The magnification factor
+        :param radii: The radii (fwhm) of the convergence neighbourhood to evaluate, in pixels
+        :param sensitivities: The sensitivity exponents to evaluate
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param score: None, or one or a list of "error_map" and "frc", to score the mean of each result over the
+            frames: "error_map" adds the "RSE" and "RSP" of nanopyx.core.transform.new_error_map.ErrorMap against
+            the mean of the input frames, "frc" adds the "FRC" resolution of
+            nanopyx.core.analysis.frc.FIRECalculator between the means of the even and odd frames
+        :param pixel_size: The pixel size of the magnified image, used for the FRC resolution
+        :return: The radial gradient convergence maps, with shape (len(radii), len(sensitivities), nFrames,
+            rows * M, cols * M); if score is set, a tuple with the maps and a dict of (len(radii), len(sensitivities))
+            score arrays
+        """
+        image = np.ascontiguousarray(check_image(image))
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+
+        crsm = CRShiftAndMagnify()
+        if doIntensityWeighting:
+            image_interp = np.asarray(crsm.run(image, 0, 0, magnification, magnification))
+
+        cdef float [:,:,:] _image = image
+        cdef float [:,:,:] gradient_col = np.zeros_like(image)
+        cdef float [:,:,:] gradient_row = np.zeros_like(image)
+        cdef int n
+        with nogil:
+            for n in prange(_image.shape[0]):
+                _c_gradient_roberts_cross(&_image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], _image.shape[1], _image.shape[2])
+
+        gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+
+        rgc_maps = np.empty((len(radii), len(sensitivities), image.shape[0], image.shape[1] * magnification, image.shape[2] * magnification), dtype=np.float32)
+        for i, radius in enumerate(radii):
+            rgc_map = _calculate_rgc_sweep_radius(gradient_col_interp, gradient_row_interp, magnification, radius)
+            for j, sensitivity in enumerate(sensitivities):
+                # as in _c_calculate_rgc_tabulated, the exponent is only applied for sensitivities above 1
+                out = rgc_maps[i, j]
+                if sensitivity > 1:
+                    np.power(rgc_map, np.float32(sensitivity), out=out)
+                else:
+                    out[:] = rgc_map
+                if doIntensityWeighting:
+                    out *= image_interp
+
+        if score is None:
+            return rgc_maps
+
+        if type(score) is str:
+            score = [score]
+        scores = {}
+        if "error_map" in score:
+            from ..core.transform.new_error_map import ErrorMap
+
+            scores["RSE"] = np.zeros((len(radii), len(sensitivities)), dtype=np.float32)
+            scores["RSP"] = np.zeros((len(radii), len(sensitivities)), dtype=np.float32)
+            reference = image.mean(axis=0)
+            for i in range(len(radii)):
+                for j in range(len(sensitivities)):
+                    error_map = ErrorMap()
+                    error_map.optimise(reference, rgc_maps[i, j].mean(axis=0))
+                    scores["RSE"][i, j] = error_map.getRSE()
+                    scores["RSP"][i, j] = error_map.getRSP()
+        if "frc" in score:
+            if image.shape[0] < 2:
+                raise ValueError("FRC scoring needs at least 2 frames")
+            from ..core.analysis.frc import FIRECalculator
+
+            scores["FRC"] = np.zeros((len(radii), len(sensitivities)), dtype=np.float32)
+            for i in range(len(radii)):
+                for j in range(len(sensitivities)):
+                    calculator = FIRECalculator(pixel_size=pixel_size)
+                    calculator.calculate_fire_number(rgc_maps[i, j, 0::2].mean(axis=0), rgc_maps[i, j, 1::2].mean(axis=0))
+                    scores["FRC"][i, j] = calculator.fire_number
+
+        return rgc_maps, scores
+
+    def _run_opencl(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+
+        image = np.ascontiguousarray(image, dtype=np.float32)
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef int rowsM = <int>(rows * magnification)
+        cdef int colsM = <int>(cols * magnification)
+        cdef int rowsMG = <int>(rowsM * Gx_Gy_MAGNIFICATION)
+        cdef int colsMG = <int>(colsM * Gx_Gy_MAGNIFICATION)
+
+        code = self._get_cl_code("_le_radial_gradient_convergence_.cl")
+        prg = cl.Program(cl_ctx, code).build()
+        magnify_kernel = prg.magnify
+
+        rgc_map = np.empty((nFrames, rowsM, colsM), dtype=np.float32)
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+
+        if not low_memory:
+            # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+            rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+            rgc_offsets_in = cl_array.to_device(cl_queue, rgc_offsets)
+            rgc_weights_in = cl_array.to_device(cl_queue, rgc_weights)
+            rgc_counts_in = cl_array.to_device(cl_queue, rgc_counts)
+
+        # the interpolated gradients are the largest buffers, process as many frames as fit in one of them
+        # in low memory mode only the output is magnified
+        if low_memory:
+            max_frames = max(1, cl_ctx.devices[0].max_mem_alloc_size // (rowsM * colsM * 4))
+        else:
+            max_frames = max(1, cl_ctx.devices[0].max_mem_alloc_size // (rowsMG * colsMG * 4))
+
+        if active_runs is not None:
+            # one work item per magnified pixel of the active low resolution pixels, ordered by frame
+            active_pixels = get_active_pixels(active_runs)
+
+        for f0 in range(0, nFrames, max_frames):
+            chunk = image[f0:f0 + max_frames]
+            n = chunk.shape[0]
+
+            if active_runs is None:
+                global_size = (n, rowsM, colsM)
+                masked_args = ()
+            else:
+                p0, p1 = np.searchsorted(active_pixels[:, 0], [f0, f0 + n])
+                if p0 == p1:
+                    rgc_map[f0:f0 + n] = 0
+                    continue
+                chunk_pixels = active_pixels[p0:p1].copy()
+                chunk_pixels[:, 0] -= f0
+                active_pixels_in = cl_array.to_device(cl_queue, chunk_pixels)
+                global_size = (p1 - p0, magnification, magnification)
+                masked_args = (active_pixels_in.data,)
+
+            image_in = cl_array.to_device(cl_queue, chunk)
+            shift_row_in = cl_array.to_device(cl_queue, np.ascontiguousarray(shift_row[f0:f0 + n], dtype=np.float32))
+            shift_col_in = cl_array.to_device(cl_queue, np.ascontiguousarray(shift_col[f0:f0 + n], dtype=np.float32))
+            gradient_col = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            gradient_row = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            if active_runs is None:
+                rgc_out = cl_array.empty(cl_queue, (n, rowsM, colsM), dtype=np.float32)
+            else:
+                rgc_out = cl_array.zeros(cl_queue, (n, rowsM, colsM), dtype=np.float32)
+
+            prg.gradient_roberts_cross(cl_queue, chunk.shape, None, image_in.data, gradient_col.data, gradient_row.data)
+
+            if low_memory:
+                calculate_rgc_interpolated = prg.calculate_rgc_interpolated if active_runs is None else prg.calculate_rgc_interpolated_masked
+                calculate_rgc_interpolated(
+                    cl_queue,
+                    global_size,
+                    None,
+                    gradient_col.data,
+                    gradient_row.data,
+                    image_in.data,
+                    rgc_out.data,
+                    np.int32(rows),
+                    np.int32(cols),
+                    np.int32(magnification),
+                    np.float32(Gx_Gy_MAGNIFICATION),
+                    np.float32(fwhm),
+                    np.float32(tSO),
+                    np.float32(tSS),
+                    np.float32(sensitivity),
+                    np.int32(doIntensityWeighting),
+                    shift_row_in.data,
+                    shift_col_in.data,
+                    *masked_args,
+                )
+            else:
+                image_interp = cl_array.empty(cl_queue, (n, rowsM, colsM), dtype=np.float32)
+                gradient_col_interp = cl_array.empty(cl_queue, (n, rowsMG, colsMG), dtype=np.float32)
+                gradient_row_interp = cl_array.empty(cl_queue, (n, rowsMG, colsMG), dtype=np.float32)
+
+                magnify_kernel(cl_queue, image_interp.shape, None, image_in.data, image_interp.data, np.int32(rows), np.int32(cols), np.float32(magnification), shift_row_in.data, shift_col_in.data)
+                magnify_kernel(cl_queue, gradient_col_interp.shape, None, gradient_col.data, gradient_col_interp.data, np.int32(rows), np.int32(cols), np.float32(magnification * Gx_Gy_MAGNIFICATION), shift_row_in.data, shift_col_in.data)
+                magnify_kernel(cl_queue, gradient_row_interp.shape, None, gradient_row.data, gradient_row_interp.data, np.int32(rows), np.int32(cols), np.float32(magnification * Gx_Gy_MAGNIFICATION), shift_row_in.data, shift_col_in.data)
+                if active_runs is not None:
+                    masked_args += (np.int32(rowsM), np.int32(colsM))
+                calculate_rgc = prg.calculate_rgc if active_runs is None else prg.calculate_rgc_masked
+                calculate_rgc(
+                    cl_queue,
+                    global_size,
+                    None,
+                    gradient_col_interp.data,
+                    gradient_row_interp.data,
+                    image_interp.data,
+                    rgc_out.data,
+                    rgc_offsets_in.data,
+                    rgc_weights_in.data,
+                    rgc_counts_in.data,
+                    np.int32(rgc_offsets.shape[1]),
+                    np.int32(magnification),
+                    np.float32(Gx_Gy_MAGNIFICATION),
+                    np.float32(sensitivity),
+                    np.int32(doIntensityWeighting),
+                    *masked_args,
+                )
+
+            # Wait for queue to finish
+            cl_queue.finish()
+            rgc_map[f0:f0 + n] = rgc_out.get()
+
+        return rgc_map
 
     # tag-start: _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded
-    def _run_unthreaded(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    def _run_unthreaded(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
 
         cdef float sigma = radius / 2.355
         cdef float fwhm = radius
@@ -65,8 +437,20 @@ class RadialGradientConvergence(LiquidEngine):
         cdef int rowsM = <int>(rows * magnification)
         cdef int colsM = <int>(cols * magnification)
 
+        cdef int _low_memory = low_memory
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp
+        if _low_memory:
+            image_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
 
         cdef float [:,:,:] gradient_col = np.zeros_like(image) 
         cdef float [:,:,:] gradient_row = np.zeros_like(image)
@@ -76,25 +460,51 @@ class RadialGradientConvergence(LiquidEngine):
             for n in prange(nFrames):
                 _c_gradient_roberts_cross(&image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], image.shape[1], image.shape[2])
 
-        cdef float [:,:,:] gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
-        cdef float [:,:,:] gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        cdef float [:,:,:] gradient_col_interp
+        cdef float [:,:,:] gradient_row_interp
+        if _low_memory:
+            # the gradients are interpolated on the fly by _c_calculate_rgc_interpolated
+            gradient_col_interp = np.zeros((1, 1, 1), dtype=np.float32)
+            gradient_row_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            gradient_col_interp = crsm.run(gradient_col, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+            gradient_row_interp = crsm.run(gradient_row, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
     
+        # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+        rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+        cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+        cdef float[:,:,::1] _rgc_weights = rgc_weights
+        cdef int[::1] _rgc_counts = rgc_counts
+        cdef int table_width = rgc_offsets.shape[1]
+
         cdef float [:,:,:] rgc_map = np.zeros((image.shape[0], image.shape[1]*magnification, image.shape[2]*magnification), dtype=np.float32)
 
-        cdef int f, rM, cM
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels,
+        # pixels outside of the runs are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, rows, cols))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int p, f, rM, cM
         with nogil:
-            for f in range(nFrames):
-                    for rM in range(rowsM): 
-                        for cM in range(colsM):
-                            if _doIntensityWeighting:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity) * image_interp[f, rM, cM] 
+            for p in range(nRuns):
+                    f = _active_runs[p, 0]
+                    for rM in range(_active_runs[p, 1] * _magnification, (_active_runs[p, 1] + 1) * _magnification):
+                        for cM in range(_active_runs[p, 2] * _magnification, _active_runs[p, 3] * _magnification):
+                            if _low_memory:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_interpolated(cM, rM, &gradient_col[f,0,0], &gradient_row[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity, _shift_row[f], _shift_col[f])
+                                if _doIntensityWeighting:
+                                    rgc_map[f, rM, cM] = rgc_map[f, rM, cM] * _c_interpolate(&image[f,0,0], rM / <float>_magnification - _shift_row[f], cM / <float>_magnification - _shift_col[f], rows, cols)
+                            elif _doIntensityWeighting:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width) * image_interp[f, rM, cM] 
                             else:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity)
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
         return rgc_map
         # tag-end
 
-    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded"); replace("range(rowsM)", "prange(rowsM)")
-    def _run_threaded(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded"); replace("range(nRuns)", "prange(nRuns)")
+    def _run_threaded(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
 
         cdef float sigma = radius / 2.355
         cdef float fwhm = radius
@@ -111,8 +521,20 @@ class RadialGradientConvergence(LiquidEngine):
         cdef int rowsM = <int>(rows * magnification)
         cdef int colsM = <int>(cols * magnification)
 
+        cdef int _low_memory = low_memory
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp
+        if _low_memory:
+            image_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
 
         cdef float [:,:,:] gradient_col = np.zeros_like(image) 
         cdef float [:,:,:] gradient_row = np.zeros_like(image)
@@ -122,25 +544,51 @@ class RadialGradientConvergence(LiquidEngine):
             for n in prange(nFrames):
                 _c_gradient_roberts_cross(&image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], image.shape[1], image.shape[2])
 
-        cdef float [:,:,:] gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
-        cdef float [:,:,:] gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        cdef float [:,:,:] gradient_col_interp
+        cdef float [:,:,:] gradient_row_interp
+        if _low_memory:
+            # the gradients are interpolated on the fly by _c_calculate_rgc_interpolated
+            gradient_col_interp = np.zeros((1, 1, 1), dtype=np.float32)
+            gradient_row_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            gradient_col_interp = crsm.run(gradient_col, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+            gradient_row_interp = crsm.run(gradient_row, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
     
+        # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+        rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+        cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+        cdef float[:,:,::1] _rgc_weights = rgc_weights
+        cdef int[::1] _rgc_counts = rgc_counts
+        cdef int table_width = rgc_offsets.shape[1]
+
         cdef float [:,:,:] rgc_map = np.zeros((image.shape[0], image.shape[1]*magnification, image.shape[2]*magnification), dtype=np.float32)
 
-        cdef int f, rM, cM
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels,
+        # pixels outside of the runs are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, rows, cols))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int p, f, rM, cM
         with nogil:
-            for f in range(nFrames):
-                    for rM in prange(rowsM): 
-                        for cM in range(colsM):
-                            if _doIntensityWeighting:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity) * image_interp[f, rM, cM] 
+            for p in prange(nRuns):
+                    f = _active_runs[p, 0]
+                    for rM in range(_active_runs[p, 1] * _magnification, (_active_runs[p, 1] + 1) * _magnification):
+                        for cM in range(_active_runs[p, 2] * _magnification, _active_runs[p, 3] * _magnification):
+                            if _low_memory:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_interpolated(cM, rM, &gradient_col[f,0,0], &gradient_row[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity, _shift_row[f], _shift_col[f])
+                                if _doIntensityWeighting:
+                                    rgc_map[f, rM, cM] = rgc_map[f, rM, cM] * _c_interpolate(&image[f,0,0], rM / <float>_magnification - _shift_row[f], cM / <float>_magnification - _shift_col[f], rows, cols)
+                            elif _doIntensityWeighting:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width) * image_interp[f, rM, cM] 
                             else:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity)
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
         return rgc_map
         # tag-end
 
-    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_static"); replace("range(rowsM)", 'prange(rowsM, schedule="static")')
-    def _run_threaded_static(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_static"); replace("range(nRuns)", 'prange(nRuns, schedule="static")')
+    def _run_threaded_static(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
 
         cdef float sigma = radius / 2.355
         cdef float fwhm = radius
@@ -157,8 +605,20 @@ class RadialGradientConvergence(LiquidEngine):
         cdef int rowsM = <int>(rows * magnification)
         cdef int colsM = <int>(cols * magnification)
 
+        cdef int _low_memory = low_memory
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp
+        if _low_memory:
+            image_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
 
         cdef float [:,:,:] gradient_col = np.zeros_like(image) 
         cdef float [:,:,:] gradient_row = np.zeros_like(image)
@@ -168,25 +628,51 @@ class RadialGradientConvergence(LiquidEngine):
             for n in prange(nFrames):
                 _c_gradient_roberts_cross(&image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], image.shape[1], image.shape[2])
 
-        cdef float [:,:,:] gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
-        cdef float [:,:,:] gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        cdef float [:,:,:] gradient_col_interp
+        cdef float [:,:,:] gradient_row_interp
+        if _low_memory:
+            # the gradients are interpolated on the fly by _c_calculate_rgc_interpolated
+            gradient_col_interp = np.zeros((1, 1, 1), dtype=np.float32)
+            gradient_row_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            gradient_col_interp = crsm.run(gradient_col, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+            gradient_row_interp = crsm.run(gradient_row, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
     
+        # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+        rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+        cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+        cdef float[:,:,::1] _rgc_weights = rgc_weights
+        cdef int[::1] _rgc_counts = rgc_counts
+        cdef int table_width = rgc_offsets.shape[1]
+
         cdef float [:,:,:] rgc_map = np.zeros((image.shape[0], image.shape[1]*magnification, image.shape[2]*magnification), dtype=np.float32)
 
-        cdef int f, rM, cM
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels,
+        # pixels outside of the runs are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, rows, cols))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int p, f, rM, cM
         with nogil:
-            for f in range(nFrames):
-                    for rM in prange(rowsM, schedule="static"): 
-                        for cM in range(colsM):
-                            if _doIntensityWeighting:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity) * image_interp[f, rM, cM] 
+            for p in prange(nRuns, schedule="static"):
+                    f = _active_runs[p, 0]
+                    for rM in range(_active_runs[p, 1] * _magnification, (_active_runs[p, 1] + 1) * _magnification):
+                        for cM in range(_active_runs[p, 2] * _magnification, _active_runs[p, 3] * _magnification):
+                            if _low_memory:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_interpolated(cM, rM, &gradient_col[f,0,0], &gradient_row[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity, _shift_row[f], _shift_col[f])
+                                if _doIntensityWeighting:
+                                    rgc_map[f, rM, cM] = rgc_map[f, rM, cM] * _c_interpolate(&image[f,0,0], rM / <float>_magnification - _shift_row[f], cM / <float>_magnification - _shift_col[f], rows, cols)
+                            elif _doIntensityWeighting:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width) * image_interp[f, rM, cM] 
                             else:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity)
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
         return rgc_map
         # tag-end
 
-    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_dynamic"); replace("range(rowsM)", 'prange(rowsM, schedule="dynamic")')
-    def _run_threaded_dynamic(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_dynamic"); replace("range(nRuns)", 'prange(nRuns, schedule="dynamic")')
+    def _run_threaded_dynamic(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
 
         cdef float sigma = radius / 2.355
         cdef float fwhm = radius
@@ -203,8 +689,20 @@ class RadialGradientConvergence(LiquidEngine):
         cdef int rowsM = <int>(rows * magnification)
         cdef int colsM = <int>(cols * magnification)
 
+        cdef int _low_memory = low_memory
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp
+        if _low_memory:
+            image_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
 
         cdef float [:,:,:] gradient_col = np.zeros_like(image) 
         cdef float [:,:,:] gradient_row = np.zeros_like(image)
@@ -214,25 +712,51 @@ class RadialGradientConvergence(LiquidEngine):
             for n in prange(nFrames):
                 _c_gradient_roberts_cross(&image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], image.shape[1], image.shape[2])
 
-        cdef float [:,:,:] gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
-        cdef float [:,:,:] gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        cdef float [:,:,:] gradient_col_interp
+        cdef float [:,:,:] gradient_row_interp
+        if _low_memory:
+            # the gradients are interpolated on the fly by _c_calculate_rgc_interpolated
+            gradient_col_interp = np.zeros((1, 1, 1), dtype=np.float32)
+            gradient_row_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            gradient_col_interp = crsm.run(gradient_col, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+            gradient_row_interp = crsm.run(gradient_row, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
     
+        # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+        rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+        cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+        cdef float[:,:,::1] _rgc_weights = rgc_weights
+        cdef int[::1] _rgc_counts = rgc_counts
+        cdef int table_width = rgc_offsets.shape[1]
+
         cdef float [:,:,:] rgc_map = np.zeros((image.shape[0], image.shape[1]*magnification, image.shape[2]*magnification), dtype=np.float32)
 
-        cdef int f, rM, cM
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels,
+        # pixels outside of the runs are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, rows, cols))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int p, f, rM, cM
         with nogil:
-            for f in range(nFrames):
-                    for rM in prange(rowsM, schedule="dynamic"): 
-                        for cM in range(colsM):
-                            if _doIntensityWeighting:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity) * image_interp[f, rM, cM] 
+            for p in prange(nRuns, schedule="dynamic"):
+                    f = _active_runs[p, 0]
+                    for rM in range(_active_runs[p, 1] * _magnification, (_active_runs[p, 1] + 1) * _magnification):
+                        for cM in range(_active_runs[p, 2] * _magnification, _active_runs[p, 3] * _magnification):
+                            if _low_memory:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_interpolated(cM, rM, &gradient_col[f,0,0], &gradient_row[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity, _shift_row[f], _shift_col[f])
+                                if _doIntensityWeighting:
+                                    rgc_map[f, rM, cM] = rgc_map[f, rM, cM] * _c_interpolate(&image[f,0,0], rM / <float>_magnification - _shift_row[f], cM / <float>_magnification - _shift_col[f], rows, cols)
+                            elif _doIntensityWeighting:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width) * image_interp[f, rM, cM] 
                             else:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity)
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
         return rgc_map
         # tag-end
 
-    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_guided"); replace("range(rowsM)", 'prange(rowsM, schedule="guided")')
-    def _run_threaded_guided(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True):
+    # tag-copy:  _le_radial_gradient_convergence.RadialGradientConvergence._run_unthreaded; replace("_run_unthreaded", "_run_threaded_guided"); replace("range(nRuns)", 'prange(nRuns, schedule="guided")')
+    def _run_threaded_guided(self, float[:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1 , doIntensityWeighting: bool = True, low_memory: bool = False, active_runs = None, shift_row = None, shift_col = None):
 
         cdef float sigma = radius / 2.355
         cdef float fwhm = radius
@@ -249,8 +773,20 @@ class RadialGradientConvergence(LiquidEngine):
         cdef int rowsM = <int>(rows * magnification)
         cdef int colsM = <int>(cols * magnification)
 
+        cdef int _low_memory = low_memory
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp
+        if _low_memory:
+            image_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
 
         cdef float [:,:,:] gradient_col = np.zeros_like(image) 
         cdef float [:,:,:] gradient_row = np.zeros_like(image)
@@ -260,20 +796,46 @@ class RadialGradientConvergence(LiquidEngine):
             for n in prange(nFrames):
                 _c_gradient_roberts_cross(&image[n,0,0], &gradient_col[n,0,0], &gradient_row[n,0,0], image.shape[1], image.shape[2])
 
-        cdef float [:,:,:] gradient_col_interp = crsm.run(gradient_col, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
-        cdef float [:,:,:] gradient_row_interp = crsm.run(gradient_row, 0, 0, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+        cdef float [:,:,:] gradient_col_interp
+        cdef float [:,:,:] gradient_row_interp
+        if _low_memory:
+            # the gradients are interpolated on the fly by _c_calculate_rgc_interpolated
+            gradient_col_interp = np.zeros((1, 1, 1), dtype=np.float32)
+            gradient_row_interp = np.zeros((1, 1, 1), dtype=np.float32)
+        else:
+            gradient_col_interp = crsm.run(gradient_col, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
+            gradient_row_interp = crsm.run(gradient_row, shift_row, shift_col, magnification*Gx_Gy_MAGNIFICATION, magnification*Gx_Gy_MAGNIFICATION)
     
+        # neighbour offsets and distance weights only depend on the subpixel phase, compute them once
+        rgc_offsets, rgc_weights, rgc_counts = _get_rgc_tables(magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS)
+        cdef int[:,:,::1] _rgc_offsets = rgc_offsets
+        cdef float[:,:,::1] _rgc_weights = rgc_weights
+        cdef int[::1] _rgc_counts = rgc_counts
+        cdef int table_width = rgc_offsets.shape[1]
+
         cdef float [:,:,:] rgc_map = np.zeros((image.shape[0], image.shape[1]*magnification, image.shape[2]*magnification), dtype=np.float32)
 
-        cdef int f, rM, cM
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels,
+        # pixels outside of the runs are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, rows, cols))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int p, f, rM, cM
         with nogil:
-            for f in range(nFrames):
-                    for rM in prange(rowsM, schedule="guided"): 
-                        for cM in range(colsM):
-                            if _doIntensityWeighting:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity) * image_interp[f, rM, cM] 
+            for p in prange(nRuns, schedule="guided"):
+                    f = _active_runs[p, 0]
+                    for rM in range(_active_runs[p, 1] * _magnification, (_active_runs[p, 1] + 1) * _magnification):
+                        for cM in range(_active_runs[p, 2] * _magnification, _active_runs[p, 3] * _magnification):
+                            if _low_memory:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_interpolated(cM, rM, &gradient_col[f,0,0], &gradient_row[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity, _shift_row[f], _shift_col[f])
+                                if _doIntensityWeighting:
+                                    rgc_map[f, rM, cM] = rgc_map[f, rM, cM] * _c_interpolate(&image[f,0,0], rM / <float>_magnification - _shift_row[f], cM / <float>_magnification - _shift_col[f], rows, cols)
+                            elif _doIntensityWeighting:
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width) * image_interp[f, rM, cM] 
                             else:
-                                rgc_map[f, rM, cM] = _c_calculate_rgc(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], &image_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION,  fwhm, tSO, tSS, _sensitivity)
+                                rgc_map[f, rM, cM] = _c_calculate_rgc_tabulated(cM, rM, &gradient_col_interp[f,0,0], &gradient_row_interp[f,0,0], colsM, rowsM, _magnification, Gx_Gy_MAGNIFICATION, _sensitivity, &_rgc_offsets[0,0,0], &_rgc_weights[0,0,0], &_rgc_counts[0], table_width)
         return rgc_map
         # tag-end
 
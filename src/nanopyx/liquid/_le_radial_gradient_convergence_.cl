@@ -0,0 +1,360 @@
+float _c_calculate_rgc_tabulated(int xM, int yM, __global float *imIntGx, __global float *imIntGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity, __global int *offsets, __global float *weights, __global int *counts, int table_width);
+float _c_calculate_rgc_interpolated(int xM, int yM, __global float *imGx, __global float *imGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity, float shift_row, float shift_col);
+double _c_calculate_dk(float Gx, float Gy, float dx, float dy, float distance);
+double _c_calculate_dw(double distance, double tSS);
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols);
+double _c_cubic(double v);
+// c2cl-function: _c_cubic from _c_interpolation_catmull_rom.c
+double _c_cubic(double v) {
+  double a = 0.5;
+  double z = 0;
+  if (v < 0) {
+    v = -v;
+  }
+  if (v < 1) {
+    z = v * v * (v * (-a + 2) + (a - 3)) + 1;
+  } else if (v < 2) {
+    z = -a * v * v * v + 5 * a * v * v - 8 * a * v + 4 * a;
+  }
+  return z;
+}
+
+// c2cl-function: _c_interpolate from _c_interpolation_catmull_rom.c
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols) {
+  // return 0 if r OR c positions do not exist in image
+  if (r < 0 || r >= rows || c < 0 || c >= cols) {
+    return 0;
+  }
+
+  const int r_int = (int)floor(r - 0.5);
+  const int c_int = (int)floor(c - 0.5);
+  double q = 0;
+  double p = 0;
+
+  int r_neighbor, c_neighbor;
+
+  for (int j = 0; j < 4; j++) {
+    c_neighbor = c_int - 1 + j;
+    p = 0;
+    if (c_neighbor < 0 || c_neighbor >= cols) {
+      continue;
+    }
+
+    for (int i = 0; i < 4; i++) {
+      r_neighbor = r_int - 1 + i;
+      if (r_neighbor < 0 || r_neighbor >= rows) {
+        continue;
+      }
+      p = p + image[r_neighbor * cols + c_neighbor] *
+                  _c_cubic(r - (r_neighbor + 0.5));
+    }
+    q = q + p * _c_cubic(c - (c_neighbor + 0.5));
+  }
+  return q;
+}
+
+// c2cl-function: _c_calculate_dw from _c_sr_radial_gradient_convergence.c
+double _c_calculate_dw(double distance, double tSS) {
+  return pow((distance * exp((-distance * distance) / tSS)), 4);
+}
+
+// c2cl-function: _c_calculate_dk from _c_sr_radial_gradient_convergence.c
+double _c_calculate_dk(float Gx, float Gy, float dx, float dy, float distance) {
+  float Dk = fabs(Gy * dx - Gx * dy) / sqrt(Gx * Gx + Gy * Gy);
+  if (isnan(Dk)) {
+    Dk = distance;
+  }
+  Dk = 1 - Dk / distance;
+  return Dk;
+}
+
+// c2cl-function: _c_calculate_rgc_interpolated from _c_sr_radial_gradient_convergence.c
+float _c_calculate_rgc_interpolated(int xM, int yM, __global float *imGx, __global float *imGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity, float shift_row, float shift_col) {
+
+    float vx, vy, Gx, Gy, dx, dy, distance, distanceWeight, GdotR, Dk;
+    int rMG, cMG;
+    float magnificationMG = magnification * Gx_Gy_MAGNIFICATION;
+
+    float xc = (xM + 0.5) / magnification;
+    float yc = (yM + 0.5) / magnification;
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
+    int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
+
+    // w and h are the magnified dimensions, while vx and vy are in original pixel units
+    int w_original = w / magnification;
+    int h_original = h / magnification;
+
+    for (int j = _start; j < _end; j++) {
+        vy = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
+        vy /= Gx_Gy_MAGNIFICATION;
+
+        if (0 < vy && vy <= h_original - 1) {
+            for (int i = _start; i < _end; i++) {
+                vx = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
+                vx /= Gx_Gy_MAGNIFICATION;
+
+                if (0 < vx && vx <= w_original - 1) {
+                    dx = vx - xc;
+                    dy = vy - yc;
+                    distance = sqrt(dx * dx + dy * dy);
+
+                    if (distance != 0 && distance <= tSO) {
+                        // Catmull-Rom interpolation of the original gradients at the same (magnification * Gx_Gy_MAGNIFICATION) grid
+                        // positions read by _c_calculate_rgc, shifted as the gradients magnified by ShiftAndMagnify
+                        rMG = (int)(vy * magnificationMG);
+                        cMG = (int)(vx * magnificationMG);
+                        Gx = _c_interpolate(imGx, rMG / magnificationMG - shift_row, cMG / magnificationMG - shift_col, h_original, w_original);
+                        Gy = _c_interpolate(imGy, rMG / magnificationMG - shift_row, cMG / magnificationMG - shift_col, h_original, w_original);
+
+                        distanceWeight = _c_calculate_dw(distance, tSS);
+                        distanceWeightSum += distanceWeight;
+                        GdotR = Gx*dx + Gy*dy;
+
+                        if (GdotR < 0) {
+                            Dk = _c_calculate_dk(Gx, Gy, dx, dy, distance);
+                            RGC += Dk * distanceWeight;
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
+
+// c2cl-function: _c_calculate_rgc_tabulated from _c_sr_radial_gradient_convergence.c
+float _c_calculate_rgc_tabulated(int xM, int yM, __global float *imIntGx, __global float *imIntGy, int w, int h, int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity, __global int *offsets, __global float *weights, __global int *counts, int table_width) {
+
+    float vx, vy, Gx, Gy, ux, uy, distanceWeight, GdotR, Dk, G;
+    long idx;
+
+    int G_magnification = (int)Gx_Gy_MAGNIFICATION;
+    int wMG = (int)(w * Gx_Gy_MAGNIFICATION);
+    int phase = (yM % magnification) * magnification + (xM % magnification);
+    int kY0 = (yM / magnification) * G_magnification;
+    int kX0 = (xM / magnification) * G_magnification;
+
+    __global int *_offsets = &offsets[phase * table_width * 2];
+    __global float *_weights = &weights[phase * table_width * 3];
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    // w and h are the magnified dimensions, while vx and vy are in original pixel units
+    int w_original = w / magnification;
+    int h_original = h / magnification;
+
+    for (int n = 0; n < counts[phase]; n++) {
+        int kY = kY0 + _offsets[n * 2];
+        int kX = kX0 + _offsets[n * 2 + 1];
+        vy = kY / Gx_Gy_MAGNIFICATION;
+        vx = kX / Gx_Gy_MAGNIFICATION;
+
+        if (0 < vy && vy <= h_original - 1 && 0 < vx && vx <= w_original - 1) {
+            idx = (long)kY * magnification * wMG + (long)kX * magnification;
+            Gx = imIntGx[idx];
+            Gy = imIntGy[idx];
+            ux = _weights[n * 3];
+            uy = _weights[n * 3 + 1];
+            distanceWeight = _weights[n * 3 + 2];
+
+            distanceWeightSum += distanceWeight;
+            GdotR = Gx * ux + Gy * uy;
+
+            if (GdotR < 0) {
+                // same as _c_calculate_dk, with the offset already normalized by the distance
+                G = sqrt(Gx * Gx + Gy * Gy);
+                Dk = 1 - fabs(Gy * ux - Gx * uy) / G;
+                RGC += Dk * distanceWeight;
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
+
+// per-pixel version of _c_gradient_roberts_cross from _c_gradients.c
+__kernel void gradient_roberts_cross(__global float *image,
+                                     __global float *imGc,
+                                     __global float *imGr) {
+  int f = get_global_id(0);
+  int r1 = get_global_id(1);
+  int c1 = get_global_id(2);
+
+  int rows = get_global_size(1);
+  int cols = get_global_size(2);
+  long offset = (long)f * rows * cols;
+
+  int c0 = c1 > 0 ? c1 - 1 : 0;
+  int r0 = r1 > 0 ? r1 - 1 : 0;
+
+  float im_c0_r1 = image[offset + r0 * cols + c1];
+  float im_c1_r0 = image[offset + r1 * cols + c0];
+  float im_c0_r0 = image[offset + r0 * cols + c0];
+  float im_c1_r1 = image[offset + r1 * cols + c1];
+
+  imGc[offset + r1 * cols + c1] = im_c0_r1 - im_c1_r0 + im_c1_r1 - im_c0_r0;
+  imGr[offset + r1 * cols + c1] = -im_c0_r1 + im_c1_r0 + im_c1_r1 - im_c0_r0;
+}
+
+// Catmull-Rom magnification with per frame shifts, as the shiftAndMagnify
+// kernel of _le_interpolation_catmull_rom_.cl
+__kernel void magnify(__global float *image_in, __global float *image_out,
+                      int rows, int cols, float magnification,
+                      __global float *shift_row, __global float *shift_col) {
+  int f = get_global_id(0);
+  int rM = get_global_id(1);
+  int cM = get_global_id(2);
+
+  int rowsM = get_global_size(1);
+  int colsM = get_global_size(2);
+
+  float row = rM / magnification - shift_row[f];
+  float col = cM / magnification - shift_col[f];
+
+  image_out[(long)f * rowsM * colsM + rM * colsM + cM] =
+      _c_interpolate(&image_in[(long)f * rows * cols], row, col, rows, cols);
+}
+
+// magnified pixel (rM, cM) of frame f, shared by calculate_rgc and
+// calculate_rgc_masked
+void calculate_rgc_subpixel(int f, int rM, int cM, int rowsM, int colsM,
+                            __global float *imIntGx, __global float *imIntGy,
+                            __global float *imInt, __global float *rgc_map,
+                            __global int *rgc_offsets,
+                            __global float *rgc_weights,
+                            __global int *rgc_counts, int table_width,
+                            int magnification, float Gx_Gy_MAGNIFICATION,
+                            float sensitivity, int doIntensityWeighting) {
+  long offset = (long)f * rowsM * colsM;
+  long offset_gradient = (long)f * (int)(rowsM * Gx_Gy_MAGNIFICATION) *
+                         (int)(colsM * Gx_Gy_MAGNIFICATION);
+
+  float rgc = _c_calculate_rgc_tabulated(
+      cM, rM, &imIntGx[offset_gradient], &imIntGy[offset_gradient], colsM,
+      rowsM, magnification, Gx_Gy_MAGNIFICATION, sensitivity, rgc_offsets,
+      rgc_weights, rgc_counts, table_width);
+
+  if (doIntensityWeighting) {
+    rgc = rgc * imInt[offset + rM * colsM + cM];
+  }
+  rgc_map[offset + rM * colsM + cM] = rgc;
+}
+
+__kernel void calculate_rgc(__global float *imIntGx, __global float *imIntGy,
+                            __global float *imInt, __global float *rgc_map,
+                            __global int *rgc_offsets,
+                            __global float *rgc_weights,
+                            __global int *rgc_counts, int table_width,
+                            int magnification, float Gx_Gy_MAGNIFICATION,
+                            float sensitivity, int doIntensityWeighting) {
+  calculate_rgc_subpixel(get_global_id(0), get_global_id(1), get_global_id(2),
+                         get_global_size(1), get_global_size(2), imIntGx,
+                         imIntGy, imInt, rgc_map, rgc_offsets, rgc_weights,
+                         rgc_counts, table_width, magnification,
+                         Gx_Gy_MAGNIFICATION, sensitivity,
+                         doIntensityWeighting);
+}
+
+// calculate_rgc restricted to a work list of active low resolution pixels
+// (frame, row, column), with one work item per magnified pixel
+__kernel void calculate_rgc_masked(
+    __global float *imIntGx, __global float *imIntGy, __global float *imInt,
+    __global float *rgc_map, __global int *rgc_offsets,
+    __global float *rgc_weights, __global int *rgc_counts, int table_width,
+    int magnification, float Gx_Gy_MAGNIFICATION, float sensitivity,
+    int doIntensityWeighting, __global int *active_pixels, int rowsM,
+    int colsM) {
+  int p = get_global_id(0);
+  int f = active_pixels[p * 3];
+  int rM = active_pixels[p * 3 + 1] * magnification + get_global_id(1);
+  int cM = active_pixels[p * 3 + 2] * magnification + get_global_id(2);
+
+  calculate_rgc_subpixel(f, rM, cM, rowsM, colsM, imIntGx, imIntGy, imInt,
+                         rgc_map, rgc_offsets, rgc_weights, rgc_counts,
+                         table_width, magnification, Gx_Gy_MAGNIFICATION,
+                         sensitivity, doIntensityWeighting);
+}
+
+// low memory variant of calculate_rgc, the gradients and the intensity are
+// interpolated on the fly from the original resolution buffers
+void calculate_rgc_interpolated_subpixel(
+    int f, int rM, int cM, int rowsM, int colsM, __global float *imGx,
+    __global float *imGy, __global float *image, __global float *rgc_map,
+    int rows, int cols, int magnification, float Gx_Gy_MAGNIFICATION,
+    float fwhm, float tSO, float tSS, float sensitivity,
+    int doIntensityWeighting, __global float *shift_row,
+    __global float *shift_col) {
+  long offset = (long)f * rows * cols;
+  float rgc = _c_calculate_rgc_interpolated(
+      cM, rM, &imGx[offset], &imGy[offset], colsM, rowsM, magnification,
+      Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, sensitivity, shift_row[f],
+      shift_col[f]);
+
+  if (doIntensityWeighting) {
+    rgc = rgc * _c_interpolate(&image[offset],
+                               rM / (float)magnification - shift_row[f],
+                               cM / (float)magnification - shift_col[f],
+                               rows, cols);
+  }
+
+  rgc_map[(long)f * rowsM * colsM + rM * colsM + cM] = rgc;
+}
+
+__kernel void calculate_rgc_interpolated(__global float *imGx,
+                                         __global float *imGy,
+                                         __global float *image,
+                                         __global float *rgc_map, int rows,
+                                         int cols, int magnification,
+                                         float Gx_Gy_MAGNIFICATION, float fwhm,
+                                         float tSO, float tSS,
+                                         float sensitivity,
+                                         int doIntensityWeighting,
+                                         __global float *shift_row,
+                                         __global float *shift_col) {
+  calculate_rgc_interpolated_subpixel(
+      get_global_id(0), get_global_id(1), get_global_id(2),
+      get_global_size(1), get_global_size(2), imGx, imGy, image, rgc_map,
+      rows, cols, magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS,
+      sensitivity, doIntensityWeighting, shift_row, shift_col);
+}
+
+// calculate_rgc_interpolated restricted to a work list of active low
+// resolution pixels (frame, row, column)
+__kernel void calculate_rgc_interpolated_masked(
+    __global float *imGx, __global float *imGy, __global float *image,
+    __global float *rgc_map, int rows, int cols, int magnification,
+    float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS,
+    float sensitivity, int doIntensityWeighting, __global float *shift_row,
+    __global float *shift_col, __global int *active_pixels) {
+  int p = get_global_id(0);
+  int f = active_pixels[p * 3];
+  int rM = active_pixels[p * 3 + 1] * magnification + get_global_id(1);
+  int cM = active_pixels[p * 3 + 2] * magnification + get_global_id(2);
+
+  calculate_rgc_interpolated_subpixel(
+      f, rM, cM, rows * magnification, cols * magnification, imGx, imGy,
+      image, rgc_map, rows, cols, magnification, Gx_Gy_MAGNIFICATION, fwhm,
+      tSO, tSS, sensitivity, doIntensityWeighting, shift_row, shift_col);
+}
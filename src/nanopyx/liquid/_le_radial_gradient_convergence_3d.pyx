@@ -0,0 +1,393 @@
+# cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=False
+
+import numpy as np
+
+cimport numpy as np
+
+from cython.parallel import prange
+
+from .__interpolation_tools__ import check_volume
+from .__liquid_engine__ import LiquidEngine
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+
+# nanopyx-c-file: _c_interpolation_catmull_rom.c
+
+cdef extern from "_c_sr_radial_gradient_convergence.h":
+    float _c_interpolate_trilinear(float* volume, float z, float y, float x, int d, int h, int w) nogil
+    float _c_calculate_rgc_3d(int xM, int yM, int zM, float* imGx, float* imGy, float* imGz, int w, int h, int d, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity) nogil
+
+cdef extern from "_c_gradients.h":
+    void _c_gradient_3d(float* image, float* imGc, float* imGr, float* imGs, int slice, int rows, int cols) nogil
+
+
+class RadialGradientConvergence3D(LiquidEngine):
+    """
+    3D radial gradient convergence using the NanoPyx Liquid Engine
+    """
+
+    _has_opencl = True
+    _has_threaded = True
+    _has_threaded_static = True
+    _has_threaded_dynamic = True
+    _has_threaded_guided = True
+    _has_unthreaded = True
+    _has_python = False
+    _has_njit = False
+
+    def __init__(self):
+        super().__init__()
+
+    def run(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True, run_type=None):
+        """
+        Calculates the 3D radial gradient convergence
+        :param image: The volume (slices, rows, cols) or sequence of volumes (frames, slices, rows, cols) to process
+        :param magnification: The magnification factor, applied along all three axes
+        :param radius: The radius (fwhm) of the convergence neighbourhood, in voxels
+        :param sensitivity: The sensitivity exponent
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The radial gradient convergence maps, with shape (frames, slices * M, rows * M, cols * M)
+        """
+        image = check_volume(image)
+        return self._run(image, magnification, radius, sensitivity, doIntensityWeighting, run_type=run_type)
+
+    def benchmark(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+        image = check_volume(image)
+        return super().benchmark(image, magnification, radius, sensitivity, doIntensityWeighting)
+
+    def run_stream(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True, out=None, run_type=None):
+        """
+        Calculates the 3D radial gradient convergence one frame at a time, writing each magnified volume to the
+        destination as soon as it is ready, so that only a single frame of the output is held in memory
+        :param image: The volume or sequence of volumes to process, see run
+        :param magnification: The magnification factor, applied along all three axes
+        :param radius: The radius (fwhm) of the convergence neighbourhood, in voxels
+        :param sensitivity: The sensitivity exponent
+        :param doIntensityWeighting: Whether to weight the convergence by the interpolated intensity
+        :param out: Destination with shape (frames, slices * M, rows * M, cols * M) supporting slice assignment
+            (e.g. np.ndarray, np.memmap or a chunked zarr array); a str is used as the path of a .npy file opened as
+            a memory-map; if None, a new array is allocated
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The destination array
+        """
+        image = check_volume(image)
+        shape = (image.shape[0],) + tuple(s * magnification for s in image.shape[1:])
+
+        if out is None:
+            out = np.zeros(shape, dtype=np.float32)
+        elif type(out) is str:
+            out = np.lib.format.open_memmap(out, mode="w+", dtype=np.float32, shape=shape)
+
+        if tuple(out.shape) != shape:
+            raise ValueError(f"Destination shape {tuple(out.shape)} does not match {shape}")
+
+        for f in range(image.shape[0]):
+            out[f] = self._run(image[f:f + 1], magnification, radius, sensitivity, doIntensityWeighting, run_type=run_type)[0]
+
+        if hasattr(out, "flush"):
+            out.flush()
+
+        return out
+
+    def _run_opencl(self, image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+
+        image = np.ascontiguousarray(image, dtype=np.float32)
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * magnification
+        cdef int rowsM = rows * magnification
+        cdef int colsM = cols * magnification
+
+        code = self._get_cl_code("_le_radial_gradient_convergence_3d_.cl")
+        prg = cl.Program(cl_ctx, code).build()
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+
+        # the magnified output is the largest buffer, process as many frames as fit in one
+        max_frames = max(1, cl_ctx.devices[0].max_mem_alloc_size // (slicesM * rowsM * colsM * 4))
+
+        for f0 in range(0, nFrames, max_frames):
+            chunk = image[f0:f0 + max_frames]
+            n = chunk.shape[0]
+
+            image_in = cl_array.to_device(cl_queue, chunk)
+            gradient_col = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            gradient_row = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            gradient_slice = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            rgc_out = cl_array.empty(cl_queue, (n * slicesM, rowsM, colsM), dtype=np.float32)
+
+            prg.gradient_3d(cl_queue, (n * slices, rows, cols), None, image_in.data, gradient_col.data, gradient_row.data, gradient_slice.data, np.int32(slices))
+            prg.calculate_rgc_3d(
+                cl_queue,
+                rgc_out.shape,
+                None,
+                gradient_col.data,
+                gradient_row.data,
+                gradient_slice.data,
+                image_in.data,
+                rgc_out.data,
+                np.int32(slices),
+                np.int32(rows),
+                np.int32(cols),
+                np.int32(magnification),
+                np.float32(Gx_Gy_MAGNIFICATION),
+                np.float32(fwhm),
+                np.float32(tSO),
+                np.float32(tSS),
+                np.float32(sensitivity),
+                np.int32(doIntensityWeighting),
+            )
+
+            # Wait for queue to finish
+            cl_queue.finish()
+            rgc_map[f0:f0 + n] = rgc_out.get().reshape((n, slicesM, rowsM, colsM))
+
+        return rgc_map
+
+    # tag-start: _le_radial_gradient_convergence_3d.RadialGradientConvergence3D._run_unthreaded
+    def _run_unthreaded(self, float[:,:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+        cdef int _magnification = magnification
+        cdef float _sensitivity = sensitivity
+        cdef int _doIntensityWeighting = doIntensityWeighting
+
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * _magnification
+        cdef int rowsM = rows * _magnification
+        cdef int colsM = cols * _magnification
+
+        # _c_gradient_3d does not write the last slice, row and column
+        cdef float[:,:,:,:] gradient_col = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_row = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_slice = np.zeros_like(image)
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+        cdef float[:,:,:,:] _rgc_map = rgc_map
+
+        cdef int f, p, zM, rM, cM
+        cdef float intensity
+        with nogil:
+            for f in range(nFrames):
+                _c_gradient_3d(&image[f,0,0,0], &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], slices, rows, cols)
+
+            # each iteration is a magnified z-slab, so single volumes are also split over the threads
+            for p in range(nFrames * slicesM):
+                f = p // slicesM
+                zM = p % slicesM
+                for rM in range(rowsM):
+                    for cM in range(colsM):
+                        _rgc_map[f, zM, rM, cM] = _c_calculate_rgc_3d(cM, rM, zM, &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], cols, rows, slices, _magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, _sensitivity)
+                        if _doIntensityWeighting:
+                            intensity = _c_interpolate_trilinear(&image[f,0,0,0], (zM + 0.5) / _magnification - 0.5, (rM + 0.5) / _magnification - 0.5, (cM + 0.5) / _magnification - 0.5, slices, rows, cols)
+                            _rgc_map[f, zM, rM, cM] = _rgc_map[f, zM, rM, cM] * intensity
+
+        return rgc_map
+    # tag-end
+
+    # tag-copy: _le_radial_gradient_convergence_3d.RadialGradientConvergence3D._run_unthreaded; replace('_run_unthreaded', '_run_threaded'); replace('range(nFrames', 'prange(nFrames')
+    def _run_threaded(self, float[:,:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+        cdef int _magnification = magnification
+        cdef float _sensitivity = sensitivity
+        cdef int _doIntensityWeighting = doIntensityWeighting
+
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * _magnification
+        cdef int rowsM = rows * _magnification
+        cdef int colsM = cols * _magnification
+
+        # _c_gradient_3d does not write the last slice, row and column
+        cdef float[:,:,:,:] gradient_col = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_row = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_slice = np.zeros_like(image)
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+        cdef float[:,:,:,:] _rgc_map = rgc_map
+
+        cdef int f, p, zM, rM, cM
+        cdef float intensity
+        with nogil:
+            for f in prange(nFrames):
+                _c_gradient_3d(&image[f,0,0,0], &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], slices, rows, cols)
+
+            # each iteration is a magnified z-slab, so single volumes are also split over the threads
+            for p in prange(nFrames * slicesM):
+                f = p // slicesM
+                zM = p % slicesM
+                for rM in range(rowsM):
+                    for cM in range(colsM):
+                        _rgc_map[f, zM, rM, cM] = _c_calculate_rgc_3d(cM, rM, zM, &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], cols, rows, slices, _magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, _sensitivity)
+                        if _doIntensityWeighting:
+                            intensity = _c_interpolate_trilinear(&image[f,0,0,0], (zM + 0.5) / _magnification - 0.5, (rM + 0.5) / _magnification - 0.5, (cM + 0.5) / _magnification - 0.5, slices, rows, cols)
+                            _rgc_map[f, zM, rM, cM] = _rgc_map[f, zM, rM, cM] * intensity
+
+        return rgc_map
+    # tag-end
+
+    # tag-copy: _le_radial_gradient_convergence_3d.RadialGradientConvergence3D._run_unthreaded; replace('_run_unthreaded', '_run_threaded_static'); replace('range(nFrames)', 'prange(nFrames, schedule="static")'); replace('range(nFrames * slicesM)', 'prange(nFrames * slicesM, schedule="static")')
+    def _run_threaded_static(self, float[:,:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+        cdef int _magnification = magnification
+        cdef float _sensitivity = sensitivity
+        cdef int _doIntensityWeighting = doIntensityWeighting
+
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * _magnification
+        cdef int rowsM = rows * _magnification
+        cdef int colsM = cols * _magnification
+
+        # _c_gradient_3d does not write the last slice, row and column
+        cdef float[:,:,:,:] gradient_col = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_row = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_slice = np.zeros_like(image)
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+        cdef float[:,:,:,:] _rgc_map = rgc_map
+
+        cdef int f, p, zM, rM, cM
+        cdef float intensity
+        with nogil:
+            for f in prange(nFrames, schedule="static"):
+                _c_gradient_3d(&image[f,0,0,0], &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], slices, rows, cols)
+
+            # each iteration is a magnified z-slab, so single volumes are also split over the threads
+            for p in prange(nFrames * slicesM, schedule="static"):
+                f = p // slicesM
+                zM = p % slicesM
+                for rM in range(rowsM):
+                    for cM in range(colsM):
+                        _rgc_map[f, zM, rM, cM] = _c_calculate_rgc_3d(cM, rM, zM, &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], cols, rows, slices, _magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, _sensitivity)
+                        if _doIntensityWeighting:
+                            intensity = _c_interpolate_trilinear(&image[f,0,0,0], (zM + 0.5) / _magnification - 0.5, (rM + 0.5) / _magnification - 0.5, (cM + 0.5) / _magnification - 0.5, slices, rows, cols)
+                            _rgc_map[f, zM, rM, cM] = _rgc_map[f, zM, rM, cM] * intensity
+
+        return rgc_map
+    # tag-end
+
+    # tag-copy: _le_radial_gradient_convergence_3d.RadialGradientConvergence3D._run_unthreaded; replace('_run_unthreaded', '_run_threaded_dynamic'); replace('range(nFrames)', 'prange(nFrames, schedule="dynamic")'); replace('range(nFrames * slicesM)', 'prange(nFrames * slicesM, schedule="dynamic")')
+    def _run_threaded_dynamic(self, float[:,:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+        cdef int _magnification = magnification
+        cdef float _sensitivity = sensitivity
+        cdef int _doIntensityWeighting = doIntensityWeighting
+
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * _magnification
+        cdef int rowsM = rows * _magnification
+        cdef int colsM = cols * _magnification
+
+        # _c_gradient_3d does not write the last slice, row and column
+        cdef float[:,:,:,:] gradient_col = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_row = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_slice = np.zeros_like(image)
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+        cdef float[:,:,:,:] _rgc_map = rgc_map
+
+        cdef int f, p, zM, rM, cM
+        cdef float intensity
+        with nogil:
+            for f in prange(nFrames, schedule="dynamic"):
+                _c_gradient_3d(&image[f,0,0,0], &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], slices, rows, cols)
+
+            # each iteration is a magnified z-slab, so single volumes are also split over the threads
+            for p in prange(nFrames * slicesM, schedule="dynamic"):
+                f = p // slicesM
+                zM = p % slicesM
+                for rM in range(rowsM):
+                    for cM in range(colsM):
+                        _rgc_map[f, zM, rM, cM] = _c_calculate_rgc_3d(cM, rM, zM, &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], cols, rows, slices, _magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, _sensitivity)
+                        if _doIntensityWeighting:
+                            intensity = _c_interpolate_trilinear(&image[f,0,0,0], (zM + 0.5) / _magnification - 0.5, (rM + 0.5) / _magnification - 0.5, (cM + 0.5) / _magnification - 0.5, slices, rows, cols)
+                            _rgc_map[f, zM, rM, cM] = _rgc_map[f, zM, rM, cM] * intensity
+
+        return rgc_map
+    # tag-end
+
+    # tag-copy: _le_radial_gradient_convergence_3d.RadialGradientConvergence3D._run_unthreaded; replace('_run_unthreaded', '_run_threaded_guided'); replace('range(nFrames)', 'prange(nFrames, schedule="guided")'); replace('range(nFrames * slicesM)', 'prange(nFrames * slicesM, schedule="guided")')
+    def _run_threaded_guided(self, float[:,:,:,:] image, magnification: int = 5, radius: float = 1.5, sensitivity: float = 1, doIntensityWeighting: bool = True):
+
+        cdef float sigma = radius / 2.355
+        cdef float fwhm = radius
+        cdef float tSS = 2 * sigma * sigma
+        cdef float tSO = 2 * sigma + 1
+        cdef float Gx_Gy_MAGNIFICATION = 2.0
+        cdef int _magnification = magnification
+        cdef float _sensitivity = sensitivity
+        cdef int _doIntensityWeighting = doIntensityWeighting
+
+        cdef int nFrames = image.shape[0]
+        cdef int slices = image.shape[1]
+        cdef int rows = image.shape[2]
+        cdef int cols = image.shape[3]
+        cdef int slicesM = slices * _magnification
+        cdef int rowsM = rows * _magnification
+        cdef int colsM = cols * _magnification
+
+        # _c_gradient_3d does not write the last slice, row and column
+        cdef float[:,:,:,:] gradient_col = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_row = np.zeros_like(image)
+        cdef float[:,:,:,:] gradient_slice = np.zeros_like(image)
+
+        rgc_map = np.empty((nFrames, slicesM, rowsM, colsM), dtype=np.float32)
+        cdef float[:,:,:,:] _rgc_map = rgc_map
+
+        cdef int f, p, zM, rM, cM
+        cdef float intensity
+        with nogil:
+            for f in prange(nFrames, schedule="guided"):
+                _c_gradient_3d(&image[f,0,0,0], &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], slices, rows, cols)
+
+            # each iteration is a magnified z-slab, so single volumes are also split over the threads
+            for p in prange(nFrames * slicesM, schedule="guided"):
+                f = p // slicesM
+                zM = p % slicesM
+                for rM in range(rowsM):
+                    for cM in range(colsM):
+                        _rgc_map[f, zM, rM, cM] = _c_calculate_rgc_3d(cM, rM, zM, &gradient_col[f,0,0,0], &gradient_row[f,0,0,0], &gradient_slice[f,0,0,0], cols, rows, slices, _magnification, Gx_Gy_MAGNIFICATION, fwhm, tSO, tSS, _sensitivity)
+                        if _doIntensityWeighting:
+                            intensity = _c_interpolate_trilinear(&image[f,0,0,0], (zM + 0.5) / _magnification - 0.5, (rM + 0.5) / _magnification - 0.5, (cM + 0.5) / _magnification - 0.5, slices, rows, cols)
+                            _rgc_map[f, zM, rM, cM] = _rgc_map[f, zM, rM, cM] * intensity
+
+        return rgc_map
+    # tag-end
@@ -0,0 +1,186 @@
+float _c_calculate_rgc_3d(int xM, int yM, int zM, __global float *imGx, __global float *imGy, __global float *imGz, int w, int h, int d, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity);
+double _c_calculate_dk_3d(float Gx, float Gy, float Gz, float dx, float dy, float dz, float distance);
+double _c_calculate_dw(double distance, double tSS);
+float _c_interpolate_trilinear(__global float *volume, float z, float y, float x, int d, int h, int w);
+// c2cl-function: _c_interpolate_trilinear from _c_sr_radial_gradient_convergence.c
+float _c_interpolate_trilinear(__global float *volume, float z, float y, float x, int d, int h, int w) {
+    z = fmin(fmax(z, 0.0f), (float)(d - 1));
+    y = fmin(fmax(y, 0.0f), (float)(h - 1));
+    x = fmin(fmax(x, 0.0f), (float)(w - 1));
+
+    int z0 = (int)z;
+    int y0 = (int)y;
+    int x0 = (int)x;
+    int z1 = z0 + 1 < d ? z0 + 1 : z0;
+    int y1 = y0 + 1 < h ? y0 + 1 : y0;
+    int x1 = x0 + 1 < w ? x0 + 1 : x0;
+    float fz = z - z0;
+    float fy = y - y0;
+    float fx = x - x0;
+
+    long hw = (long)h * w;
+    float c00 = volume[z0 * hw + y0 * w + x0] * (1 - fx) + volume[z0 * hw + y0 * w + x1] * fx;
+    float c01 = volume[z0 * hw + y1 * w + x0] * (1 - fx) + volume[z0 * hw + y1 * w + x1] * fx;
+    float c10 = volume[z1 * hw + y0 * w + x0] * (1 - fx) + volume[z1 * hw + y0 * w + x1] * fx;
+    float c11 = volume[z1 * hw + y1 * w + x0] * (1 - fx) + volume[z1 * hw + y1 * w + x1] * fx;
+
+    return (c00 * (1 - fy) + c01 * fy) * (1 - fz) + (c10 * (1 - fy) + c11 * fy) * fz;
+}
+
+// c2cl-function: _c_calculate_dw from _c_sr_radial_gradient_convergence.c
+double _c_calculate_dw(double distance, double tSS) {
+  return pow((distance * exp((-distance * distance) / tSS)), 4);
+}
+
+// c2cl-function: _c_calculate_dk_3d from _c_sr_radial_gradient_convergence.c
+double _c_calculate_dk_3d(float Gx, float Gy, float Gz, float dx, float dy, float dz, float distance) {
+    float cx = Gy * dz - Gz * dy;
+    float cy = Gz * dx - Gx * dz;
+    float cz = Gx * dy - Gy * dx;
+    float Dk = sqrt(cx * cx + cy * cy + cz * cz) / sqrt(Gx * Gx + Gy * Gy + Gz * Gz);
+    if (isnan(Dk)) {
+        Dk = distance;
+    }
+    Dk = 1 - Dk / distance;
+    return Dk;
+}
+
+// c2cl-function: _c_calculate_rgc_3d from _c_sr_radial_gradient_convergence.c
+float _c_calculate_rgc_3d(int xM, int yM, int zM, __global float *imGx, __global float *imGy, __global float *imGz, int w, int h, int d, int magnification, float Gx_Gy_MAGNIFICATION, float fwhm, float tSO, float tSS, float sensitivity) {
+
+    float vx, vy, vz, Gx, Gy, Gz, dx, dy, dz, distance, distanceWeight, GdotR, Dk;
+
+    float xc = (xM + 0.5) / magnification;
+    float yc = (yM + 0.5) / magnification;
+    float zc = (zM + 0.5) / magnification;
+
+    float RGC = 0;
+    float distanceWeightSum = 0;
+
+    int _start = -(int)(Gx_Gy_MAGNIFICATION * fwhm);
+    int _end = (int)(Gx_Gy_MAGNIFICATION * fwhm + 1);
+
+    for (int k = _start; k < _end; k++) {
+        vz = (int)(Gx_Gy_MAGNIFICATION * zc) + k;
+        vz /= Gx_Gy_MAGNIFICATION;
+
+        if (0 < vz && vz <= d - 1) {
+            for (int j = _start; j < _end; j++) {
+                vy = (int)(Gx_Gy_MAGNIFICATION * yc) + j;
+                vy /= Gx_Gy_MAGNIFICATION;
+
+                if (0 < vy && vy <= h - 1) {
+                    for (int i = _start; i < _end; i++) {
+                        vx = (int)(Gx_Gy_MAGNIFICATION * xc) + i;
+                        vx /= Gx_Gy_MAGNIFICATION;
+
+                        if (0 < vx && vx <= w - 1) {
+                            dx = vx - xc;
+                            dy = vy - yc;
+                            dz = vz - zc;
+                            distance = sqrt(dx * dx + dy * dy + dz * dz);
+
+                            if (distance != 0 && distance <= tSO) {
+                                // the last gradient of each axis (index n - 2) lies at n - 1
+                                Gx = _c_interpolate_trilinear(imGx, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+                                Gy = _c_interpolate_trilinear(imGy, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+                                Gz = _c_interpolate_trilinear(imGz, fmin(vz - 1, (float)(d - 2)), fmin(vy - 1, (float)(h - 2)), fmin(vx - 1, (float)(w - 2)), d, h, w);
+
+                                distanceWeight = _c_calculate_dw(distance, tSS);
+                                distanceWeightSum += distanceWeight;
+                                GdotR = Gx * dx + Gy * dy + Gz * dz;
+
+                                if (GdotR < 0) {
+                                    Dk = _c_calculate_dk_3d(Gx, Gy, Gz, dx, dy, dz, distance);
+                                    RGC += Dk * distanceWeight;
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    RGC /= distanceWeightSum;
+
+    if (RGC >= 0 && sensitivity > 1) {
+        RGC = pow(RGC, sensitivity);
+    } else if (RGC < 0) {
+        RGC = 0;
+    }
+
+    return RGC;
+}
+
+// same as _c_gradient_3d, one voxel per work item, with the last slice, row and column set to 0
+__kernel void gradient_3d(__global float *image, __global float *imGc,
+                          __global float *imGr, __global float *imGs,
+                          int slices) {
+
+  int fz = get_global_id(0);
+  int y_i = get_global_id(1);
+  int x_i = get_global_id(2);
+  int z_i = fz % slices;
+
+  int rows = get_global_size(1);
+  int cols = get_global_size(2);
+
+  long idx = (long)fz * rows * cols + y_i * cols + x_i;
+
+  if (z_i == slices - 1 || y_i == rows - 1 || x_i == cols - 1) {
+    imGc[idx] = 0;
+    imGr[idx] = 0;
+    imGs[idx] = 0;
+    return;
+  }
+
+  long slice = (long)rows * cols;
+  float ip0 = image[idx];
+  float ip1 = image[idx + 1];
+  float ip2 = image[idx + cols];
+  float ip3 = image[idx + cols + 1];
+  float ip4 = image[idx + slice];
+  float ip5 = image[idx + slice + 1];
+  float ip6 = image[idx + slice + cols];
+  float ip7 = image[idx + slice + cols + 1];
+
+  imGc[idx] = (ip1 + ip3 + ip5 + ip7 - ip0 - ip2 - ip4 - ip6) / 4;
+  imGr[idx] = (ip2 + ip3 + ip6 + ip7 - ip0 - ip1 - ip4 - ip5) / 4;
+  imGs[idx] = (ip4 + ip5 + ip6 + ip7 - ip0 - ip1 - ip2 - ip3) / 4;
+}
+
+__kernel void calculate_rgc_3d(__global float *imGc, __global float *imGr,
+                               __global float *imGs, __global float *image,
+                               __global float *image_out, int slices,
+                               int rows, int cols, int magnification,
+                               float Gx_Gy_MAGNIFICATION, float fwhm, float tSO,
+                               float tSS, float sensitivity,
+                               int doIntensityWeighting) {
+
+  int fzM = get_global_id(0);
+  int rM = get_global_id(1);
+  int cM = get_global_id(2);
+
+  int slicesM = slices * magnification;
+  int rowsM = get_global_size(1);
+  int colsM = get_global_size(2);
+
+  int f = fzM / slicesM;
+  int zM = fzM % slicesM;
+  long offset = (long)f * slices * rows * cols;
+
+  float rgc = _c_calculate_rgc_3d(cM, rM, zM, &imGc[offset], &imGr[offset],
+                                  &imGs[offset], cols, rows, slices,
+                                  magnification, Gx_Gy_MAGNIFICATION, fwhm,
+                                  tSO, tSS, sensitivity);
+
+  if (doIntensityWeighting == 1) {
+    rgc = rgc * _c_interpolate_trilinear(
+                    &image[offset], (zM + 0.5f) / magnification - 0.5f,
+                    (rM + 0.5f) / magnification - 0.5f,
+                    (cM + 0.5f) / magnification - 0.5f, slices, rows, cols);
+  }
+
+  image_out[(long)fzM * rowsM * colsM + rM * colsM + cM] = rgc;
+}
@@ -7,7 +7,9 @@ from cython.parallel import parallel, prange
 
 from libc.math cimport sqrt, pi, fabs, cos, sin
 from .__liquid_engine__ import LiquidEngine
-from .__interpolation_tools__ import check_image
+from .__interpolation_tools__ import check_batch, check_image, get_drift_shifts, restore_batch
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+from .__tiling__ import DEFAULT_MEMORY_BUDGET, get_active_pixels, get_active_runs, get_work_list, run_reduced
 from nanopyx.liquid import CRShiftAndMagnify
 from nanopyx.core.utils.timeit import timeit2
 
@@ -15,7 +17,7 @@ cdef extern from "_c_interpolation_catmull_rom.h":
     pass
 
 cdef extern from "_c_sr_radiality.h":
-    float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy, float* xRingCoordinates, float* yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w) nogil
+    float _c_calculate_radiality_per_subpixel(int i, int j, float* imGx, float* imGy, float* xRingCoordinates, float* yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w, float shift_row, float shift_col) nogil
 
 cdef extern from "_c_gradients.h":
     void _c_gradient_radiality(float* image, float* imGc, float* imGr, int rows,
@@ -25,10 +27,10 @@ cdef extern from "_c_gradients.h":
 
 class Radiality(LiquidEngine):
     """
-    Radial gradient convergence using the NanoPyx Liquid Engine
+    Radiality using the NanoPyx Liquid Engine
     """
 
-    _has_opencl = False
+    _has_opencl = True
     _has_threaded = True
     _has_threaded_static = True
     _has_threaded_dynamic = True
@@ -41,16 +43,160 @@ class Radiality(LiquidEngine):
         super().__init__()
     
     @timeit2
-    def run(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, run_type = None): 
-        image = check_image(image)
-        return self._run(image, magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting, run_type=run_type)
+    def run(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, mask = None, drift_table = None, run_type = None): 
+        """
+        Calculates the radiality
+        :param image: The image to process, with shape (rows, cols), (nFrames, rows, cols) or a batch of sequences such as
+            (channels, nFrames, rows, cols), whose frames are all processed in a single pass, see check_batch
+        :param magnification: The magnification factor
+        :param ringRadius: The radius of the ring used to calculate the radiality, in pixels
+        :param border: Number of border pixels that are not calculated
+        :param radialityPositivityConstraint: Whether negative radiality is set to 0
+        :param doIntensityWeighting: Whether to weight the radiality by the interpolated intensity
+        :param mask: If set, only the magnified pixels of the active low resolution pixels are calculated and the
+            others are 0; either an intensity threshold, grown by the ring radius, or a boolean region of interest
+            with shape (rows, cols) or (nFrames, rows, cols), see __tiling__.get_work_list
+        :param drift_table: If set, the drift of each frame is corrected while the image is magnified and the
+            gradients are sampled, instead of resampling the frames with DriftCorrector.apply_correction first; a
+            drift table with shape (nFrames, 3), see __interpolation_tools__.get_drift_shifts
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The radiality map, with the batch axes of the image
+        """
+        image, batch_shape = check_batch(image)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0], batch_shape)
+        active_runs = get_work_list(image, mask, int(np.ceil(ringRadius)) + 1, shift_row, shift_col)
+        return restore_batch(self._run(image, magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting, active_runs, shift_row, shift_col, run_type=run_type), batch_shape)
     
-    def benchmark(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True): 
+    def benchmark(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, mask = None, drift_table = None): 
+        image, batch_shape = check_batch(image)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0], batch_shape)
+        active_runs = get_work_list(image, mask, int(np.ceil(ringRadius)) + 1, shift_row, shift_col)
+        results = super().benchmark(image, magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting, active_runs, shift_row, shift_col)
+        return [[run_time, run_type, restore_batch(out, batch_shape)] for run_time, run_type, out in results]
+
+    def run_reduced(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, reduction="mean", frames_per_timepoint: int = 0, frames_per_chunk: int = None, memory_budget=DEFAULT_MEMORY_BUDGET, drift_table=None, run_type=None):
+        """
+        Calculates the radiality and reduces it along time as the frames are processed, so that only a chunk of
+        the per-frame radiality maps is kept in memory
+        :param image: The image to process
+        :param magnification: The magnification factor
+        :param ringRadius: The radius of the ring used to calculate the radiality, in pixels
+        :param border: Number of border pixels that are not calculated
+        :param radialityPositivityConstraint: Whether negative radiality is set to 0
+        :param doIntensityWeighting: Whether to weight the radiality by the interpolated intensity
+        :param reduction: The temporal reduction ("mean", "max", "var", "tac2", "ac2", "ac3", "ac4", "pps" or an
+            SRRF order), see nanopyx.core.transform.sr_temporal_correlations.TemporalReduction
+        :param frames_per_timepoint: Number of frames reduced into each output frame, 0 uses all the frames
+        :param frames_per_chunk: Number of frames processed at once, if None it is calculated from the memory budget
+        :param memory_budget: Maximum number of bytes used by a chunk
+        :param drift_table: Drift table corrected while the frames are magnified, see run
+        :param run_type: The run type to use, if None the fastest is chosen
+        :return: The reduced radiality maps, with shape (nTimepoints, rows * M, cols * M)
+        """
         image = check_image(image)
-        return super().benchmark(image, magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting)
+        shift_row, shift_col = get_drift_shifts(drift_table, image.shape[0])
+
+        def _run_chunk(chunk, f0, f1):
+            return self._run(chunk, magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting, None, shift_row[f0:f1], shift_col[f0:f1], run_type=run_type)
+
+        # input and gradients, the image and radiality at M, and the float64 lagged products of the reduction
+        bytes_per_pixel = 4 * (3 + 2 * magnification**2) + 8 * 16 * magnification**2
+        bytes_per_frame = image.shape[1] * image.shape[2] * bytes_per_pixel
+        return run_reduced(_run_chunk, image, reduction, frames_per_timepoint, frames_per_chunk, bytes_per_frame, memory_budget)
     
-     # tag-start: _le_radiality.Radiality._run_unthreaded
-    def _run_unthreaded(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True):
+    def _run_opencl(self, image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
+
+        cdef int nRingCoordinates = 12
+        cdef float _ringRadius = ringRadius * magnification
+        angles = (np.pi * 2. / nRingCoordinates) * np.arange(nRingCoordinates)
+        xRingCoordinates = np.ascontiguousarray(np.cos(angles) * _ringRadius, dtype=np.float32)
+        yRingCoordinates = np.ascontiguousarray(np.sin(angles) * _ringRadius, dtype=np.float32)
+
+        image = np.ascontiguousarray(image, dtype=np.float32)
+        cdef int nFrames = image.shape[0]
+        cdef int h = image.shape[1]
+        cdef int w = image.shape[2]
+
+        code = self._get_cl_code("_le_radiality_.cl")
+        prg = cl.Program(cl_ctx, code).build()
+
+        imRad = np.empty((nFrames, h * magnification, w * magnification), dtype=np.float32)
+
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+
+        # the radiality map is the largest buffer, process as many frames as fit in one
+        max_frames = max(1, cl_ctx.devices[0].max_mem_alloc_size // (h * magnification * w * magnification * 4))
+
+        xRing_in = cl_array.to_device(cl_queue, xRingCoordinates)
+        yRing_in = cl_array.to_device(cl_queue, yRingCoordinates)
+
+        if active_runs is not None:
+            # one work item per magnified pixel of the active low resolution pixels, ordered by frame
+            active_pixels = get_active_pixels(active_runs)
+
+        for f0 in range(0, nFrames, max_frames):
+            chunk = image[f0:f0 + max_frames]
+            n = chunk.shape[0]
+
+            if active_runs is None:
+                global_size = (n, h * magnification, w * magnification)
+                masked_args = ()
+            else:
+                p0, p1 = np.searchsorted(active_pixels[:, 0], [f0, f0 + n])
+                if p0 == p1:
+                    imRad[f0:f0 + n] = 0
+                    continue
+                chunk_pixels = active_pixels[p0:p1].copy()
+                chunk_pixels[:, 0] -= f0
+                active_pixels_in = cl_array.to_device(cl_queue, chunk_pixels)
+                global_size = (p1 - p0, magnification, magnification)
+                masked_args = (active_pixels_in.data,)
+
+            image_in = cl_array.to_device(cl_queue, chunk)
+            shift_row_in = cl_array.to_device(cl_queue, np.ascontiguousarray(shift_row[f0:f0 + n], dtype=np.float32))
+            shift_col_in = cl_array.to_device(cl_queue, np.ascontiguousarray(shift_col[f0:f0 + n], dtype=np.float32))
+            imGx = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            imGy = cl_array.empty(cl_queue, chunk.shape, dtype=np.float32)
+            if active_runs is None:
+                imRad_out = cl_array.empty(cl_queue, (n, h * magnification, w * magnification), dtype=np.float32)
+            else:
+                imRad_out = cl_array.zeros(cl_queue, (n, h * magnification, w * magnification), dtype=np.float32)
+
+            prg.gradient_radiality(cl_queue, chunk.shape, None, image_in.data, imGx.data, imGy.data)
+            radiality = prg.radiality if active_runs is None else prg.radiality_masked
+            radiality(
+                cl_queue,
+                global_size,
+                None,
+                image_in.data,
+                imGx.data,
+                imGy.data,
+                imRad_out.data,
+                xRing_in.data,
+                yRing_in.data,
+                np.int32(magnification),
+                np.float32(_ringRadius),
+                np.int32(nRingCoordinates),
+                np.int32(radialityPositivityConstraint),
+                np.int32(border),
+                np.int32(h),
+                np.int32(w),
+                np.int32(doIntensityWeighting),
+                shift_row_in.data,
+                shift_col_in.data,
+                *masked_args,
+            )
+
+            # Wait for queue to finish
+            cl_queue.finish()
+            imRad[f0:f0 + n] = imRad_out.get()
+
+        return imRad
+
+    # tag-start: _le_radiality.Radiality._run_unthreaded
+    def _run_unthreaded(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
 
         cdef int _magnification = magnification
         cdef int _border = border
@@ -70,29 +216,51 @@ class Radiality(LiquidEngine):
         cdef int h = image.shape[1]
         cdef int w = image.shape[2]
 
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
         
         cdef float [:,:,:] imGx = np.zeros_like(image) 
         cdef float [:,:,:] imGy = np.zeros_like(image)
         cdef float [:,:,:] imRad = np.zeros((nFrames, h*magnification, w*magnification), dtype=np.float32)
 
-        cdef int f, j, i
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels, with the frames
+        # and rows collapsed into a single loop so that stacks of small frames also fill the cores;
+        # pixels outside of the runs or within the border are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, h, w))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int rowStart = (1 + _border) * _magnification
+        cdef int colStart = (1 + _border) * _magnification
+        cdef int rowEnd = (h - 1 - _border) * _magnification
+        cdef int colEnd = (w - 1 - _border) * _magnification
+
+        cdef int f, p, j, i
         with nogil:
             for f in range(nFrames):
-                 _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
-                 for j in range((1 + _border) * _magnification, (h - 1 - _border) * _magnification):
-                    for i in range((1 + _border) * _magnification, (w - 1 - _border) * _magnification):
+                _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
+
+            for p in range(nRuns):
+                f = _active_runs[p, 0]
+                for j in range(max(rowStart, _active_runs[p, 1] * _magnification), min(rowEnd, (_active_runs[p, 1] + 1) * _magnification)):
+                    for i in range(max(colStart, _active_runs[p, 2] * _magnification), min(colEnd, _active_runs[p, 3] * _magnification)):
                         if _doIntensityWeighting:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w) * image_interp[f, j, i]
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f]) * image_interp[f, j, i]
                         else:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w)
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f])
 
         return imRad
         # tag-end
 
-    # tag-copy:  _le_radiality.Radiality._run_unthreaded; replace("_run_unthreaded", "_run_threaded"); replace("range((1 + _border) * _magnification, (h - 1 - _border) * _magnification)", "prange((1 + _border) * _magnification, (h - 1 - _border) * _magnification)")
-    def _run_threaded(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True):
+    # tag-copy: _le_radiality.Radiality._run_unthreaded; replace('_run_unthreaded', '_run_threaded'); replace('range(nFrames)', 'prange(nFrames)'); replace('range(nRuns)', 'prange(nRuns)')
+    def _run_threaded(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
 
         cdef int _magnification = magnification
         cdef int _border = border
@@ -112,30 +280,51 @@ class Radiality(LiquidEngine):
         cdef int h = image.shape[1]
         cdef int w = image.shape[2]
 
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
         
         cdef float [:,:,:] imGx = np.zeros_like(image) 
         cdef float [:,:,:] imGy = np.zeros_like(image)
         cdef float [:,:,:] imRad = np.zeros((nFrames, h*magnification, w*magnification), dtype=np.float32)
 
-        cdef int f, j, i
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels, with the frames
+        # and rows collapsed into a single loop so that stacks of small frames also fill the cores;
+        # pixels outside of the runs or within the border are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, h, w))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int rowStart = (1 + _border) * _magnification
+        cdef int colStart = (1 + _border) * _magnification
+        cdef int rowEnd = (h - 1 - _border) * _magnification
+        cdef int colEnd = (w - 1 - _border) * _magnification
+
+        cdef int f, p, j, i
         with nogil:
-            for f in range(nFrames):
-                 _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
-                 for j in prange((1 + _border) * _magnification, (h - 1 - _border) * _magnification):
-                    for i in range((1 + _border) * _magnification, (w - 1 - _border) * _magnification):
+            for f in prange(nFrames):
+                _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
+
+            for p in prange(nRuns):
+                f = _active_runs[p, 0]
+                for j in range(max(rowStart, _active_runs[p, 1] * _magnification), min(rowEnd, (_active_runs[p, 1] + 1) * _magnification)):
+                    for i in range(max(colStart, _active_runs[p, 2] * _magnification), min(colEnd, _active_runs[p, 3] * _magnification)):
                         if _doIntensityWeighting:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w) * image_interp[f, j, i]
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f]) * image_interp[f, j, i]
                         else:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w)
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f])
 
         return imRad
         # tag-end
 
-
-        #TODO: fix tag2tag, it couldnt replace by a prange(start,end,schedule)
-    def _run_threaded_static(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True):
+    # tag-copy: _le_radiality.Radiality._run_unthreaded; replace('_run_unthreaded', '_run_threaded_static'); replace('range(nFrames)', 'prange(nFrames, schedule="static")'); replace('range(nRuns)', 'prange(nRuns, schedule="static")')
+    def _run_threaded_static(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
 
         cdef int _magnification = magnification
         cdef int _border = border
@@ -155,27 +344,51 @@ class Radiality(LiquidEngine):
         cdef int h = image.shape[1]
         cdef int w = image.shape[2]
 
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
         
         cdef float [:,:,:] imGx = np.zeros_like(image) 
         cdef float [:,:,:] imGy = np.zeros_like(image)
         cdef float [:,:,:] imRad = np.zeros((nFrames, h*magnification, w*magnification), dtype=np.float32)
 
-        cdef int f, j, i
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels, with the frames
+        # and rows collapsed into a single loop so that stacks of small frames also fill the cores;
+        # pixels outside of the runs or within the border are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, h, w))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int rowStart = (1 + _border) * _magnification
+        cdef int colStart = (1 + _border) * _magnification
+        cdef int rowEnd = (h - 1 - _border) * _magnification
+        cdef int colEnd = (w - 1 - _border) * _magnification
+
+        cdef int f, p, j, i
         with nogil:
-            for f in range(nFrames):
+            for f in prange(nFrames, schedule="static"):
                 _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
-                for j in prange((1 + _border) * _magnification, (h - 1 - _border) * _magnification, schedule = "static"):
-                    for i in range((1 + _border) * _magnification, (w - 1 - _border) * _magnification):
+
+            for p in prange(nRuns, schedule="static"):
+                f = _active_runs[p, 0]
+                for j in range(max(rowStart, _active_runs[p, 1] * _magnification), min(rowEnd, (_active_runs[p, 1] + 1) * _magnification)):
+                    for i in range(max(colStart, _active_runs[p, 2] * _magnification), min(colEnd, _active_runs[p, 3] * _magnification)):
                         if _doIntensityWeighting:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w) * image_interp[f, j, i]
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f]) * image_interp[f, j, i]
                         else:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w)
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f])
 
         return imRad
+        # tag-end
 
-    def _run_threaded_dynamic(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True):
+    # tag-copy: _le_radiality.Radiality._run_unthreaded; replace('_run_unthreaded', '_run_threaded_dynamic'); replace('range(nFrames)', 'prange(nFrames, schedule="dynamic")'); replace('range(nRuns)', 'prange(nRuns, schedule="dynamic")')
+    def _run_threaded_dynamic(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
 
         cdef int _magnification = magnification
         cdef int _border = border
@@ -195,27 +408,51 @@ class Radiality(LiquidEngine):
         cdef int h = image.shape[1]
         cdef int w = image.shape[2]
 
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
         
         cdef float [:,:,:] imGx = np.zeros_like(image) 
         cdef float [:,:,:] imGy = np.zeros_like(image)
         cdef float [:,:,:] imRad = np.zeros((nFrames, h*magnification, w*magnification), dtype=np.float32)
 
-        cdef int f, j, i
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels, with the frames
+        # and rows collapsed into a single loop so that stacks of small frames also fill the cores;
+        # pixels outside of the runs or within the border are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, h, w))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int rowStart = (1 + _border) * _magnification
+        cdef int colStart = (1 + _border) * _magnification
+        cdef int rowEnd = (h - 1 - _border) * _magnification
+        cdef int colEnd = (w - 1 - _border) * _magnification
+
+        cdef int f, p, j, i
         with nogil:
-            for f in range(nFrames):
-                 _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
-                 for j in prange((1 + _border) * _magnification, (h - 1 - _border) * _magnification, schedule = "dynamic"):
-                    for i in range((1 + _border) * _magnification, (w - 1 - _border) * _magnification):
+            for f in prange(nFrames, schedule="dynamic"):
+                _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
+
+            for p in prange(nRuns, schedule="dynamic"):
+                f = _active_runs[p, 0]
+                for j in range(max(rowStart, _active_runs[p, 1] * _magnification), min(rowEnd, (_active_runs[p, 1] + 1) * _magnification)):
+                    for i in range(max(colStart, _active_runs[p, 2] * _magnification), min(colEnd, _active_runs[p, 3] * _magnification)):
                         if _doIntensityWeighting:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w) * image_interp[f, j, i]
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f]) * image_interp[f, j, i]
                         else:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w)
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f])
 
         return imRad
+        # tag-end
 
-    def _run_threaded_guided(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True):
+    # tag-copy: _le_radiality.Radiality._run_unthreaded; replace('_run_unthreaded', '_run_threaded_guided'); replace('range(nFrames)', 'prange(nFrames, schedule="guided")'); replace('range(nRuns)', 'prange(nRuns, schedule="guided")')
+    def _run_threaded_guided(self, float[:,:,:] image, magnification: int = 5, ringRadius: float = 0.5, border: int = 0, radialityPositivityConstraint: bool = True, doIntensityWeighting: bool = True, active_runs = None, shift_row = None, shift_col = None):
 
         cdef int _magnification = magnification
         cdef int _border = border
@@ -235,22 +472,45 @@ class Radiality(LiquidEngine):
         cdef int h = image.shape[1]
         cdef int w = image.shape[2]
 
+        # per frame drift correction, applied by the magnification and the sampling of the gradients
+        if shift_row is None:
+            shift_row, shift_col = get_drift_shifts(None, nFrames)
+        cdef float[:] _shift_row = shift_row
+        cdef float[:] _shift_col = shift_col
+
         crsm = CRShiftAndMagnify()
-        cdef float [:,:,:] image_interp = crsm.run(image, 0, 0, magnification, magnification)
+        cdef float [:,:,:] image_interp = crsm.run(image, shift_row, shift_col, magnification, magnification)
         
         cdef float [:,:,:] imGx = np.zeros_like(image) 
         cdef float [:,:,:] imGy = np.zeros_like(image)
         cdef float [:,:,:] imRad = np.zeros((nFrames, h*magnification, w*magnification), dtype=np.float32)
 
-        cdef int f, j, i
+        # work list of (frame, row, first column, last column + 1) runs of low resolution pixels, with the frames
+        # and rows collapsed into a single loop so that stacks of small frames also fill the cores;
+        # pixels outside of the runs or within the border are left at 0
+        if active_runs is None:
+            active_runs = get_active_runs((nFrames, h, w))
+        cdef int[:,::1] _active_runs = active_runs
+        cdef int nRuns = active_runs.shape[0]
+
+        cdef int rowStart = (1 + _border) * _magnification
+        cdef int colStart = (1 + _border) * _magnification
+        cdef int rowEnd = (h - 1 - _border) * _magnification
+        cdef int colEnd = (w - 1 - _border) * _magnification
+
+        cdef int f, p, j, i
         with nogil:
-            for f in range(nFrames):
-                 _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
-                 for j in prange((1 + _border) * _magnification, (h - 1 - _border) * _magnification, schedule = "guided"):
-                    for i in range((1 + _border) * _magnification, (w - 1 - _border) * _magnification):
+            for f in prange(nFrames, schedule="guided"):
+                _c_gradient_radiality(&image[f,0,0], &imGx[f,0,0], &imGy[f,0,0], h, w)
+
+            for p in prange(nRuns, schedule="guided"):
+                f = _active_runs[p, 0]
+                for j in range(max(rowStart, _active_runs[p, 1] * _magnification), min(rowEnd, (_active_runs[p, 1] + 1) * _magnification)):
+                    for i in range(max(colStart, _active_runs[p, 2] * _magnification), min(colEnd, _active_runs[p, 3] * _magnification)):
                         if _doIntensityWeighting:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w) * image_interp[f, j, i]
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f]) * image_interp[f, j, i]
                         else:
-                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w)
+                            imRad[f,j,i] = _c_calculate_radiality_per_subpixel(i, j, &imGx[f,0,0], &imGy[f,0,0], xRingCoordinates, yRingCoordinates, _magnification, _ringRadius, nRingCoordinates, _radialityPositivityConstraint, h, w, _shift_row[f], _shift_col[f])
 
-        return imRad
\ No newline at end of file
+        return imRad
+        # tag-end
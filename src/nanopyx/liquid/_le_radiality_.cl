@@ -0,0 +1,205 @@
+float _c_calculate_radiality_per_subpixel(int i, int j, __global float *imGx, __global float *imGy, __global float *xRingCoordinates, __global float *yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w, float shift_row, float shift_col);
+float _c_calculate_dk(float x, float y, float xc, float yc, float vGx, float vGy, float GMag, float ringRadius);
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols);
+double _c_cubic(double v);
+// c2cl-function: _c_cubic from _c_interpolation_catmull_rom.c
+double _c_cubic(double v) {
+  double a = 0.5;
+  double z = 0;
+  if (v < 0) {
+    v = -v;
+  }
+  if (v < 1) {
+    z = v * v * (v * (-a + 2) + (a - 3)) + 1;
+  } else if (v < 2) {
+    z = -a * v * v * v + 5 * a * v * v - 8 * a * v + 4 * a;
+  }
+  return z;
+}
+
+// c2cl-function: _c_interpolate from _c_interpolation_catmull_rom.c
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols) {
+  // return 0 if r OR c positions do not exist in image
+  if (r < 0 || r >= rows || c < 0 || c >= cols) {
+    return 0;
+  }
+
+  const int r_int = (int)floor(r - 0.5);
+  const int c_int = (int)floor(c - 0.5);
+  double q = 0;
+  double p = 0;
+
+  int r_neighbor, c_neighbor;
+
+  for (int j = 0; j < 4; j++) {
+    c_neighbor = c_int - 1 + j;
+    p = 0;
+    if (c_neighbor < 0 || c_neighbor >= cols) {
+      continue;
+    }
+
+    for (int i = 0; i < 4; i++) {
+      r_neighbor = r_int - 1 + i;
+      if (r_neighbor < 0 || r_neighbor >= rows) {
+        continue;
+      }
+      p = p + image[r_neighbor * cols + c_neighbor] *
+                  _c_cubic(r - (r_neighbor + 0.5));
+    }
+    q = q + p * _c_cubic(c - (c_neighbor + 0.5));
+  }
+  return q;
+}
+
+// c2cl-function: _c_calculate_dk from _c_sr_radiality.c
+float _c_calculate_dk(float x, float y, float xc, float yc, float vGx, float vGy, float GMag, float ringRadius){
+    float Dk = 0;
+    if (GMag != 0) {
+        Dk = 1 - (fabs(vGy * (xc - x) - vGx * (yc - y)) / GMag) / ringRadius;
+        Dk = Dk * Dk;
+    } 
+    return Dk;
+}
+
+// c2cl-function: _c_calculate_radiality_per_subpixel from _c_sr_radiality.c
+float _c_calculate_radiality_per_subpixel(int i, int j, __global float *imGx, __global float *imGy, __global float *xRingCoordinates, __global float *yRingCoordinates, int magnification, float ringRadius, int nRingCoordinates, int radialityPositivityConstraint, int h, int w, float shift_row, float shift_col) {
+    int sampleIter;
+    float x0, y0, xc, yc, xRing, yRing, vGx, vGy, GMag, Dk, DivDFactor = 0, CGH = 0;
+
+    xc = i + 0.5;
+    yc = j + 0.5;
+    
+    for (sampleIter = 0; sampleIter < nRingCoordinates; sampleIter++) {
+        xRing = xRingCoordinates[sampleIter];
+        yRing = yRingCoordinates[sampleIter];
+
+        x0 = xc + xRing;
+        y0 = yc + yRing;
+
+        vGx = _c_interpolate(imGx, y0 / magnification - shift_row, x0 / magnification - shift_col, h, w);
+        vGy = _c_interpolate(imGy, y0 / magnification - shift_row, x0 / magnification - shift_col, h, w);
+        GMag = sqrt(vGx * vGx + vGy * vGy);
+
+        Dk = _c_calculate_dk(x0, y0, xc, yc, vGx, vGy, GMag, ringRadius);
+
+        if ((vGx * xRing + vGy * yRing) > 0) {
+            DivDFactor -= Dk;
+        } else {
+            DivDFactor += Dk;
+        }
+    }
+
+    DivDFactor /= nRingCoordinates;
+
+    if (radialityPositivityConstraint == 1) {
+        CGH = fmax(DivDFactor, 0);
+    } else {
+        CGH = DivDFactor;
+    }
+
+    return CGH;
+}
+
+// per-pixel version of _c_gradient_radiality from _c_gradients.c
+__kernel void gradient_radiality(__global float *image, __global float *imGc,
+                                 __global float *imGr) {
+
+  int f = get_global_id(0);
+  int r = get_global_id(1);
+  int c = get_global_id(2);
+
+  int rows = get_global_size(1);
+  int cols = get_global_size(2);
+
+  long offset = (long)f * rows * cols;
+  long idx = offset + r * cols + c;
+
+  if (r == 0 || c == 0 || r == rows - 1 || c == cols - 1) {
+    imGc[idx] = 0;
+    imGr[idx] = 0;
+    return;
+  }
+
+  imGc[idx] = -image[idx - 1] + image[idx + 1];
+  imGr[idx] = -image[idx - cols] + image[idx + cols];
+}
+
+// magnified pixel (j, i) of frame f, shared by radiality and radiality_masked
+void radiality_subpixel(int f, int j, int i, __global float *image,
+                        __global float *imGx, __global float *imGy,
+                        __global float *imRad,
+                        __global float *xRingCoordinates,
+                        __global float *yRingCoordinates, int magnification,
+                        float ringRadius, int nRingCoordinates,
+                        int radialityPositivityConstraint, int border, int h,
+                        int w, int doIntensityWeighting,
+                        __global float *shift_row, __global float *shift_col) {
+
+  int rowsM = h * magnification;
+  int colsM = w * magnification;
+
+  long offset = (long)f * h * w;
+  long idx = (long)f * rowsM * colsM + j * colsM + i;
+
+  if (j < (1 + border) * magnification ||
+      j >= (h - 1 - border) * magnification ||
+      i < (1 + border) * magnification ||
+      i >= (w - 1 - border) * magnification) {
+    imRad[idx] = 0;
+    return;
+  }
+
+  float rad = _c_calculate_radiality_per_subpixel(
+      i, j, &imGx[offset], &imGy[offset], xRingCoordinates, yRingCoordinates,
+      magnification, ringRadius, nRingCoordinates,
+      radialityPositivityConstraint, h, w, shift_row[f], shift_col[f]);
+
+  if (doIntensityWeighting) {
+    rad = rad * _c_interpolate(&image[offset],
+                               j / (float)magnification - shift_row[f],
+                               i / (float)magnification - shift_col[f], h, w);
+  }
+
+  imRad[idx] = rad;
+}
+
+__kernel void radiality(__global float *image, __global float *imGx,
+                        __global float *imGy, __global float *imRad,
+                        __global float *xRingCoordinates,
+                        __global float *yRingCoordinates, int magnification,
+                        float ringRadius, int nRingCoordinates,
+                        int radialityPositivityConstraint, int border, int h,
+                        int w, int doIntensityWeighting,
+                        __global float *shift_row, __global float *shift_col) {
+
+  radiality_subpixel(get_global_id(0), get_global_id(1), get_global_id(2),
+                     image, imGx, imGy, imRad, xRingCoordinates,
+                     yRingCoordinates, magnification, ringRadius,
+                     nRingCoordinates, radialityPositivityConstraint, border,
+                     h, w, doIntensityWeighting, shift_row, shift_col);
+}
+
+// radiality restricted to a work list of active low resolution pixels
+// (frame, row, column), with one work item per magnified pixel
+__kernel void radiality_masked(__global float *image, __global float *imGx,
+                               __global float *imGy, __global float *imRad,
+                               __global float *xRingCoordinates,
+                               __global float *yRingCoordinates,
+                               int magnification, float ringRadius,
+                               int nRingCoordinates,
+                               int radialityPositivityConstraint, int border,
+                               int h, int w, int doIntensityWeighting,
+                               __global float *shift_row,
+                               __global float *shift_col,
+                               __global int *active_pixels) {
+
+  int p = get_global_id(0);
+  int f = active_pixels[p * 3];
+  int j = active_pixels[p * 3 + 1] * magnification + get_global_id(1);
+  int i = active_pixels[p * 3 + 2] * magnification + get_global_id(2);
+
+  radiality_subpixel(f, j, i, image, imGx, imGy, imRad, xRingCoordinates,
+                     yRingCoordinates, magnification, ringRadius,
+                     nRingCoordinates, radialityPositivityConstraint, border,
+                     h, w, doIntensityWeighting, shift_row, shift_col);
+}
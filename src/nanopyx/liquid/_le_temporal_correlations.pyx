@@ -0,0 +1,245 @@
+# cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=False
+
+import numpy as np
+
+cimport numpy as np
+
+from cython.parallel import prange
+
+from .__interpolation_tools__ import check_image
+from .__liquid_engine__ import LiquidEngine
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+
+
+cdef extern from "_c_sr_temporal_correlations.h":
+    float _c_calculate_pps(float* x, int n_frames, long stride) nogil
+    float _c_calculate_acrf(float* x, int n_frames, long stride, int order, int do_integrate_lag_times) nogil
+
+
+class TemporalCorrelations(LiquidEngine):
+    """
+    SRRF temporal correlations (pairwise product sum and auto-cumulants of order 2 to 4) using the NanoPyx Liquid
+    Engine, each pixel is reduced along time in O(T) without intermediate images
+    """
+
+    _has_opencl = True
+    _has_threaded = True
+    _has_threaded_static = True
+    _has_threaded_dynamic = True
+    _has_threaded_guided = True
+    _has_unthreaded = True
+    _has_python = False
+    _has_njit = False
+
+    orders = (-1, 2, 3, 4)
+
+    def __init__(self):
+        super().__init__()
+
+    def run(self, image, order: int = 2, do_integrate_lag_times: bool = False, run_type=None) -> np.ndarray:
+        """
+        Calculates the temporal correlation of each pixel, as calculate_SRRF_temporal_correlations
+        :param image: The image stack, with shape (n_frames, rows, cols)
+        :type image: np.ndarray
+        :param order: -1 for the pairwise product sum, or 2, 3 and 4 for the auto-cumulant of that order
+        :type order: int
+        :param do_integrate_lag_times: Whether to integrate the auto-cumulants over binned lag times
+        :type do_integrate_lag_times: bool
+        :return: The temporal correlation, with shape (rows, cols)
+        """
+        image = self._check_arguments(image, order)
+        return self._run(image, order, do_integrate_lag_times, run_type=run_type)
+
+    def benchmark(self, image, order: int = 2, do_integrate_lag_times: bool = False):
+        """
+        Benchmark the TemporalCorrelations run function in multiple run types
+        :param image: The image stack, with shape (n_frames, rows, cols)
+        :param order: -1 for the pairwise product sum, or 2, 3 and 4 for the auto-cumulant of that order
+        :param do_integrate_lag_times: Whether to integrate the auto-cumulants over binned lag times
+        :return: The benchmark results
+        :rtype: [[run_time, run_type_name, return_value], ...]
+        """
+        image = self._check_arguments(image, order)
+        return super().benchmark(image, order, do_integrate_lag_times)
+
+    def _check_arguments(self, image, order):
+        if order not in self.orders:
+            raise ValueError(f"Order must be one of {self.orders}, got {order}")
+        return np.ascontiguousarray(check_image(image))
+
+    def _run_opencl(self, image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        code = self._get_cl_code("_le_temporal_correlations_.cl")
+        prg = cl.Program(cl_ctx, code).build()
+        kernel = prg.temporal_correlations
+
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        out = np.empty((rows, cols), dtype=np.float32)
+
+        # the input stack is the largest buffer, process as many rows as fit in it
+        max_rows = max(1, cl_ctx.devices[0].max_mem_alloc_size // (n_frames * cols * 4))
+
+        for r0 in range(0, rows, max_rows):
+            # the lag time integration bins the series in place, which only modifies the device copy
+            chunk = np.ascontiguousarray(image[:, r0:r0 + max_rows, :])
+            image_in = cl_array.to_device(cl_queue, chunk)
+            out_chunk = cl_array.empty(cl_queue, chunk.shape[1:], dtype=np.float32)
+
+            kernel(
+                cl_queue,
+                out_chunk.shape,
+                None,
+                image_in.data,
+                out_chunk.data,
+                np.int32(n_frames),
+                np.int32(order),
+                np.int32(do_integrate_lag_times),
+            )
+
+            # Wait for queue to finish
+            cl_queue.finish()
+            out[r0:r0 + chunk.shape[1]] = out_chunk.get()
+
+        return out
+
+    # tag-start: _le_temporal_correlations.TemporalCorrelations._run_unthreaded
+    def _run_unthreaded(self, float[:,:,::1] image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef long stride = <long>rows * cols
+        cdef int _order = order
+        cdef int _do_integrate_lag_times = do_integrate_lag_times
+
+        # the lag time integration bins the series in place
+        cdef float[:,:,::1] x = np.array(image, copy=True) if _do_integrate_lag_times else image
+
+        out = np.empty((rows, cols), dtype=np.float32)
+        cdef float[:,::1] _out = out
+
+        cdef int p, r, c
+        with nogil:
+            for p in range(rows * cols):
+                r = p // cols
+                c = p % cols
+                if _order == -1:
+                    _out[r, c] = _c_calculate_pps(&x[0, r, c], n_frames, stride)
+                else:
+                    _out[r, c] = _c_calculate_acrf(&x[0, r, c], n_frames, stride, _order, _do_integrate_lag_times)
+
+        return out
+    # tag-end
+
+    # tag-copy: _le_temporal_correlations.TemporalCorrelations._run_unthreaded; replace('_run_unthreaded', '_run_threaded'); replace('range(rows * cols)', 'prange(rows * cols)')
+    def _run_threaded(self, float[:,:,::1] image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef long stride = <long>rows * cols
+        cdef int _order = order
+        cdef int _do_integrate_lag_times = do_integrate_lag_times
+
+        # the lag time integration bins the series in place
+        cdef float[:,:,::1] x = np.array(image, copy=True) if _do_integrate_lag_times else image
+
+        out = np.empty((rows, cols), dtype=np.float32)
+        cdef float[:,::1] _out = out
+
+        cdef int p, r, c
+        with nogil:
+            for p in prange(rows * cols):
+                r = p // cols
+                c = p % cols
+                if _order == -1:
+                    _out[r, c] = _c_calculate_pps(&x[0, r, c], n_frames, stride)
+                else:
+                    _out[r, c] = _c_calculate_acrf(&x[0, r, c], n_frames, stride, _order, _do_integrate_lag_times)
+
+        return out
+    # tag-end
+
+    # tag-copy: _le_temporal_correlations.TemporalCorrelations._run_unthreaded; replace('_run_unthreaded', '_run_threaded_static'); replace('range(rows * cols)', 'prange(rows * cols, schedule="static")')
+    def _run_threaded_static(self, float[:,:,::1] image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef long stride = <long>rows * cols
+        cdef int _order = order
+        cdef int _do_integrate_lag_times = do_integrate_lag_times
+
+        # the lag time integration bins the series in place
+        cdef float[:,:,::1] x = np.array(image, copy=True) if _do_integrate_lag_times else image
+
+        out = np.empty((rows, cols), dtype=np.float32)
+        cdef float[:,::1] _out = out
+
+        cdef int p, r, c
+        with nogil:
+            for p in prange(rows * cols, schedule="static"):
+                r = p // cols
+                c = p % cols
+                if _order == -1:
+                    _out[r, c] = _c_calculate_pps(&x[0, r, c], n_frames, stride)
+                else:
+                    _out[r, c] = _c_calculate_acrf(&x[0, r, c], n_frames, stride, _order, _do_integrate_lag_times)
+
+        return out
+    # tag-end
+
+    # tag-copy: _le_temporal_correlations.TemporalCorrelations._run_unthreaded; replace('_run_unthreaded', '_run_threaded_dynamic'); replace('range(rows * cols)', 'prange(rows * cols, schedule="dynamic")')
+    def _run_threaded_dynamic(self, float[:,:,::1] image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef long stride = <long>rows * cols
+        cdef int _order = order
+        cdef int _do_integrate_lag_times = do_integrate_lag_times
+
+        # the lag time integration bins the series in place
+        cdef float[:,:,::1] x = np.array(image, copy=True) if _do_integrate_lag_times else image
+
+        out = np.empty((rows, cols), dtype=np.float32)
+        cdef float[:,::1] _out = out
+
+        cdef int p, r, c
+        with nogil:
+            for p in prange(rows * cols, schedule="dynamic"):
+                r = p // cols
+                c = p % cols
+                if _order == -1:
+                    _out[r, c] = _c_calculate_pps(&x[0, r, c], n_frames, stride)
+                else:
+                    _out[r, c] = _c_calculate_acrf(&x[0, r, c], n_frames, stride, _order, _do_integrate_lag_times)
+
+        return out
+    # tag-end
+
+    # tag-copy: _le_temporal_correlations.TemporalCorrelations._run_unthreaded; replace('_run_unthreaded', '_run_threaded_guided'); replace('range(rows * cols)', 'prange(rows * cols, schedule="guided")')
+    def _run_threaded_guided(self, float[:,:,::1] image, order: int = 2, do_integrate_lag_times: bool = False) -> np.ndarray:
+        cdef int n_frames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+        cdef long stride = <long>rows * cols
+        cdef int _order = order
+        cdef int _do_integrate_lag_times = do_integrate_lag_times
+
+        # the lag time integration bins the series in place
+        cdef float[:,:,::1] x = np.array(image, copy=True) if _do_integrate_lag_times else image
+
+        out = np.empty((rows, cols), dtype=np.float32)
+        cdef float[:,::1] _out = out
+
+        cdef int p, r, c
+        with nogil:
+            for p in prange(rows * cols, schedule="guided"):
+                r = p // cols
+                c = p % cols
+                if _order == -1:
+                    _out[r, c] = _c_calculate_pps(&x[0, r, c], n_frames, stride)
+                else:
+                    _out[r, c] = _c_calculate_acrf(&x[0, r, c], n_frames, stride, _order, _do_integrate_lag_times)
+
+        return out
+    # tag-end
@@ -0,0 +1,98 @@
+float _c_calculate_acrf(__global float *x, int n_frames, long stride, int order, int do_integrate_lag_times);
+float _c_calculate_pps(__global float *x, int n_frames, long stride);
+// c2cl-function: _c_calculate_pps from _c_sr_temporal_correlations.c
+float _c_calculate_pps(__global float *x, int n_frames, long stride) {
+  float r, sum = 0, sum_sq = 0;
+
+  for (int t = 0; t < n_frames; t++) {
+    r = fmax(x[t * stride], 0);
+    sum += r;
+    sum_sq += r * r;
+  }
+
+  return (sum * sum + sum_sq) / ((float)n_frames * (n_frames + 1));
+}
+
+// c2cl-function: _c_calculate_acrf from _c_sr_temporal_correlations.c
+float _c_calculate_acrf(__global float *x, int n_frames, long stride, int order, int do_integrate_lag_times) {
+  float a, b, c, d;
+  float ab = 0, abc = 0, abcd = 0, cd = 0, ac = 0, bd = 0, ad = 0, bc = 0;
+  float mean = 0, out = 0;
+
+  for (int t = 0; t < n_frames; t++) {
+    mean += x[t * stride];
+  }
+  mean /= n_frames;
+
+  float n_binned_frames = n_frames;
+
+  while (n_binned_frames > order) {
+    ab = 0;
+
+    for (int t = 0; t < n_binned_frames - order; t++) {
+      a = x[t * stride] - mean;
+      b = x[(t + 1) * stride] - mean;
+      ab += a * b;
+
+      if (order == 3) {
+        c = x[(t + 2) * stride] - mean;
+        abc += a * b * c;
+      } else if (order == 4) {
+        c = x[(t + 2) * stride] - mean;
+        d = x[(t + 3) * stride] - mean;
+        abcd += a * b * c * d;
+        cd += c * d;
+        ac += a * c;
+        bd += b * d;
+        ad += a * d;
+        bc += b * c;
+      }
+
+      if (do_integrate_lag_times) {
+        int tbin = t * order;
+        x[t * stride] = 0;
+        if (tbin < n_binned_frames) {
+          for (int _t = 0; _t < order - 1 && tbin + _t < n_frames; _t++) {
+            x[t * stride] += x[(tbin + _t) * stride] / order;
+          }
+        }
+      }
+    }
+
+    if (order == 3) {
+      out = fabs(abc) / n_binned_frames;
+    } else if (order == 4) {
+      out = fabs(abcd - ab * cd - ac * bd - ad * bc) / n_binned_frames;
+    } else {
+      out = fabs(ab) / n_binned_frames;
+    }
+
+    if (!do_integrate_lag_times) {
+      break;
+    }
+    n_binned_frames = n_binned_frames / order;
+  }
+
+  return out;
+}
+
+__kernel void temporal_correlations(__global float *image, __global float *out,
+                                    int n_frames, int order,
+                                    int do_integrate_lag_times) {
+
+  int r = get_global_id(0);
+  int c = get_global_id(1);
+
+  int rows = get_global_size(0);
+  int cols = get_global_size(1);
+
+  long stride = (long)rows * cols;
+  __global float *x = &image[r * cols + c];
+
+  if (order == -1) {
+    out[r * cols + c] = _c_calculate_pps(x, n_frames, stride);
+  } else {
+    out[r * cols + c] =
+        _c_calculate_acrf(x, n_frames, stride, order, do_integrate_lag_times);
+  }
+}
@@ -0,0 +1,194 @@
+# cython: infer_types=True, wraparound=False, nonecheck=False, boundscheck=False, cdivision=True, language_level=3, profile=False, autogen_pxd=False
+
+import numpy as np
+
+cimport numpy as np
+
+from cython.parallel import prange
+
+from .__interpolation_tools__ import check_image, value2array
+from .__liquid_engine__ import LiquidEngine
+from .__opencl__ import cl, cl_array, cl_ctx, cl_queue
+
+
+cdef extern from "_c_interpolation_catmull_rom.h":
+    float _c_interpolate(float *image, float row, float col, int rows, int cols) nogil
+
+
+class Translation(LiquidEngine):
+    """
+    Translation of image stacks with Catmull-Rom interpolation (e.g. for drift correction) using the NanoPyx
+    Liquid Engine
+    """
+
+    _has_opencl = True
+    _has_threaded = True
+    _has_threaded_static = True
+    _has_threaded_dynamic = True
+    _has_threaded_guided = True
+    _has_unthreaded = True
+    _has_python = False
+    _has_njit = False
+
+    def __init__(self):
+        super().__init__()
+
+    def run(self, image, shift_row, shift_col, run_type=None) -> np.ndarray:
+        """
+        Shift each frame of an image using Catmull-Rom interpolation, pixels shifted in from outside the frame are 0
+        :param image: The image to shift
+        :type image: np.ndarray or memoryview
+        :param shift_row: The number of rows to shift each frame
+        :type shift_row: int or float or np.ndarray
+        :param shift_col: The number of columns to shift each frame
+        :type shift_col: int or float or np.ndarray
+        :return: The shifted image
+        """
+        image = np.ascontiguousarray(check_image(image))
+        shift_row = np.ascontiguousarray(value2array(shift_row, image.shape[0]), dtype=np.float32)
+        shift_col = np.ascontiguousarray(value2array(shift_col, image.shape[0]), dtype=np.float32)
+        return self._run(image, shift_row, shift_col, run_type=run_type)
+
+    def benchmark(self, image, shift_row, shift_col):
+        """
+        Benchmark the Translation run function in multiple run types
+        :param image: The image to shift
+        :type image: np.ndarray or memoryview
+        :param shift_row: The number of rows to shift each frame
+        :type shift_row: int or float or np.ndarray
+        :param shift_col: The number of columns to shift each frame
+        :type shift_col: int or float or np.ndarray
+        :return: The benchmark results
+        :rtype: [[run_time, run_type_name, return_value], ...]
+        """
+        image = np.ascontiguousarray(check_image(image))
+        shift_row = np.ascontiguousarray(value2array(shift_row, image.shape[0]), dtype=np.float32)
+        shift_col = np.ascontiguousarray(value2array(shift_col, image.shape[0]), dtype=np.float32)
+        return super().benchmark(image, shift_row, shift_col)
+
+    def _run_opencl(self, image, shift_row, shift_col) -> np.ndarray:
+        code = self._get_cl_code("_le_translation_.cl")
+
+        image_in = cl_array.to_device(cl_queue, image)
+        shift_row_in = cl_array.to_device(cl_queue, shift_row)
+        shift_col_in = cl_array.to_device(cl_queue, shift_col)
+        image_out = cl_array.empty(cl_queue, image.shape, dtype=np.float32)
+
+        # Create the program
+        prg = cl.Program(cl_ctx, code).build()
+
+        # Run the kernel
+        prg.translate(
+            cl_queue,
+            image_out.shape,
+            None,
+            image_in.data,
+            image_out.data,
+            shift_row_in.data,
+            shift_col_in.data,
+        )
+
+        # Wait for queue to finish
+        cl_queue.finish()
+
+        return image_out.get()
+
+    # tag-start: _le_translation.Translation._run_unthreaded
+    def _run_unthreaded(self, float[:,:,:] image, float[:] shift_row, float[:] shift_col) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        image_out = np.empty((nFrames, rows, cols), dtype=np.float32)
+        cdef float[:,:,:] _image_out = image_out
+
+        cdef int i, f, r, c
+        with nogil:
+            for i in range(nFrames * rows):
+                f = i // rows
+                r = i % rows
+                for c in range(cols):
+                    _image_out[f, r, c] = _c_interpolate(&image[f, 0, 0], r - shift_row[f], c - shift_col[f], rows, cols)
+
+        return image_out
+    # tag-end
+
+    # tag-copy: _le_translation.Translation._run_unthreaded; replace('_run_unthreaded', '_run_threaded'); replace('range(nFrames * rows)', 'prange(nFrames * rows)')
+    def _run_threaded(self, float[:,:,:] image, float[:] shift_row, float[:] shift_col) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        image_out = np.empty((nFrames, rows, cols), dtype=np.float32)
+        cdef float[:,:,:] _image_out = image_out
+
+        cdef int i, f, r, c
+        with nogil:
+            for i in prange(nFrames * rows):
+                f = i // rows
+                r = i % rows
+                for c in range(cols):
+                    _image_out[f, r, c] = _c_interpolate(&image[f, 0, 0], r - shift_row[f], c - shift_col[f], rows, cols)
+
+        return image_out
+    # tag-end
+
+    # tag-copy: _le_translation.Translation._run_unthreaded; replace('_run_unthreaded', '_run_threaded_static'); replace('range(nFrames * rows)', 'prange(nFrames * rows, schedule="static")')
+    def _run_threaded_static(self, float[:,:,:] image, float[:] shift_row, float[:] shift_col) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        image_out = np.empty((nFrames, rows, cols), dtype=np.float32)
+        cdef float[:,:,:] _image_out = image_out
+
+        cdef int i, f, r, c
+        with nogil:
+            for i in prange(nFrames * rows, schedule="static"):
+                f = i // rows
+                r = i % rows
+                for c in range(cols):
+                    _image_out[f, r, c] = _c_interpolate(&image[f, 0, 0], r - shift_row[f], c - shift_col[f], rows, cols)
+
+        return image_out
+    # tag-end
+
+    # tag-copy: _le_translation.Translation._run_unthreaded; replace('_run_unthreaded', '_run_threaded_dynamic'); replace('range(nFrames * rows)', 'prange(nFrames * rows, schedule="dynamic")')
+    def _run_threaded_dynamic(self, float[:,:,:] image, float[:] shift_row, float[:] shift_col) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        image_out = np.empty((nFrames, rows, cols), dtype=np.float32)
+        cdef float[:,:,:] _image_out = image_out
+
+        cdef int i, f, r, c
+        with nogil:
+            for i in prange(nFrames * rows, schedule="dynamic"):
+                f = i // rows
+                r = i % rows
+                for c in range(cols):
+                    _image_out[f, r, c] = _c_interpolate(&image[f, 0, 0], r - shift_row[f], c - shift_col[f], rows, cols)
+
+        return image_out
+    # tag-end
+
+    # tag-copy: _le_translation.Translation._run_unthreaded; replace('_run_unthreaded', '_run_threaded_guided'); replace('range(nFrames * rows)', 'prange(nFrames * rows, schedule="guided")')
+    def _run_threaded_guided(self, float[:,:,:] image, float[:] shift_row, float[:] shift_col) -> np.ndarray:
+        cdef int nFrames = image.shape[0]
+        cdef int rows = image.shape[1]
+        cdef int cols = image.shape[2]
+
+        image_out = np.empty((nFrames, rows, cols), dtype=np.float32)
+        cdef float[:,:,:] _image_out = image_out
+
+        cdef int i, f, r, c
+        with nogil:
+            for i in prange(nFrames * rows, schedule="guided"):
+                f = i // rows
+                r = i % rows
+                for c in range(cols):
+                    _image_out[f, r, c] = _c_interpolate(&image[f, 0, 0], r - shift_row[f], c - shift_col[f], rows, cols)
+
+        return image_out
+    # tag-end
@@ -0,0 +1,67 @@
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols);
+double _c_cubic(double v);
+
+// c2cl-function: _c_cubic from _c_interpolation_catmull_rom.c
+double _c_cubic(double v) {
+  double a = 0.5;
+  double z = 0;
+  if (v < 0) {
+    v = -v;
+  }
+  if (v < 1) {
+    z = v * v * (v * (-a + 2) + (a - 3)) + 1;
+  } else if (v < 2) {
+    z = -a * v * v * v + 5 * a * v * v - 8 * a * v + 4 * a;
+  }
+  return z;
+}
+
+// c2cl-function: _c_interpolate from _c_interpolation_catmull_rom.c
+float _c_interpolate(__global float *image, float r, float c, int rows, int cols) {
+  // return 0 if r OR c positions do not exist in image
+  if (r < 0 || r >= rows || c < 0 || c >= cols) {
+    return 0;
+  }
+
+  const int r_int = (int)floor(r - 0.5);
+  const int c_int = (int)floor(c - 0.5);
+  double q = 0;
+  double p = 0;
+
+  int r_neighbor, c_neighbor;
+
+  for (int j = 0; j < 4; j++) {
+    c_neighbor = c_int - 1 + j;
+    p = 0;
+    if (c_neighbor < 0 || c_neighbor >= cols) {
+      continue;
+    }
+
+    for (int i = 0; i < 4; i++) {
+      r_neighbor = r_int - 1 + i;
+      if (r_neighbor < 0 || r_neighbor >= rows) {
+        continue;
+      }
+      p = p + image[r_neighbor * cols + c_neighbor] *
+                  _c_cubic(r - (r_neighbor + 0.5));
+    }
+    q = q + p * _c_cubic(c - (c_neighbor + 0.5));
+  }
+  return q;
+}
+
+__kernel void translate(__global float *image_in, __global float *image_out,
+                        __global float *shift_row, __global float *shift_col) {
+
+  int f = get_global_id(0);
+  int r = get_global_id(1);
+  int c = get_global_id(2);
+
+  int rows = get_global_size(1);
+  int cols = get_global_size(2);
+  long offset = (long)f * rows * cols;
+
+  image_out[offset + r * cols + c] =
+      _c_interpolate(&image_in[offset], r - shift_row[f], c - shift_col[f],
+                     rows, cols);
+}
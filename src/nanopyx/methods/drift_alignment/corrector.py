@@ -49,8 +49,10 @@ class DriftCorrector(object):
             # self.image_arr = image_array
             # corrected_image = [self._translate_slice(i) for i in range(0, image_array.shape[0])]
             # return np.array(corrected_image)
-            return np.array(translation.translate_array(image_array.astype(np.float32),
-                                                        np.array(self.estimator_table.drift_table).astype(np.float32)))
+            corrected_image = np.empty(image_array.shape, dtype=np.float32)
+            return translation.translate_array(np.ascontiguousarray(image_array, dtype=np.float32),
+                                               np.array(self.estimator_table.drift_table).astype(np.float32),
+                                               out=corrected_image)
 
         else:
             print("Missing drift calculation")
@@ -4,7 +4,7 @@ from scipy.interpolate import interp1d
 
 from .estimator_table import DriftEstimatorTable
 from .corrector import DriftCorrector
-from ...core.analysis.estimate_shift import GetMaxOptimizer
+from ...core.analysis.estimate_shift import get_subpixel_max
 from ...core.utils.timeit import timeit
 from ...core.analysis.ccm import calculate_ccm
 from ...core.analysis.rcc import rcc
@@ -117,8 +117,8 @@ class DriftEstimator(object):
         method = self.estimator_table.params["shift_calc_method"]
 
         if method == "Max Fitting":
-            optimizer = GetMaxOptimizer(slice_ccm)
-            shift_y, shift_x = optimizer.get_max()
+            shift_y, shift_x = get_subpixel_max(slice_ccm,
+                                                method=self.estimator_table.params.get("subpixel_method", "parabolic"))
         elif method == "Max":
             shift_y, shift_x = np.unravel_index(slice_ccm.argmax(), slice_ccm.shape)
 
@@ -133,10 +133,19 @@ class DriftEstimator(object):
         drift_y = []
         drift = []
 
-        for i in range(self.cross_correlation_map.shape[0]):
-            drift.append(self.get_shift_from_ccm_slice(i))
-        
-        drift = np.array(drift)
+        if self.estimator_table.params["shift_calc_method"] == "Max Fitting":
+            # closed-form estimators fit the peaks of all slices at once
+            max_coords = get_subpixel_max(self.cross_correlation_map,
+                                          method=self.estimator_table.params.get("subpixel_method", "parabolic"))
+            radius_y = self.cross_correlation_map.shape[1] / 2.0
+            radius_x = self.cross_correlation_map.shape[2] / 2.0
+            drift = np.stack((np.round(radius_x - max_coords[:, 1] - 0.5, 3),
+                              np.round(radius_y - max_coords[:, 0] - 0.5, 3)), axis=1)
+        else:
+            for i in range(self.cross_correlation_map.shape[0]):
+                drift.append(self.get_shift_from_ccm_slice(i))
+            drift = np.array(drift)
+
         drift_x = drift[:, 0]
         drift_y = drift[:, 1]
 
@@ -20,6 +20,8 @@ class DriftEstimatorTable(object):
         self.params["max_expected_drift"] = 0
         self.params["normalize"] = True
         self.params["shift_calc_method"] = "Max Fitting"
+        # see estimate_shift.SUBPIXEL_METHODS, "optimizer" is the legacy fit
+        self.params["subpixel_method"] = "parabolic"
         self.params["use_roi"] = False
         self.params["roi"] = None
         self.params["show_ccm"] = True  # used for napari
@@ -0,0 +1,9 @@
+"""
+Implementation of the eSRRF method
+
+
+>>> from nanopyx.methods.esrrf import eSRRF
+>>> esrrf = eSRRF(magnification=2, radius=1.5)
+
+"""
+from ._esrrf import eSRRF
@@ -0,0 +1,162 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from tqdm import tqdm
+
+from ...core.transform.sr_temporal_correlations import TemporalReduction
+from ...liquid import CRShiftAndMagnify
+from ...liquid.__interpolation_tools__ import get_drift_shifts
+from ...liquid.__tiling__ import DEFAULT_MEMORY_BUDGET
+from ...liquid._le_radial_gradient_convergence import RadialGradientConvergence
+
+
+class eSRRF:
+    """
+    eSRRF reconstruction of image stacks of any length, using the radial gradient convergence Liquid Engine.
+    Frames are processed in chunks whose size is bounded by a memory budget, each chunk is reduced along time as soon
+    as it is processed, and the next chunk is loaded while the current one is computed, so that the dataset can be
+    a memory-mapped or lazily loaded array (e.g. np.memmap or zarr)
+    """
+
+    def __init__(
+        self,
+        magnification: int = 5,
+        radius: float = 1.5,
+        sensitivity: float = 1,
+        doIntensityWeighting: bool = True,
+        temporal_correlation="mean",
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        run_type=None,
+    ):
+        """
+        :param magnification: magnification factor
+        :param radius: radius (fwhm) of the convergence neighbourhood, in pixels
+        :param sensitivity: sensitivity exponent of the radial gradient convergence
+        :param doIntensityWeighting: whether to weight the radial gradient convergence by the interpolated intensity
+        :param temporal_correlation: temporal reduction of each timepoint ("mean", "var", "tac2", "ac2", "ac3", "ac4",
+            "max", "pps" or an SRRF order), see nanopyx.core.transform.sr_temporal_correlations.TemporalReduction
+        :param memory_budget: maximum number of bytes used by the chunk being processed
+        :param run_type: Liquid Engine run type, if None the fastest is chosen
+        """
+        # validates the reduction early
+        TemporalReduction(temporal_correlation)
+
+        self.magnification = magnification
+        self.radius = radius
+        self.sensitivity = sensitivity
+        self.doIntensityWeighting = doIntensityWeighting
+        self.temporal_correlation = temporal_correlation
+        self.memory_budget = memory_budget
+        self.run_type = run_type
+
+        self._rgc = RadialGradientConvergence()
+        self._magnify = CRShiftAndMagnify()
+
+    def get_frames_per_chunk(self, rows: int, cols: int) -> int:
+        """
+        Calculates the number of frames processed at once within the memory budget
+        :param rows: number of rows of each frame
+        :param cols: number of columns of each frame
+        :return: number of frames per chunk
+        """
+        M2 = self.magnification**2
+        # two loaded chunks, gradients, the magnified image, intensity and RGC maps, gradients at 2M,
+        # and the float64 lagged products of the reductions
+        bytes_per_pixel = 4 * (5 + 3 * M2 + 8 * M2) + 8 * 17 * M2
+        return max(1, int(self.memory_budget // (rows * cols * bytes_per_pixel)))
+
+    def calculate(self, dataset, frames_per_timepoint: int = 0, frames_per_chunk: int = None, drift_table=None):
+        """
+        Calculates the eSRRF reconstruction of each timepoint
+        :param dataset: array-like with shape (n_frames, rows, cols) that supports slicing along the frames, or a
+            batch of such stacks, e.g. (channels, n_frames, rows, cols); the frames of all the stacks in a chunk are
+            processed by a single run of the engines
+        :param frames_per_timepoint: number of frames reconstructed into each timepoint, 0 uses all the frames;
+            trailing frames that do not fill a timepoint are ignored
+        :param frames_per_chunk: number of frames processed at once, if None it is calculated from the memory budget
+        :param drift_table: drift table with shape (n_frames, 3), see DriftEstimatorTable, whose drift is corrected
+            while the frames are magnified, instead of resampling the dataset with DriftCorrector beforehand; shared
+            by the stacks of a batch
+        :return: (reconstruction, intensity), float32 arrays with shape (n_timepoints, rows * M, cols * M), preceded
+            by the batch axes of the dataset, where reconstruction is the temporal correlation of the radial gradient
+            convergence maps (weighted by the interpolated intensity if doIntensityWeighting) and intensity is the
+            average of the interpolated frames
+        """
+        batch_shape = tuple(dataset.shape[:-3])
+        n_frames, rows, cols = dataset.shape[-3:]
+        n_batch = int(np.prod(batch_shape, dtype=np.int64))
+        shift_row, shift_col = get_drift_shifts(drift_table, n_frames)
+        if frames_per_timepoint <= 0 or frames_per_timepoint > n_frames:
+            frames_per_timepoint = n_frames
+        n_timepoints = n_frames // frames_per_timepoint
+
+        if frames_per_chunk is None:
+            frames_per_chunk = self.get_frames_per_chunk(rows * n_batch, cols)
+        frames_per_chunk = max(1, min(frames_per_chunk, frames_per_timepoint))
+
+        rowsM, colsM = rows * self.magnification, cols * self.magnification
+        shape_out = batch_shape + (n_timepoints, rowsM, colsM)
+        reconstruction = np.empty(shape_out, dtype=np.float32)
+        intensity = np.empty(shape_out, dtype=np.float32)
+
+        chunks = [
+            (t, f0, min(f0 + frames_per_chunk, (t + 1) * frames_per_timepoint))
+            for t in range(n_timepoints)
+            for f0 in range(t * frames_per_timepoint, (t + 1) * frames_per_timepoint, frames_per_chunk)
+        ]
+
+        def _load(f0, f1):
+            return np.ascontiguousarray(dataset[..., f0:f1, :, :], dtype=np.float32)
+
+        def _frames_first(maps):
+            # (batch..., frames, rowsM, colsM) -> (frames, batch * rowsM, colsM), so that the reductions treat the
+            # stacks of the batch as a single taller frame
+            maps = np.asarray(maps).reshape((n_batch, -1, rowsM, colsM))
+            return np.moveaxis(maps, 1, 0).reshape((-1, n_batch * rowsM, colsM))
+
+        with ThreadPoolExecutor(max_workers=1) as loader, tqdm(
+            total=n_timepoints, desc="Calculating eSRRF", unit="timepoint"
+        ) as pbar:
+            next_chunk = loader.submit(_load, *chunks[0][1:]) if chunks else None
+            for i, (t, f0, f1) in enumerate(chunks):
+                chunk = next_chunk.result()
+                # load the next chunk while this one is processed
+                if i + 1 < len(chunks):
+                    next_chunk = loader.submit(_load, *chunks[i + 1][1:])
+
+                if f0 == t * frames_per_timepoint:
+                    rgc_reduction = TemporalReduction(self.temporal_correlation)
+                    intensity_reduction = TemporalReduction("mean")
+
+                rgc_reduction.add(
+                    _frames_first(
+                        self._rgc.run(
+                            chunk,
+                            magnification=self.magnification,
+                            radius=self.radius,
+                            sensitivity=self.sensitivity,
+                            doIntensityWeighting=self.doIntensityWeighting,
+                            drift_table=None if drift_table is None else np.asarray(drift_table)[f0:f1],
+                            run_type=self.run_type,
+                        )
+                    )
+                )
+                intensity_reduction.add(
+                    _frames_first(
+                        self._magnify.run(
+                            chunk.reshape((-1, rows, cols)),
+                            np.tile(shift_row[f0:f1], n_batch),
+                            np.tile(shift_col[f0:f1], n_batch),
+                            self.magnification,
+                            self.magnification,
+                            run_type=self.run_type,
+                        )
+                    )
+                )
+
+                if f1 == (t + 1) * frames_per_timepoint:
+                    reconstruction[..., t, :, :] = rgc_reduction.get_result().reshape(batch_shape + (rowsM, colsM))
+                    intensity[..., t, :, :] = intensity_reduction.get_result().reshape(batch_shape + (rowsM, colsM))
+                    pbar.update(1)
+
+        return reconstruction, intensity
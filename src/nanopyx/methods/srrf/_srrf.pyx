@@ -2,6 +2,14 @@
 
 from ...core.transform.sr_radiality cimport Radiality
 from ...core.transform.sr_temporal_correlations import *
+from ...core.transform.translation import translate_array
+from ...liquid import CRShiftAndMagnify
+from ...liquid.__interpolation_tools__ import get_drift_shifts
+from ...liquid.__tiling__ import DEFAULT_MEMORY_BUDGET, run_reduced
+from ...liquid._le_radiality import Radiality as Radiality_liquid
+from ...liquid._le_temporal_correlations import TemporalCorrelations
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import numpy as np
 cimport numpy as np
@@ -29,31 +37,92 @@ cdef class SRRF:
 
         self.radiality = Radiality(magnification, ringRadius, border, radialityPositivityConstraint, doIntensityWeighting)
 
-    def calculate(self, dataset: np.ndarray, int frames_per_timepoint, int SRRForder = 1):
+    def calculate(self, dataset: np.ndarray, int frames_per_timepoint, int SRRForder = 1, use_liquid: bool = False, int max_in_flight = 2, frames_per_chunk: int = None, drift_table = None):
+        """
+        Calculates the SRRF reconstruction and the intensity of each timepoint
+        Timepoints, and the channels of a batch, are processed concurrently as independent work items, with at most
+        max_in_flight blocks of frames in memory, and the results are written straight into the preallocated output
+        arrays
+        :param dataset: array-like with shape (n_frames, rows, cols) that supports slicing along the frames, or a
+            batch of such stacks, e.g. (channels, n_frames, rows, cols)
+        :param frames_per_timepoint: number of frames reconstructed into each timepoint, 0 uses all the frames
+        :param SRRForder: order of the temporal correlation, see calculate_SRRF_temporal_correlations
+        :param use_liquid: if True, the radiality is calculated with the Liquid Engine Radiality, on the fastest
+            backend, and reduced in chunks of frames_per_chunk frames as they are processed
+        :param max_in_flight: maximum number of timepoints processed concurrently
+        :param frames_per_chunk: with use_liquid, number of frames processed at once; if None, calculated from the
+            default memory budget, shared by the timepoints in flight
+        :param drift_table: drift table with shape (n_frames, 3), see DriftEstimatorTable, shared by the stacks of a
+            batch; with use_liquid the drift is corrected while the frames are magnified, otherwise each block of
+            frames is translated before its radiality is calculated
+        :return: (SRRF reconstruction, intensity), float32 arrays with shape (n_timepoints, rows * M, cols * M),
+            preceded by the batch axes of the dataset
+        """
+        dataset_shape = tuple((<object> dataset).shape)
+        batch_shape = dataset_shape[:-3]
+        n_frames, rows, cols = dataset_shape[-3:]
+        cdef int n_batch = np.prod(batch_shape, dtype=np.int64)
 
         if frames_per_timepoint == 0:
-            frames_per_timepoint = dataset.shape[0]
-        elif frames_per_timepoint > dataset.shape[0]:
-            frames_per_timepoint = dataset.shape[0]
-
-        data_srrf = []
-        data_intensity = []
-
-        with tqdm(total=dataset.shape[0] // frames_per_timepoint, desc="Calculating SRRF", unit="frame") as pbar:
-            for i in range(dataset.shape[0] // frames_per_timepoint):
-                data_block = dataset[i*frames_per_timepoint:(i+1)*frames_per_timepoint]
-
+            frames_per_timepoint = n_frames
+        elif frames_per_timepoint > n_frames:
+            frames_per_timepoint = n_frames
+
+        cdef int n_timepoints = n_frames // frames_per_timepoint
+        shift_row, shift_col = get_drift_shifts(drift_table, n_frames)
+        shape_out = (n_timepoints, rows * self.magnification, cols * self.magnification)
+        data_srrf = np.empty(batch_shape + shape_out, dtype=np.float32)
+        data_intensity = np.empty(batch_shape + shape_out, dtype=np.float32)
+        # views with a single batch axis, written by the work items
+        _data_srrf = data_srrf.reshape((n_batch,) + shape_out)
+        _data_intensity = data_intensity.reshape((n_batch,) + shape_out)
+
+        # a single engine is shared by the work items, orders 0 and 1 are a plain max and mean
+        temporal_correlations = TemporalCorrelations()
+
+        def _reduce(block):
+            if SRRForder in TemporalCorrelations.orders:
+                return temporal_correlations.run(block, SRRForder)
+            return calculate_SRRF_temporal_correlations(block, SRRForder)
+
+        if use_liquid:
+            liquid_radiality = Radiality_liquid()
+            crsm = CRShiftAndMagnify()
+            memory_budget = DEFAULT_MEMORY_BUDGET // max(1, max_in_flight)
+            # input, the image at M and the float64 lagged products of the reduction
+            intensity_bytes_per_frame = rows * cols * (4 * (1 + self.magnification**2) + 8 * 16 * self.magnification**2)
+
+        def _process(int b, int i):
+            index = np.unravel_index(b, batch_shape) + (slice(i*frames_per_timepoint, (i+1)*frames_per_timepoint),)
+            data_block = np.asarray(dataset[index], dtype=np.float32)
+            block_shift_row = shift_row[i*frames_per_timepoint:(i+1)*frames_per_timepoint]
+            block_shift_col = shift_col[i*frames_per_timepoint:(i+1)*frames_per_timepoint]
+
+            if use_liquid:
+                block_drift_table = None if drift_table is None else np.asarray(drift_table)[i*frames_per_timepoint:(i+1)*frames_per_timepoint]
+                _data_srrf[b, i] = liquid_radiality.run_reduced(data_block, self.magnification, self.ringRadius, self.border, self.radialityPositivityConstraint, self.doIntensityWeighting, reduction=SRRForder, frames_per_chunk=frames_per_chunk, memory_budget=memory_budget, drift_table=block_drift_table)[0]
+                _data_intensity[b, i] = run_reduced(lambda chunk, f0, f1: crsm.run(chunk, block_shift_row[f0:f1], block_shift_col[f0:f1], self.magnification, self.magnification), data_block, SRRForder, frames_per_chunk=frames_per_chunk, bytes_per_frame=intensity_bytes_per_frame, memory_budget=memory_budget)[0]
+            else:
+                if drift_table is not None:
+                    data_block = np.asarray(translate_array(np.ascontiguousarray(data_block), np.stack([np.zeros_like(block_shift_row), block_shift_row, block_shift_col], axis=1)))
                 data_block_radiality, data_block_intensity = self.radiality.calculate(data_block)[:2]
-
-                data_block_srrf = calculate_SRRF_temporal_correlations(data_block_radiality, SRRForder)
-                data_block_intensity = calculate_SRRF_temporal_correlations(data_block_intensity, SRRForder)
-
-                # data_block_srrf = np.asarray(data_block_radiality).mean(axis=0) 
-                # data_block_intensity = np.asarray(data_block_intensity).mean(axis=0)
-
-                data_srrf.append(data_block_srrf)
-                data_intensity.append(data_block_intensity)
-
-                pbar.update(1)
-
-        return np.asarray(data_srrf), np.asarray(data_intensity)
+                _data_srrf[b, i] = _reduce(data_block_radiality)
+                _data_intensity[b, i] = _reduce(data_block_intensity)
+
+        with tqdm(total=n_batch * n_timepoints, desc="Calculating SRRF", unit="frame") as pbar:
+            with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as executor:
+                in_flight = set()
+                for b, i in np.ndindex(n_batch, n_timepoints):
+                    # bounded number of blocks in flight, so that memory does not grow with the dataset
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                            pbar.update(1)
+                    in_flight.add(executor.submit(_process, b, i))
+
+                for future in in_flight:
+                    future.result()
+                    pbar.update(1)
+
+        return data_srrf, data_intensity
@@ -14,9 +14,11 @@ def extract_function_code(file_txt, function_name):
     :param function_name: Function name to extract
     :return: Function signature and code (str, str)
     """
-    # make all "float *" global
+    # make all "float *" and "int *" global
     file_txt = file_txt.replace("float *", "__global float *")
     file_txt = file_txt.replace("float* ", "__global float *")
+    file_txt = file_txt.replace("int *", "__global int *")
+    file_txt = file_txt.replace("int* ", "__global int *")
 
     function_code_lines = []
 
@@ -60,7 +62,7 @@ def find_function_header(file_txt, function_name):
     :param function_name: Function name to extract
     :return: Function header (str)
     """
-    p_function_name = file_txt.find(function_name)
+    p_function_name = file_txt.find(function_name + "(")
     if p_function_name == -1:
         return None
 
@@ -1,4 +1,5 @@
-from nanopyx.core.transform.blocks import assemble_frame_from_blocks
+import numpy as np
+from nanopyx.core.transform.blocks import assemble_frame_from_blocks, split_frame_into_blocks
 from nanopyx.core.generate.beads import generate_timelapse_drift
 
 
@@ -10,4 +11,16 @@ def test_assemble_blocks(random_timelapse_w_drift):
 
     print(new_arr.shape)
 
-    assert new_arr.shape == (h*10, w*5)
\ No newline at end of file
+    assert new_arr.shape == (h*10, w*5)
+
+
+def test_split_blocks_overlap():
+    img = np.arange(64 * 48, dtype=np.float32).reshape(64, 48)
+
+    blocks = np.asarray(split_frame_into_blocks(img, 4, 3, overlap=4))
+
+    assert blocks.shape == (12, 24, 24)
+    assert np.array_equal(blocks[0], img[:24, :24])
+    assert np.array_equal(blocks[5], img[12:36, 24:48])
+    blocks = np.asarray(split_frame_into_blocks(img, 4, 3))
+    assert np.array_equal(np.asarray(assemble_frame_from_blocks(blocks, 4, 3)), img)
@@ -1,4 +1,7 @@
+import numpy as np
+
 from nanopyx.core.transform.binning import rebin_2d
+from nanopyx.liquid import Binning
 
 
 def test_rebin_2d_sum(random_timelapse_w_drift):
@@ -21,3 +24,56 @@ def test_rebin_2d_max(random_timelapse_w_drift):
     assert binned_arr.shape == (random_timelapse_w_drift.shape[0],
                                 int(random_timelapse_w_drift.shape[1]/5),
                                 int(random_timelapse_w_drift.shape[2]/5))
+
+
+def test_liquid_binning(random_timelapse_w_drift):
+    image = random_timelapse_w_drift[:5, :103, :98].astype(np.float32)
+    cropped = image[:, :100, :95]
+    binning = Binning()
+
+    for mode in ["sum", "mean", "max"]:
+        for run_time, run_type, binned in binning.benchmark(image, 5, mode=mode):
+            np.testing.assert_allclose(binned, rebin_2d(cropped, 5, mode=mode), rtol=1e-5)
+
+
+def test_liquid_binning_uint16():
+    image = np.full((3, 64, 64), 65535, dtype=np.uint16)
+    binning = Binning()
+
+    for run_time, run_type, binned in binning.benchmark(image, 8):
+        assert binned.dtype == np.int64
+        assert np.all(binned == 65535 * 64)
+
+    binned = binning.run(image, 8, mode="max", run_type="Threaded")
+    assert binned.dtype == np.uint16
+    assert np.all(binned == 65535)
+
+
+def test_liquid_binning_pad_and_chunks():
+    image = np.random.randint(0, 1000, (7, 10, 11)).astype(np.uint16)
+    binning = Binning()
+
+    padded = np.zeros((7, 12, 12), dtype=np.int64)
+    padded[:, :10, :11] = image
+    binned = binning.run(image, 3, mode="sum", edge="pad", run_type="Threaded")
+    np.testing.assert_array_equal(binned, rebin_2d(padded, 3, mode="sum"))
+
+    chunked = binning.run_chunked(image, 3, mode="sum", edge="pad", frames_per_chunk=3, run_type="Unthreaded")
+    np.testing.assert_array_equal(binned, chunked)
+
+
+def test_liquid_binning_wide_integers():
+    # values above 2**24 are not representable exactly as float32
+    image = np.full((2, 16, 16), 2**31 + 1, dtype=np.uint32)
+    image[:, 0, 0] = 2**32 - 1
+    binning = Binning()
+
+    for dtype in (np.uint32, np.int64):
+        for run_time, run_type, binned in binning.benchmark(image.astype(dtype), 4):
+            assert binned.dtype == np.int64
+            assert binned[0, 0, 0] == (2**31 + 1) * 15 + 2**32 - 1
+            assert np.all(binned[:, 1:, 1:] == (2**31 + 1) * 16)
+
+        binned = binning.run(image.astype(dtype), 4, mode="max", run_type="Threaded")
+        assert binned[0, 0, 0] == 2**32 - 1
+        assert np.all(binned[:, 1:, 1:] == 2**31 + 1)
@@ -0,0 +1,63 @@
+import numpy as np
+
+from nanopyx.core.analysis.ccm import calculate_ccm, calculate_ccm_from_ref, calculate_rccm, calculate_slice_ccm
+from nanopyx.core.analysis.pearson_correlation import calculate_ppmcc
+from nanopyx.core.transform.interpolation_catmull_rom import Interpolator
+
+
+def _reference_slice_ccm(img_ref, img_slice):
+    # complex FFT formulation, normalized by the Pearson's correlation at the extrema
+    ccm = np.fft.fftshift(np.fft.ifft2(np.fft.fft2(img_ref) * np.fft.fft2(img_slice).conj())).real[::-1, ::-1]
+    h, w = ccm.shape
+    y_max, x_max = np.unravel_index(np.argmax(ccm), ccm.shape)
+    y_min, x_min = np.unravel_index(np.argmin(ccm), ccm.shape)
+    max_ppmcc = calculate_ppmcc(img_ref, img_slice, x_max - w // 2, y_max - h // 2)
+    min_ppmcc = calculate_ppmcc(img_ref, img_slice, x_min - w // 2, y_min - h // 2)
+    return (ccm - ccm.min()) / (ccm.max() - ccm.min()) * (max_ppmcc - min_ppmcc) + min_ppmcc
+
+
+def test_ccm():
+    rng = np.random.default_rng(0)
+    img_stack = rng.random((40, 32, 32)).astype(np.float32)
+    img_stack[:, 10:14, 12:15] += 3
+
+    ccm_first = np.asarray(calculate_ccm(img_stack, 0))
+    ccm_previous = np.asarray(calculate_ccm(img_stack, 1))
+    ccm_ref = np.asarray(calculate_ccm_from_ref(img_stack, img_stack[5].copy()))
+
+    # frames 33 and 34 are in the second batch of FFTs
+    for i in (0, 1, 33, 34):
+        np.testing.assert_allclose(ccm_first[i], _reference_slice_ccm(img_stack[0], img_stack[i]), atol=1e-5)
+        expected = _reference_slice_ccm(img_stack[max(0, i - 1)], img_stack[i])
+        np.testing.assert_allclose(ccm_previous[i], expected, atol=1e-5)
+        np.testing.assert_allclose(ccm_ref[i], _reference_slice_ccm(img_stack[5], img_stack[i]), atol=1e-5)
+
+    expected = _reference_slice_ccm(img_stack[3], img_stack[7])
+    np.testing.assert_allclose(calculate_slice_ccm(img_stack[3], img_stack[7]), expected, atol=1e-5)
+
+
+def test_slice_ccm_odd_shapes():
+    rng = np.random.default_rng(2)
+
+    # polar images of shape (360, r) are correlated without being made even and square
+    for shape in [(33, 33), (31, 40), (40, 31), (360, 45)]:
+        img_ref = rng.random(shape).astype(np.float32)
+        img_ref[5:9, 7:12] += 3
+        img_slice = np.roll(img_ref, (2, -3), axis=(0, 1)) + rng.random(shape).astype(np.float32) * 0.1
+        expected = _reference_slice_ccm(img_ref, img_slice)
+        np.testing.assert_allclose(calculate_slice_ccm(img_ref, img_slice), expected, atol=1e-5)
+
+
+def test_rccm():
+    rng = np.random.default_rng(1)
+    img_ref = rng.random((32, 32)).astype(np.float32)
+    img_ref[10:14, 12:18] += 3
+    img_slice = np.asarray(Interpolator(img_ref).rotate(np.deg2rad(30)), dtype=np.float32)
+
+    rccm = calculate_rccm(img_slice, img_ref)
+    assert rccm.shape == (360, 32, 32)
+
+    # each rotation slice is the cross correlation of the reference with the rotated image
+    for degree in (0, 45, 90, 200, 330, 359):
+        rotated = np.asarray(Interpolator(img_slice).rotate(degree * np.pi / 180), dtype=np.float32)
+        np.testing.assert_allclose(rccm[degree], calculate_slice_ccm(img_ref, rotated), atol=1e-5)
@@ -5,4 +5,13 @@ from nanopyx.core.analysis.decorr import DecorrAnalysis
 def test_decorr_analysis(random_timelapse_w_drift):
     decorr = DecorrAnalysis(pixel_size=1, units="pixel", do_plot=False)
     decorr.run_analysis(random_timelapse_w_drift[0])
-    assert not math.isinf(decorr.resolution)
\ No newline at end of file
+    assert not math.isinf(decorr.resolution)
+
+
+def test_decorr_analysis_batch(random_timelapse_w_drift):
+    decorr = DecorrAnalysis(pixel_size=1, units="pixel", do_plot=False)
+    resolutions = decorr.run_batch_analysis(random_timelapse_w_drift[:3])
+
+    for i in range(3):
+        decorr.run_analysis(random_timelapse_w_drift[i])
+        assert math.isclose(resolutions[i], decorr.resolution, rel_tol=1e-6)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from nanopyx.core.generate.noise_add_simplex import get_simplex_noise
+from nanopyx.liquid._le_radial_gradient_convergence import RadialGradientConvergence
+from nanopyx.methods.esrrf import eSRRF
+
+
+def test_esrrf():
+    image = get_simplex_noise(32, 40, frames=6, amplitude=1000)
+    rgc_maps = np.asarray(RadialGradientConvergence().run(image, magnification=2, run_type="Unthreaded"))
+
+    esrrf = eSRRF(magnification=2, run_type="Unthreaded")
+    reconstruction, intensity = esrrf.calculate(image, frames_per_timepoint=3, frames_per_chunk=2)
+
+    assert reconstruction.shape == intensity.shape == (2, 64, 80)
+    np.testing.assert_allclose(reconstruction[1], rgc_maps[3:].mean(axis=0), rtol=1e-5, atol=1e-4)
+
+
+def test_esrrf_channels():
+    image = np.stack(
+        [get_simplex_noise(24, 30, frames=4, amplitude=1000), get_simplex_noise(24, 30, frames=4, amplitude=100)]
+    )
+
+    esrrf = eSRRF(magnification=2, temporal_correlation="ac2", run_type="Unthreaded")
+    reconstruction, intensity = esrrf.calculate(image, frames_per_timepoint=2, frames_per_chunk=1)
+
+    assert reconstruction.shape == intensity.shape == (2, 2, 48, 60)
+    for c in range(2):
+        expected_reconstruction, expected_intensity = esrrf.calculate(image[c], frames_per_timepoint=2)
+        np.testing.assert_allclose(reconstruction[c], expected_reconstruction, rtol=1e-5, atol=1e-4)
+        np.testing.assert_allclose(intensity[c], expected_intensity, rtol=1e-5, atol=1e-4)
+
+
+def test_esrrf_drift():
+    image = get_simplex_noise(24, 30, frames=4, amplitude=1000)
+    drift_table = np.zeros((4, 3), dtype=np.float32)
+    drift_table[:, 1] = [0, 0.5, 1.2, -0.7]
+    drift_table[:, 2] = [0, -0.3, 0.8, 2]
+    rgc_maps = np.asarray(
+        RadialGradientConvergence().run(image, magnification=2, drift_table=drift_table, run_type="Unthreaded")
+    )
+
+    esrrf = eSRRF(magnification=2, run_type="Unthreaded")
+    reconstruction, intensity = esrrf.calculate(
+        image, frames_per_timepoint=2, frames_per_chunk=1, drift_table=drift_table
+    )
+    np.testing.assert_allclose(reconstruction[1], rgc_maps[2:].mean(axis=0), rtol=1e-5, atol=1e-4)
@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from nanopyx.core.analysis.estimate_shift import SUBPIXEL_METHODS, get_subpixel_max
+
+
+@pytest.mark.parametrize("method", SUBPIXEL_METHODS)
+def test_get_subpixel_max(method):
+    rng = np.random.default_rng(0)
+    peaks = rng.uniform(10, 22, size=(8, 2))
+    y, x = np.mgrid[:32, :32]
+    ccm = np.exp(-((y - peaks[:, 0, None, None]) ** 2 + (x - peaks[:, 1, None, None]) ** 2) / 8).astype(np.float32)
+
+    coords = get_subpixel_max(ccm, method=method)
+    tolerance = 0.3 if method == "centroid" else 0.05
+
+    assert coords.shape == (8, 2)
+    assert np.allclose(coords - 0.5, peaks, atol=tolerance)
+    assert np.allclose(get_subpixel_max(ccm[0], method=method), coords[0])
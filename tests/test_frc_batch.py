@@ -0,0 +1,18 @@
+import numpy as np
+
+from nanopyx.core.analysis.frc import FIRECalculator
+
+
+def test_frc_batch():
+    rng = np.random.default_rng(0)
+    base = rng.random((128, 128)).cumsum(axis=0).cumsum(axis=1)
+    imgs_1 = (base + rng.normal(0, 50, (3, 128, 128))).astype(np.float32)
+    imgs_2 = (base + rng.normal(0, 50, (3, 128, 128))).astype(np.float32)
+
+    calculator = FIRECalculator(pixel_size=100, units="nm")
+    fire_numbers = calculator.calculate_fire_numbers(imgs_1, imgs_2)
+
+    for i in range(3):
+        calculator.calculate_fire_number(imgs_1[i], imgs_2[i])
+        assert np.isclose(fire_numbers[i], calculator.fire_number)
+    assert calculator.calculate_frc_curves(imgs_1, imgs_2).shape == (3, 63, 3)
@@ -8,6 +8,9 @@ from nanopyx.core.transform.image_shift import (
     scipy_shift,
     skimage_shift,
 )
+from nanopyx.core.transform.interpolation_catmull_rom import Interpolator
+from nanopyx.core.transform.translation import translate_array
+from nanopyx.liquid import Translation
 
 
 def test_catmull_rom_shift(random_image_with_squares, plt):
@@ -148,3 +151,31 @@ def test_cv2_shift_2(random_image_with_squares, plt):
     axarr[1].imshow(shifted1)
     axarr[2].imshow(shifted2)
     axarr[3].imshow(delta)
+
+
+def test_translate_array(random_timelapse_w_drift):
+    image = random_timelapse_w_drift[:8, :64, :48].astype(np.float32)
+    drift_table = np.zeros((8, 3), dtype=np.float32)
+    drift_table[:, 1] = np.linspace(-3.3, 2.7, 8)
+    drift_table[:, 2] = np.linspace(1.2, -4.5, 8)
+
+    expected = np.array(
+        [Interpolator(image[i]).shift(drift_table[i, 2], drift_table[i, 1]) for i in range(image.shape[0])]
+    )
+
+    # strided views are copied to a contiguous buffer, and written back when translated in place
+    wide = np.repeat(image, 2, axis=2)
+    np.testing.assert_array_equal(translate_array(wide[:, :, ::2], drift_table, out=np.empty_like(image)), expected)
+    translate_array(wide[:, :, ::2], drift_table)
+    np.testing.assert_array_equal(wide[:, :, ::2], expected)
+    np.testing.assert_array_equal(wide[:, :, 1::2], image)
+
+    out = np.empty_like(image)
+    assert translate_array(image, drift_table, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+    translate_array(image, drift_table)
+    np.testing.assert_array_equal(image, expected)
+
+    shifted = Translation().run(image, drift_table[:, 1], drift_table[:, 2], run_type="Threaded")
+    np.testing.assert_array_equal(shifted, translate_array(image.copy(), drift_table))
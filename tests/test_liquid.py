@@ -1,8 +1,11 @@
 import numpy as np
 
 from nanopyx.core.generate.noise_add_simplex import get_simplex_noise
+from nanopyx.core.transform.sr_radial_gradient_convergence import RadialGradientConvergence as CoreRGC
 from nanopyx.liquid._le_interpolation_bicubic import ShiftAndMagnify as BCShiftAndMagnify
 from nanopyx.liquid._le_interpolation_bicubic import ShiftScaleRotate as BCShiftScaleRotate
+from nanopyx.liquid._le_interpolation_bilinear import ShiftAndMagnify as BLShiftAndMagnify
+from nanopyx.liquid._le_interpolation_bilinear import ShiftScaleRotate as BLShiftScaleRotate
 from nanopyx.liquid._le_interpolation_catmull_rom import ShiftAndMagnify as CRShiftAndMagnify
 from nanopyx.liquid._le_interpolation_catmull_rom import ShiftScaleRotate as CRShiftScaleRotate
 from nanopyx.liquid._le_interpolation_lanczos import ShiftAndMagnify as LZShiftAndMagnify
@@ -11,6 +14,7 @@ from nanopyx.liquid._le_interpolation_nearest_neighbor import ShiftAndMagnify as
 from nanopyx.liquid._le_interpolation_nearest_neighbor import ShiftScaleRotate as NNShiftScaleRotate
 from nanopyx.liquid._le_mandelbrot_benchmark import MandelbrotBenchmark
 from nanopyx.liquid._le_radial_gradient_convergence import RadialGradientConvergence as RGC
+from nanopyx.liquid._le_radial_gradient_convergence_3d import RadialGradientConvergence3D as RGC3D
 from nanopyx.liquid._le_radiality import Radiality
 
 # flake8: noqa: E501
@@ -120,6 +124,45 @@ def test_interpolation_bicubic_ShiftAndMagnify(plt):
 # tag-end
 
 
+# tag-copy: test_interpolation_nearest_neighbor_ShiftAndMagnify; replace("nearest_neighbor", "bilinear"); replace("NNShiftAndMagnify", "BLShiftAndMagnify")
+def test_interpolation_bilinear_ShiftAndMagnify(plt):
+    M = 4
+    nFrames = 3
+    image = get_simplex_noise(64, 32, frames=nFrames, amplitude=1000)
+    shift_row = np.arange(nFrames, dtype=np.float32) * 0.5
+    shift_col = np.arange(nFrames, dtype=np.float32) * -0.5
+    SM = BLShiftAndMagnify()
+    bench_values = SM.benchmark(image, shift_row, shift_col, M, M)
+
+    images = []
+    titles = []
+    run_times = []
+
+    # unzip the values
+    for run_time, title, image in bench_values:
+        run_times.append(run_time)
+        titles.append(title)
+        images.append(image)
+
+    # ensure images are similar
+    for i in range(len(images)):
+        for j in range(i + 1, len(images)):
+            np.testing.assert_allclose(images[i], images[j], rtol=1e1)
+
+    nFrames = images[0].shape[0]
+    # show images
+    fig, axes = plt.subplots(nFrames, len(images), figsize=(20, 10))
+    for i in range(nFrames):
+        for j in range(len(images)):
+            if i == 0:
+                axes[i, j].set_title(titles[j])
+            axes[i, j].imshow(images[j][i], cmap="hot")
+            axes[i, j].axis("off")
+
+
+# tag-end
+
+
 # tag-copy: test_interpolation_nearest_neighbor_ShiftAndMagnify; replace("nearest_neighbor", "catmull_rom"); replace("NNShiftAndMagnify", "CRShiftAndMagnify")
 def test_interpolation_catmull_rom_ShiftAndMagnify(plt):
     M = 4
@@ -276,6 +319,45 @@ def test_interpolation_bicubic_ShiftScaleRotate(plt):
 # tag-end
 
 
+# tag-copy: test_interpolation_nearest_neighbor_ShiftScaleRotate; replace("nearest_neighbor", "bilinear"); replace("NNShiftScaleRotate", "BLShiftScaleRotate")
+def test_interpolation_bilinear_ShiftScaleRotate(plt):
+    M = 4
+    nFrames = 3
+    image = get_simplex_noise(64, 32, frames=nFrames, amplitude=1000)
+    shift_row = np.arange(nFrames, dtype=np.float32) * 0.5
+    shift_col = np.arange(nFrames, dtype=np.float32) * -0.5
+    angle = np.pi / 4
+    SM = BLShiftScaleRotate()
+    bench_values = SM.benchmark(image, shift_row, shift_col, M, M, angle)
+
+    images = []
+    titles = []
+    run_times = []
+
+    # unzip the values
+    for run_time, title, image in bench_values:
+        run_times.append(run_time)
+        titles.append(title)
+        images.append(image)
+
+    # ensure images are similar
+    for i in range(len(images)):
+        for j in range(i + 1, len(images)):
+            np.testing.assert_allclose(images[i], images[j], rtol=1e1)
+
+    # show images
+    fig, axes = plt.subplots(nFrames, len(images), figsize=(20, 10))
+    for i in range(nFrames):
+        for j in range(len(images)):
+            if i == 0:
+                axes[i, j].set_title(titles[j])
+            axes[i, j].imshow(images[j][i], cmap="hot")
+            axes[i, j].axis("off")
+
+
+# tag-end
+
+
 # tag-copy: test_interpolation_nearest_neighbor_ShiftScaleRotate; replace("nearest_neighbor", "catmull_rom"); replace("NNShiftScaleRotate", "CRShiftScaleRotate")
 def test_interpolation_catmull_rom_ShiftScaleRotate(plt):
     M = 4
@@ -353,6 +435,214 @@ def test_interpolation_lanzcos_ShiftScaleRotate(plt):
 
 # tag-end
 
+
+def test_interpolation_catmull_rom_ShiftAndMagnify_tiled(tmp_path):
+    M = 3
+    nFrames = 3
+    image = get_simplex_noise(61, 47, frames=nFrames, amplitude=1000)
+    shift_row = np.arange(nFrames, dtype=np.float32) * 0.5
+    shift_col = np.arange(nFrames, dtype=np.float32) * -0.5
+    SM = CRShiftAndMagnify()
+    full = np.asarray(SM.run(image, shift_row, shift_col, M, M, run_type="Unthreaded"))
+    tiled = SM.run_tiled(image, shift_row, shift_col, M, tile_shape=(16, 20), n_workers=2)
+    np.testing.assert_allclose(full, tiled, rtol=1e-5)
+
+    tiled = SM.run_tiled(image, shift_row, shift_col, M, out=str(tmp_path / "tiled.npy"), memory_budget=2**20)
+    np.testing.assert_allclose(full, np.load(tmp_path / "tiled.npy"), rtol=1e-5)
+
+
+def test_liquid_engine_config_threads(tmp_path, monkeypatch):
+    import yaml
+    from concurrent.futures import ThreadPoolExecutor
+    from nanopyx.liquid import __liquid_engine__
+
+    monkeypatch.setattr(__liquid_engine__, "__config_folder__", str(tmp_path))
+    SM = CRShiftAndMagnify()
+    # an unparsable config is treated as empty
+    with open(SM._config_file, "w") as f:
+        f.write("Threaded:\n  '(['shape(3, 6")
+    SM = CRShiftAndMagnify()
+
+    # a shared instance stores its run times from several threads
+    images = [get_simplex_noise(8 + i, 9, frames=2, amplitude=1000) for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda image: SM.run(image, 0, 0, 2, 2), images))
+
+    with open(SM._config_file) as f:
+        cfg = yaml.load(f, Loader=yaml.FullLoader)
+    assert sum(c[2] for run_type in cfg.values() for c in run_type.values()) == len(images)
+
+
+def test_rgc_run_types():
+    image = get_simplex_noise(40, 57, frames=3, amplitude=1000)
+    liquid_rgc = RGC()
+    # the core implementation leaves the first 2 rows and columns empty
+    reference = np.asarray(CoreRGC(magnification=2).calculate(image)[0])
+
+    for run_time, run_type, rgc_map in liquid_rgc.benchmark(image, magnification=2):
+        np.testing.assert_allclose(np.asarray(rgc_map)[:, 2:, 2:], reference[:, 2:, 2:], rtol=1e-4, atol=1e-2)
+
+
+def test_rgc_tiled():
+    image = get_simplex_noise(57, 71, frames=2, amplitude=1000)
+    liquid_rgc = RGC()
+    full = np.asarray(liquid_rgc.run(image, magnification=2, run_type="Unthreaded"))
+    tiled = liquid_rgc.run_tiled(image, magnification=2, tile_shape=(20, 25), n_workers=2)
+    np.testing.assert_allclose(full, tiled, rtol=1e-5, atol=1e-5)
+
+
+def test_rgc_tabulated():
+    image = get_simplex_noise(23, 29, frames=2, amplitude=1000)
+    liquid_rgc = RGC()
+
+    for magnification in (2, 3, 5):
+        for radius in (1, 1.5, 2.5):
+            for sensitivity in (1, 2):
+                # the core implementation evaluates _c_calculate_rgc per pixel on the same gradients,
+                # skipping the first magnification rows and columns
+                reference = np.asarray(CoreRGC(magnification, radius, sensitivity, False).calculate(image)[0])
+                rgc_map = np.asarray(
+                    liquid_rgc.run(
+                        image,
+                        magnification=magnification,
+                        radius=radius,
+                        sensitivity=sensitivity,
+                        doIntensityWeighting=False,
+                        run_type="Unthreaded",
+                    )
+                )
+                np.testing.assert_allclose(
+                    rgc_map[:, magnification:, magnification:],
+                    reference[:, magnification:, magnification:],
+                    rtol=1e-5,
+                    atol=1e-5,
+                )
+
+
+def test_radiality_run_types():
+    image = get_simplex_noise(24, 31, frames=5, amplitude=1000)
+    liquid_rad = Radiality()
+    reference = np.asarray(liquid_rad._run_unthreaded(image, 2, 0.5, 1, True, True))
+
+    for run_time, run_type, imRad in liquid_rad.benchmark(image, magnification=2, border=1):
+        np.testing.assert_allclose(np.asarray(imRad), reference, rtol=1e-4, atol=1e-2)
+
+
+def test_rgc_radiality_masked():
+    image = get_simplex_noise(24, 31, frames=3, amplitude=1000)
+    roi = np.zeros((24, 31), dtype=bool)
+    roi[5:15, 8:20] = True
+    roi_magnified = np.kron(roi, np.ones((2, 2), dtype=bool))
+    threshold = np.percentile(image, 80)
+
+    for engine, kwargs in [(RGC(), {}), (RGC(), {"low_memory": True}), (Radiality(), {"border": 1})]:
+        # every pixel of the unmasked run is computed
+        reference = np.asarray(engine.run(image, magnification=2, run_type="Unthreaded", **kwargs))
+
+        for run_time, run_type, out in engine.benchmark(image, magnification=2, mask=roi, **kwargs):
+            out = np.asarray(out)
+            np.testing.assert_allclose(out[:, roi_magnified], reference[:, roi_magnified], rtol=1e-4, atol=1e-2)
+            assert np.all(out[:, ~roi_magnified] == 0)
+
+        out = np.asarray(engine.run(image, magnification=2, mask=threshold, **kwargs))
+        computed = out != 0
+        np.testing.assert_allclose(out[computed], reference[computed], rtol=1e-4, atol=1e-2)
+        assert computed.sum() < reference.size
+
+
+def test_rgc_sweep():
+    image = get_simplex_noise(64, 64, frames=4, amplitude=1000)
+    liquid_rgc = RGC()
+    radii = (1, 1.5)
+    sensitivities = (1, 2)
+
+    rgc_maps, scores = liquid_rgc.run_sweep(
+        image, magnification=2, radii=radii, sensitivities=sensitivities, score=["error_map", "frc"]
+    )
+    assert rgc_maps.shape == (2, 2, 4, 128, 128)
+    for key in ("RSE", "RSP", "FRC"):
+        assert scores[key].shape == (2, 2)
+        assert np.all(np.isfinite(scores[key]))
+
+    for i, radius in enumerate(radii):
+        for j, sensitivity in enumerate(sensitivities):
+            reference = np.asarray(
+                liquid_rgc.run(image, magnification=2, radius=radius, sensitivity=sensitivity, run_type="Unthreaded")
+            )
+            np.testing.assert_allclose(rgc_maps[i, j], reference, rtol=1e-4, atol=1e-2)
+
+
+def test_rgc_radiality_batch():
+    image = np.stack(
+        [get_simplex_noise(20, 24, frames=3, amplitude=1000), get_simplex_noise(20, 24, frames=3, amplitude=100)]
+    )
+
+    for engine in (RGC(), Radiality()):
+        out = np.asarray(engine.run(image, magnification=2, run_type="Unthreaded"))
+        assert out.shape == (2, 3, 40, 48)
+        for c in range(2):
+            np.testing.assert_array_equal(out[c], engine.run(image[c], magnification=2, run_type="Unthreaded"))
+
+        out = np.asarray(engine.run(image[:, np.newaxis], magnification=2, run_type="Unthreaded"))
+        assert out.shape == (2, 1, 3, 40, 48)
+
+
+def test_rgc_radiality_drift():
+    image = get_simplex_noise(32, 36, frames=3, amplitude=1000)
+    drift_table = np.array([[0, 0, 0], [0, 2, -1], [0, -3, 1]], dtype=np.float32)
+    # integer shifts are exact, so correcting the drift while magnifying matches the shifted frames
+    corrected = np.stack(
+        [np.roll(image[f], (int(drift_table[f, 1]), int(drift_table[f, 2])), axis=(0, 1)) for f in range(3)]
+    )
+
+    for engine, kwargs in [(RGC(), {}), (RGC(), {"low_memory": True}), (Radiality(), {})]:
+        reference = np.asarray(engine.run(corrected, magnification=2, run_type="Unthreaded", **kwargs))
+
+        for run_time, run_type, out in engine.benchmark(image, magnification=2, drift_table=drift_table, **kwargs):
+            np.testing.assert_allclose(
+                np.asarray(out)[:, 16:-16, 16:-16], reference[:, 16:-16, 16:-16], rtol=1e-4, atol=1e-2
+            )
+
+
+def test_rgc_reduced():
+    image = get_simplex_noise(32, 40, frames=6, amplitude=1000)
+    liquid_rgc = RGC()
+    rgc_maps = np.asarray(liquid_rgc.run(image, magnification=2, run_type="Unthreaded"))
+
+    reduced = liquid_rgc.run_reduced(
+        image, magnification=2, reduction="mean", frames_per_timepoint=3, frames_per_chunk=2, run_type="Unthreaded"
+    )
+    expected = np.stack([rgc_maps[:3].mean(axis=0), rgc_maps[3:].mean(axis=0)])
+    np.testing.assert_allclose(reduced, expected, rtol=1e-5, atol=1e-4)
+
+
+def test_rgc_low_memory():
+    image = get_simplex_noise(40, 57, frames=2, amplitude=1000)
+    liquid_rgc = RGC()
+    # the core implementation reads magnified gradients and leaves the first 3 rows and columns empty
+    reference = np.asarray(CoreRGC(magnification=3).calculate(image)[0])
+
+    for run_time, run_type, rgc_map in liquid_rgc.benchmark(image, magnification=3, low_memory=True):
+        np.testing.assert_allclose(np.asarray(rgc_map)[:, 3:, 3:], reference[:, 3:, 3:], rtol=1e-4, atol=1e-2)
+
+
+def test_rgc_3d(tmp_path):
+    z, y, x = np.mgrid[0:6, 0:9, 0:10]
+    volume = 100 * np.exp(-((z - 2.5) ** 2 + (y - 4.2) ** 2 + (x - 5.4) ** 2) / 2).astype(np.float32)
+    liquid_rgc = RGC3D()
+    reference = np.asarray(liquid_rgc.run(volume, magnification=2, run_type="Unthreaded"))
+    assert reference.shape == (1, 12, 18, 20)
+    assert np.unravel_index(reference[0].argmax(), reference[0].shape) == (5, 9, 11)
+
+    for run_time, run_type, rgc_map in liquid_rgc.benchmark(volume, magnification=2):
+        np.testing.assert_allclose(np.asarray(rgc_map), reference, rtol=1e-4, atol=1e-4)
+
+    out = liquid_rgc.run_stream(np.stack([volume, volume]), magnification=2, out=str(tmp_path / "rgc_3d.npy"))
+    np.testing.assert_allclose(
+        np.load(tmp_path / "rgc_3d.npy"), np.concatenate([reference, reference]), rtol=1e-4, atol=1e-4
+    )
+
+
 """
 def test_rgc(downloader):
 
@@ -5,6 +5,7 @@ from nanopyx.core.transform.image_magnify import (bicubic_zoom,
                                                   catmull_rom_zoom, cv2_zoom,
                                                   fourier_zoom, lanczos_zoom,
                                                   scipy_zoom, skimage_zoom)
+from nanopyx.core.transform.interpolation_fft_zoom import magnify, magnify_stack
 
 
 def test_fourier_zoom(random_image_with_ramp, plt):
@@ -24,6 +25,20 @@ def test_fourier_zoom(random_image_with_ramp, plt):
     axarr[2].imshow(random_image_with_ramp-imageMagnified)
 
 
+def test_fourier_zoom_stack(random_image_with_ramp):
+    stack = np.stack([random_image_with_ramp, random_image_with_ramp[::-1], random_image_with_ramp.T])
+    stack = rebin_2d(stack, 2, mode="mean").astype(np.float32)
+
+    stackMagnified = magnify_stack(stack, 2)
+    assert stackMagnified.shape == (3, stack.shape[1] * 2, stack.shape[2] * 2)
+    for i in range(stack.shape[0]):
+        np.testing.assert_allclose(stackMagnified[i], magnify(stack[i], 2), atol=0.1)
+
+    stackMagnified = magnify_stack(stack, 2.5, enforce_same_value=False)
+    assert stackMagnified.shape == (3, int(stack.shape[1] * 2.5), int(stack.shape[2] * 2.5))
+    np.testing.assert_allclose(stackMagnified[:, ::5, ::5], stack[:, ::2, ::2], rtol=1e-3, atol=1e-2)
+
+
 def test_catmull_rom_zoom(random_image_with_ramp, plt):
     imageDownsampled = rebin_2d(random_image_with_ramp, 2, mode="mean")
     assert imageDownsampled.shape[0] == random_image_with_ramp.shape[0] / 2
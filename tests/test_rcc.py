@@ -0,0 +1,30 @@
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from nanopyx.core.analysis.rcc import minimize_shifts, rcc
+
+
+def test_rcc():
+    rng = np.random.default_rng(0)
+    base = gaussian_filter(rng.random((64, 64)), 2).astype(np.float32)
+    # integer circular shifts of 1 column and -2 rows per frame
+    frames = np.array([np.roll(base, (-2 * i, i), axis=(0, 1)) for i in range(6)])
+
+    drift_x, drift_y = rcc(frames, pairs_per_batch=4)
+
+    assert np.allclose(drift_x, -np.arange(6), atol=0.05)
+    assert np.allclose(drift_y, 2 * np.arange(6), atol=0.05)
+
+
+def test_minimize_shifts_outlier_rejection():
+    true_shifts = np.arange(6, dtype=np.float64)
+    shifts_x = true_shifts[np.newaxis, :] - true_shifts[:, np.newaxis]
+    shifts_y = np.zeros_like(shifts_x)
+    shifts_x[1, 4] += 10
+    weights = np.ones_like(shifts_x)
+
+    drift_x, drift_y = minimize_shifts(shifts_x, shifts_y, weights=weights, max_residual=1)
+
+    assert np.allclose(drift_x, true_shifts)
+    assert np.allclose(drift_y, 0)
+    assert not np.allclose(minimize_shifts(shifts_x, shifts_y)[0], true_shifts)
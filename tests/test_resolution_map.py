@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scipy.ndimage import gaussian_filter
+
+from nanopyx.core.analysis.resolution_map import calculate_resolution_map
+
+
+def _get_image_pair():
+    rng = np.random.default_rng(0)
+    points = np.zeros((256, 256))
+    points[rng.integers(0, 256, 1000), rng.integers(0, 256, 1000)] = 100
+    # sharp left half, blurred right half
+    img = np.concatenate([gaussian_filter(points, 1.5)[:, :128], gaussian_filter(points, 4)[:, 128:]], axis=1)
+    img_1 = img + rng.normal(0, 0.2, img.shape)
+    img_2 = img + rng.normal(0, 0.2, img.shape)
+    return img_1, img_2
+
+
+@pytest.mark.parametrize("method", ["frc", "decorr"])
+def test_resolution_map(method):
+    img_1, img_2 = _get_image_pair()
+
+    resolution_map = calculate_resolution_map(img_1, img_2, method=method, n_rows=2, n_cols=4, overlap=32)
+
+    assert resolution_map.shape == (256, 256)
+    assert np.all(resolution_map[:, :64] > 0)
+    assert np.all(resolution_map[:, :64].max() < resolution_map[:, 192:].min())
+
+
+def test_resolution_map_frc_defaults():
+    img_1, img_2 = _get_image_pair()
+
+    # 64 pixel blocks, which overlap their neighbours to reach the minimum FRC block size
+    resolution_map = calculate_resolution_map(img_1, img_2)
+
+    assert resolution_map.shape == (256, 256)
+    assert np.all(resolution_map[:, :64] > 0)
+    assert np.all(resolution_map[:, :64].max() < resolution_map[:, 192:].min())
+
+    with pytest.raises(ValueError):
+        calculate_resolution_map(img_1[:100, :100], img_2[:100, :100])
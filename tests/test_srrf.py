@@ -0,0 +1,41 @@
+import numpy as np
+
+from nanopyx.core.generate.noise_add_simplex import get_simplex_noise
+from nanopyx.core.transform.sr_radiality import Radiality
+from nanopyx.core.transform.sr_temporal_correlations import calculate_SRRF_temporal_correlations
+from nanopyx.liquid._le_radiality import Radiality as LiquidRadiality
+from nanopyx.methods.srrf import SRRF
+
+
+def test_srrf():
+    image = get_simplex_noise(24, 30, frames=9, amplitude=1000)
+    srrf = SRRF(magnification=2, ringRadius=0.5)
+    data_srrf, data_intensity = srrf.calculate(image, 3, SRRForder=2, max_in_flight=2)
+
+    assert data_srrf.shape == data_intensity.shape == (3, 48, 60)
+    imRad, imIW = Radiality(magnification=2, ringRadius=0.5).calculate(image[6:9])[:2]
+    np.testing.assert_allclose(data_srrf[2], calculate_SRRF_temporal_correlations(imRad, 2), rtol=1e-5, atol=1e-3)
+    np.testing.assert_allclose(data_intensity[2], calculate_SRRF_temporal_correlations(imIW, 2), rtol=1e-5, atol=1e-3)
+
+
+def test_srrf_liquid():
+    image = get_simplex_noise(24, 30, frames=6, amplitude=1000)
+    srrf = SRRF(magnification=2, ringRadius=0.5)
+    data_srrf, data_intensity = srrf.calculate(image, 3, use_liquid=True, frames_per_chunk=2)
+
+    imRad = np.asarray(LiquidRadiality().run(image[:3], magnification=2, ringRadius=0.5))
+    np.testing.assert_allclose(data_srrf[0], imRad.mean(axis=0), rtol=1e-5, atol=1e-3)
+
+
+def test_srrf_channels():
+    image = np.stack(
+        [get_simplex_noise(24, 30, frames=4, amplitude=1000), get_simplex_noise(24, 30, frames=4, amplitude=100)]
+    )
+    srrf = SRRF(magnification=2, ringRadius=0.5)
+    data_srrf, data_intensity = srrf.calculate(image, 2, SRRForder=2)
+
+    assert data_srrf.shape == data_intensity.shape == (2, 2, 48, 60)
+    for c in range(2):
+        expected_srrf, expected_intensity = srrf.calculate(image[c], 2, SRRForder=2)
+        np.testing.assert_allclose(data_srrf[c], expected_srrf, rtol=1e-5, atol=1e-3)
+        np.testing.assert_allclose(data_intensity[c], expected_intensity, rtol=1e-5, atol=1e-3)
@@ -6,4 +6,66 @@ from nanopyx.core.transform.sr_temporal_correlations import *
 def test_tc():
 
     data = np.random.randn(10, 5, 5)
-    output = calculate_SRRF_temporal_correlations(data)
\ No newline at end of file
+    output = calculate_SRRF_temporal_correlations(data)
+
+
+def test_temporal_reduction():
+
+    data = np.random.random((17, 6, 5)).astype(np.float32) * 100
+
+    for order in [0, 1, -1, 2, 4]:
+        reduction = TemporalReduction(order)
+        for f0 in range(0, data.shape[0], 3):
+            reduction.add(data[f0:f0 + 3])
+        expected = calculate_SRRF_temporal_correlations(data, order)
+        np.testing.assert_allclose(reduction.get_result(), expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+
+    reduction = TemporalReduction("var")
+    for frame in data:
+        reduction.add(frame)
+    np.testing.assert_allclose(reduction.get_result(), data.var(axis=0), rtol=1e-4, atol=1e-3)
+
+
+def test_temporal_correlations_liquid():
+
+    from nanopyx.liquid._le_temporal_correlations import TemporalCorrelations
+
+    data = np.random.random((15, 6, 7)).astype(np.float32) * 100
+    tc = TemporalCorrelations()
+
+    for order in [-1, 2, 3, 4]:
+        expected = calculate_pairwise_product_sum(data) if order == -1 else calculate_acrf_(data, order, False)
+        for run_time, run_type, out in tc.benchmark(data, order):
+            np.testing.assert_allclose(out, expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+
+    expected = calculate_acrf_(data, 2, True)
+    np.testing.assert_allclose(tc.run(data, 2, True), expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())
+
+
+def test_temporal_reduction_sliding_window_and_merge():
+
+    data = np.random.random((20, 6, 5)).astype(np.float32) * 100
+    window_size = 9
+
+    for reduction_name in ["max", "mean", "var", "pps", "tac2", "ac2", "ac3", "ac4"]:
+        sliding = TemporalReduction(reduction_name, window_size=window_size)
+        for t, frame in enumerate(data):
+            sliding.add(frame)
+            if t >= window_size + 2:
+                reference = TemporalReduction(reduction_name)
+                reference.add(data[t - window_size + 1 : t + 1])
+                expected = reference.get_result()
+                np.testing.assert_allclose(
+                    sliding.get_result(), expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max()
+                )
+
+        # parts of uneven length, including parts shorter than the lagged windows
+        merged = TemporalReduction(reduction_name)
+        for f0, f1 in [(0, 2), (2, 9), (9, 10), (10, 20)]:
+            part = TemporalReduction(reduction_name)
+            part.add(data[f0:f1])
+            merged.merge(part)
+        reference = TemporalReduction(reduction_name)
+        reference.add(data)
+        expected = reference.get_result()
+        np.testing.assert_allclose(merged.get_result(), expected, rtol=1e-4, atol=1e-4 * np.abs(expected).max())